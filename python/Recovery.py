@@ -1,38 +1,44 @@
 import os
 import time
-from web3 import Web3
+import threading
+from dataclasses import dataclass, field
+from typing import List, Tuple
 from eth_account import Account
 from dotenv import load_dotenv
+from rpc_pool import make_web3
+from proposal_ids import hash_proposal
+from gas_estimator import GasLimitEstimator
+from traffic import shared_controller
+from inclusion import InclusionTracker
+from tx_records import TxRecordSet
+from deployments import DeploymentRegistry
 
 # --- 1. INITIAL SETUP ---
 load_dotenv()
-w3 = Web3(Web3.HTTPProvider(os.getenv("RPC_URL")))
+w3 = make_web3()
 deployer_acct = Account.from_key(os.getenv("PRIVATE_KEY"))
 deployer_addr = deployer_acct.address
 
-MIN_DELAY = 130 
+POLL_INTERVAL = 12  # seconds between scheduler ticks (one slot)
+gas_estimator = GasLimitEstimator(w3)
+traffic = shared_controller()
+inclusion = InclusionTracker(w3)
+STEPS = ("delegate", "propose", "vote", "queue", "execute")
+records = {step: TxRecordSet() for step in STEPS}   # inclusion timings of every mission tx, per step
 
+deployments = DeploymentRegistry()
+
+def _mission(stack, kind):
+    return {"DAO": stack.address("DAOOptimized"), "TREASURY": stack.address(f"Treasury{kind.title()}"), "TYPE": kind}
+
+# The old stacks hold funds: pinned to their broadcast runs so a new deploy can't retarget them
+V3_OLD_RUN = int(os.getenv("V3_OLD_RUN", "1765480405553"))
+V4_OLD_RUN = int(os.getenv("V4_OLD_RUN", "1765480836264"))
 SCENARIOS = {
-    "V3_OLD": {
-        "DAO": "0x254F72604187ed373ed2b489019f480a1cbC975B",
-        "TREASURY": "0xB6Eb0b2098D14C4538958c85dc71e3601260D491",
-        "TYPE": "BASIC"
-    },
-    "V4_OLD": {
-        "DAO": "0xe60A30b207B16634a30396c112B5E0DE11702dF8",
-        "TREASURY": "0x3E7546fF271BA6503ac4Fcd02b79BD5a9db94C28",
-        "TYPE": "SECURE"
-    },
-    "V3_NEW_OPTIMIZED": {
-        "DAO": "0xcCaD7C3EfE882167826120960d951c42d30342Ff",
-        "TREASURY": "0x8Db4684aF971Fe772A26141B12f4c710fe4478d0",
-        "TYPE": "BASIC"
-    },
-    "V4_NEW_SECURE": {
-        "DAO": "0x5a89a310ade0Ed6b9D2085Fb7E98A0AAE4BFcb6A",
-        "TREASURY": "0x1A00DCf264B0A37e86B2D8852888fd7F59665856",
-        "TYPE": "SECURE"
-    }
+    "V3_OLD": _mission(deployments.pinned("V3", V3_OLD_RUN), "BASIC"),
+    "V4_OLD": _mission(deployments.pinned("V4", V4_OLD_RUN), "SECURE"),
+    "V3_NEW_OPTIMIZED": _mission(deployments.stack("V3"), "BASIC"),
+    "V4_NEW_SECURE": _mission(deployments.stack("V4"), "SECURE"),
 }
 
 # --- 2. FIXED ABIs (Including 'state') ---
@@ -41,6 +47,7 @@ DAO_ABI = [
     {"inputs": [{"name": "targets", "type": "address[]"}, {"name": "values", "type": "uint256[]"}, {"name": "calldatas", "type": "bytes[]"}, {"name": "description", "type": "string"}], "name": "propose", "outputs": [{"name": "", "type": "uint256"}], "stateMutability": "nonpayable", "type": "function"},
     {"inputs": [{"name": "proposalId", "type": "uint256"}, {"name": "support", "type": "uint8"}], "name": "castVote", "outputs": [{"name": "", "type": "uint256"}], "stateMutability": "nonpayable", "type": "function"},
     {"inputs": [{"name": "proposalId", "type": "uint256"}], "name": "state", "outputs": [{"name": "", "type": "uint8"}], "stateMutability": "view", "type": "function"},
+    {"inputs": [{"name": "proposalId", "type": "uint256"}], "name": "proposalEta", "outputs": [{"name": "", "type": "uint256"}], "stateMutability": "view", "type": "function"},
     {"inputs": [{"name": "targets", "type": "address[]"}, {"name": "values", "type": "uint256[]"}, {"name": "calldatas", "type": "bytes[]"}, {"name": "descriptionHash", "type": "bytes32"}], "name": "queue", "outputs": [{"name": "", "type": "uint256"}], "stateMutability": "nonpayable", "type": "function"},
     {"inputs": [{"name": "targets", "type": "address[]"}, {"name": "values", "type": "uint256[]"}, {"name": "calldatas", "type": "bytes[]"}, {"name": "descriptionHash", "type": "bytes32"}], "name": "execute", "outputs": [{"name": "", "type": "uint256"}], "stateMutability": "payable", "type": "function"},
     {"inputs": [], "name": "token", "outputs": [{"name": "", "type": "address"}], "stateMutability": "view", "type": "function"}
@@ -56,51 +63,93 @@ TREASURY_ABI = [
 ]
 
 # --- 3. HELPERS ---
-def send_tx(tx_func, gas=1000000):
+class NonceManager:
+    """Hands out consecutive deployer nonces so several txs can be in flight at once."""
+    def __init__(self, address):
+        self.address = address
+        self._lock = threading.Lock()
+        self.resync()
+
+    def resync(self):
+        self.next = w3.eth.get_transaction_count(self.address, "pending")
+
+    def take(self):
+        with self._lock:
+            nonce = self.next
+            self.next += 1
+            return nonce
+
+nonces = NonceManager(deployer_addr)
+
+def submit_tx(tx_func, gas=None):
+    """Signs and broadcasts with a managed nonce; returns the tx hash without waiting."""
+    if gas is None:
+        gas = gas_estimator.limit_for_call(tx_func, deployer_addr, default=1000000)
     tx = tx_func.build_transaction({
         'from': deployer_addr,
-        'nonce': w3.eth.get_transaction_count(deployer_addr),
+        'nonce': nonces.take(),
         'gas': gas,
         'gasPrice': w3.eth.gas_price
     })
     signed = deployer_acct.sign_transaction(tx)
-    tx_hash = w3.eth.send_raw_transaction(signed.raw_transaction)
-    receipt = w3.eth.wait_for_transaction_receipt(tx_hash)
-    if receipt.status == 0:
-        raise Exception(f"Transaction failed at hash: {w3.to_hex(tx_hash)}")
-    return receipt
-
-def wait_for_state(dao_contract, prop_id, target_state, label):
-    print(f"Waiting for state: {label}...")
-    while True:
-        current_state = dao_contract.functions.state(prop_id).call()
-        if current_state == target_state:
-            break
-        if current_state == 3: raise Exception("Proposal Defeated.")
-        time.sleep(15)
-
-# --- 4. RECOVERY MISSION ---
-def run_recovery_mission(name, config):
+    try:
+        tx_hash, _ = inclusion.submit(signed.raw_transaction)
+        return tx_hash
+    except Exception:
+        nonces.resync()  # the taken nonce was never used
+        raise
+
+# OZ Governor ProposalState
+PENDING, ACTIVE, CANCELED, DEFEATED, SUCCEEDED, QUEUED, EXPIRED, EXECUTED = range(8)
+
+@dataclass
+class Mission:
+    name: str
+    dao: object
+    targets: List[str]
+    calldatas: List[bytes]
+    desc_hash: bytes
+    prop_id: int
+    stage: str = "proposed"      # proposed -> voted -> queued -> executing -> executed | failed
+    pending: List[Tuple[str, str]] = field(default_factory=list)   # (step, tx hash) not yet settled
+    eta: int = 0
+
+    @property
+    def values(self):
+        return [0] * len(self.targets)
+
+    @property
+    def done(self):
+        return self.stage in ("executed", "failed")
+
+# --- 4. RECOVERY MISSIONS ---
+delegated_tokens = set()  # DAOs sharing a token only need one (still pending) delegation
+
+def prepare_mission(name, config):
+    """Builds a sweep proposal and submits delegate (if needed) + propose without waiting."""
     print(f"\n--- MISSION: RECOVER {name} ---")
     
     # DYNAMIC BALANCE CHECK
     balance_wei = w3.eth.get_balance(config["TREASURY"])
     if balance_wei == 0:
         print(f"Skipping {name}: Treasury is empty.")
-        return
+        return None
     
     print(f"Balance to recover: {w3.from_wei(balance_wei, 'ether')} ETH")
 
     dao = w3.eth.contract(address=config["DAO"], abi=DAO_ABI)
     treasury = w3.eth.contract(address=config["TREASURY"], abi=TREASURY_ABI)
+    gas_estimator.register(config["DAO"], "DAOOptimized")
+    gas_estimator.register(config["TREASURY"], "TreasuryBasic" if config["TYPE"] == "BASIC" else "TreasurySecure")
 
-    # 1. Self-Delegate
+    # 1. Self-Delegate (lands before the proposal: earlier nonce, so it precedes the snapshot)
     token_addr = dao.functions.token().call()
     token = w3.eth.contract(address=token_addr, abi=TOKEN_ABI)
-    if token.functions.getVotes(deployer_addr).call() == 0:
+    pending = []
+    if token_addr not in delegated_tokens and token.functions.getVotes(deployer_addr).call() == 0:
         print(f"Delegating whale power...")
-        send_tx(token.functions.delegate(deployer_addr))
-        time.sleep(10)
+        pending.append(("delegate", submit_tx(token.functions.delegate(deployer_addr), gas=200000)))
+    delegated_tokens.add(token_addr)
 
     # 2. Build Proposal
     if config["TYPE"] == "BASIC":
@@ -116,37 +165,102 @@ def run_recovery_mission(name, config):
     desc = f"Sweep {name} {int(time.time())}"
     desc_hash = w3.keccak(text=desc)
 
-    # 3. Governance Lifecycle
+    # 3. Propose (the lifecycle is advanced by the scheduler)
     print("Proposing...")
-    receipt = send_tx(dao.functions.propose(targets, [0]*len(targets), calldatas, desc))
-    logs = dao.events.ProposalCreated().process_receipt(receipt)
-    prop_id = logs[0]['args']['proposalId']
-    
-    wait_for_state(dao, prop_id, 1, "Active")
-    send_tx(dao.functions.castVote(prop_id, 1))
-    print("Whale vote cast.")
-    
-    wait_for_state(dao, prop_id, 4, "Succeeded")
-    
-    print("Queueing...")
-    send_tx(dao.functions.queue(targets, [0]*len(targets), calldatas, desc_hash))
-    
-    print(f"Waiting {MIN_DELAY}s for Timelock...")
-    time.sleep(MIN_DELAY)
-    
-    print("Executing final payout...")
-    send_tx(dao.functions.execute(targets, [0]*len(targets), calldatas, desc_hash))
-    print(f"DONE: {name} recovered!")
+    prop_id = hash_proposal(targets, [0]*len(targets), calldatas, desc_hash)
+    pending.append(("propose", submit_tx(dao.functions.propose(targets, [0]*len(targets), calldatas, desc))))
+    return Mission(name, dao, targets, calldatas, desc_hash, prop_id, pending=pending)
+
+def advance(mission, state, now):
+    """Moves one mission forward from its on-chain state; submits at most one tx."""
+    if state in (CANCELED, DEFEATED, EXPIRED):
+        mission.stage = "failed"
+        print(f"[{mission.name}] Proposal ended in state {state}.")
+    elif state == ACTIVE and mission.stage == "proposed":
+        mission.pending.append(("vote", submit_tx(mission.dao.functions.castVote(mission.prop_id, 1))))
+        mission.stage = "voted"
+        print(f"[{mission.name}] Whale vote cast.")
+    elif state == SUCCEEDED and mission.stage in ("proposed", "voted"):
+        print(f"[{mission.name}] Queueing...")
+        mission.pending.append(("queue", submit_tx(mission.dao.functions.queue(mission.targets, mission.values, mission.calldatas, mission.desc_hash))))
+        mission.stage = "queued"
+    elif state == QUEUED:
+        if not mission.eta:
+            mission.eta = mission.dao.functions.proposalEta(mission.prop_id).call()
+            print(f"[{mission.name}] Timelock ETA in {max(0, mission.eta - now)}s")
+        if now >= mission.eta and mission.stage != "executing":
+            print(f"[{mission.name}] Executing final payout...")
+            mission.pending.append(("execute", submit_tx(mission.dao.functions.execute(mission.targets, mission.values, mission.calldatas, mission.desc_hash))))
+            mission.stage = "executing"
+    elif state == EXECUTED:
+        mission.stage = "executed"
+        print(f"DONE: {mission.name} recovered!")
+
+def settle(mission):
+    """Waits for the mission's submitted txs and records their inclusion timings; a reverted one fails the mission."""
+    while mission.pending:
+        step, tx_hash = mission.pending.pop(0)
+        try:
+            receipt = inclusion.wait(tx_hash)
+        except Exception as e:
+            inclusion.pop(tx_hash)
+            records[step].failure(deployer_addr, e)
+            mission.stage = "failed"
+            print(f"[{mission.name}] {step} {tx_hash} never mined: {e}")
+            continue
+        records[step].add(receipt, timing=inclusion.pop(tx_hash))
+        if receipt.status == 0:
+            mission.stage = "failed"
+            print(f"[{mission.name}] Transaction failed at hash: {w3.to_hex(receipt.transactionHash)}")
+
+def run_scheduler(missions):
+    """Single watcher loop: one state poll per tick for every open mission, execute at each ETA."""
+    while True:
+        open_missions = [m for m in missions if not m.done]
+        if not open_missions:
+            return
+        # Receipts of every mission are awaited together, so one slow tx delays its tick only
+        traffic.map(settle, [m for m in open_missions if m.pending])
+        ready = [m for m in open_missions if not m.done]
+        states = traffic.map(lambda m: m.dao.functions.state(m.prop_id).call(), ready)
+        now = w3.eth.get_block("latest")["timestamp"]
+        for mission, state in zip(ready, states):
+            if isinstance(state, Exception):
+                continue   # e.g. propose not mined yet: unknown proposal id
+            try:
+                advance(mission, state, now)
+            except Exception as e:
+                mission.stage = "failed"
+                print(f"Failed {mission.name}: {e}")
+        time.sleep(POLL_INTERVAL)
 
 if __name__ == "__main__":
     start_bal = w3.eth.get_balance(deployer_addr)
     print(f"Initial Balance: {w3.from_wei(start_bal, 'ether')} ETH")
     
+    # All proposals go out up front; their lifecycles then overlap under one scheduler
+    missions = []
     for name, config in SCENARIOS.items():
         try:
-            run_recovery_mission(name, config)
+            mission = prepare_mission(name, config)
+            if mission:
+                missions.append(mission)
         except Exception as e:
             print(f"Failed {name}: {e}")
+
+    started = time.time()
+    run_scheduler(missions)
+    print(f"\nScheduler finished in {time.time() - started:.0f}s: " +
+          ", ".join(f"{m.name}={m.stage}" for m in missions))
+    for step, step_records in records.items():
+        if not len(step_records):
+            continue
+        inclusion.confirm_records(step_records)
+        p = step_records.timing_percentiles()
+        print(f"[LATENCY] {step} (n={len(step_records)}): "
+              f"pending={p['pending_ms_p50']:.0f}/{p['pending_ms_p95']:.0f} "
+              f"inclusion={p['inclusion_ms_p50']:.0f}/{p['inclusion_ms_p95']:.0f} "
+              f"confirmed={p['confirm_ms_p50']:.0f}/{p['confirm_ms_p95']:.0f} ms (p50/p95)")
             
     end_bal = w3.eth.get_balance(deployer_addr)
     print(f"\nFinal Balance: {w3.from_wei(end_bal, 'ether')} ETH")
@@ -0,0 +1,255 @@
+#!/usr/bin/env python3
+"""
+async_harness.py
+
+asyncio-native harness core on AsyncWeb3.
+
+One AsyncHTTPProvider per run shares a single aiohttp session (keep-alive
+pool of ASYNC_MAX_CONNECTIONS), and a semaphore caps in-flight requests
+at ASYNC_MAX_INFLIGHT, so hundreds of reads and transactions run from one
+event loop instead of a thread per call. The cap is taken per RPC (receipt
+polls included), never around a whole task, so a task holding a slot never
+waits for a second one.
+
+Async counterparts of the gas_optimizer / fund_members helpers:
+- send_tx                       build (estimate), sign, send, await receipt
+- wait_for_blocks               block-count wait
+- wait_for_proposal_succeeded   Governor state poll (4 = Succeeded)
+- fund_members                  concurrent balance scan + top-up transfers
+- send_votes                    concurrent castVote from many members
+
+Usage:
+    async with AsyncHarness() as h:
+        dao = h.contract(dao_addr, abi)
+        receipts = await h.send_votes(dao, proposal_id, voters, 1)
+
+    python async_harness.py fund      # async version of fund_members.py
+"""
+
+import os
+import sys
+import json
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+import aiohttp
+from dotenv import load_dotenv
+from eth_account import Account
+from web3 import AsyncWeb3, AsyncHTTPProvider, Web3
+from web3.exceptions import TransactionNotFound
+from gas_estimator import GAS_SAFETY_MARGIN
+
+load_dotenv()
+
+ASYNC_RPC_URL = os.getenv("ASYNC_RPC_URL") or (os.getenv("RPC_URLS") or os.getenv("RPC_URL") or "").split(",")[0].strip()
+ASYNC_MAX_INFLIGHT = int(os.getenv("ASYNC_MAX_INFLIGHT", "256"))
+ASYNC_MAX_CONNECTIONS = int(os.getenv("ASYNC_MAX_CONNECTIONS", "64"))
+RECEIPT_TIMEOUT = float(os.getenv("RECEIPT_TIMEOUT", "600"))
+RECEIPT_POLL = float(os.getenv("RECEIPT_POLL", "1.0"))
+
+PROPOSAL_ACTIVE = 1
+PROPOSAL_DEFEATED = 3
+PROPOSAL_SUCCEEDED = 4
+
+
+class AsyncHarness:
+    def __init__(self, rpc_url: str = ASYNC_RPC_URL, max_inflight: int = ASYNC_MAX_INFLIGHT,
+                 max_connections: int = ASYNC_MAX_CONNECTIONS, margin: float = GAS_SAFETY_MARGIN):
+        if not rpc_url:
+            raise ValueError("ASYNC_RPC_URL / RPC_URL is not set.")
+        self.rpc_url = rpc_url
+        self.max_inflight = max_inflight
+        self.max_connections = max_connections
+        self.margin = margin
+        self.session: Optional[aiohttp.ClientSession] = None
+        self.w3: Optional[AsyncWeb3] = None
+        self.chain_id = 0
+        self._slots: Optional[asyncio.Semaphore] = None
+
+    # --- LIFECYCLE ---
+    async def __aenter__(self) -> "AsyncHarness":
+        self.session = aiohttp.ClientSession(connector=aiohttp.TCPConnector(limit=self.max_connections))
+        provider = AsyncHTTPProvider(self.rpc_url)
+        await provider.cache_async_session(self.session)
+        self.w3 = AsyncWeb3(provider)
+        self._slots = asyncio.Semaphore(self.max_inflight)
+        self.chain_id = await self.w3.eth.chain_id
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        await self.session.close()
+
+    def contract(self, address: str, abi: list):
+        return self.w3.eth.contract(address=Web3.to_checksum_address(address), abi=abi)
+
+    # --- CONCURRENCY ---
+    async def limited(self, awaitable: Awaitable) -> Any:
+        """Awaits one RPC under the in-flight cap (never wrap a call that takes slots itself)."""
+        async with self._slots:
+            return await awaitable
+
+    async def map(self, fn: Callable[[Any], Awaitable], items: Iterable[Any]) -> List[Any]:
+        """
+        Like traffic.map: results in input order, exceptions returned in place
+        of results. fn's own RPCs take the slots (via limited).
+        """
+        return await asyncio.gather(*(fn(item) for item in items), return_exceptions=True)
+
+    # --- TRANSACTIONS ---
+    async def send_tx(self, account, tx_func, nonce: int, gas: Optional[int] = None,
+                      gas_price: Optional[int] = None, value: int = 0) -> Any:
+        """Builds (estimating gas when not given), signs, sends and awaits the receipt; raises on revert."""
+        params = {"chainId": self.chain_id, "from": account.address, "nonce": nonce, "value": value}
+        if gas is None:
+            gas = int(await self.limited(tx_func.estimate_gas({"from": account.address, "value": value})) * self.margin)
+        params["gas"] = gas
+        params["gasPrice"] = gas_price if gas_price is not None else await self.limited(self.w3.eth.gas_price)
+        tx = await tx_func.build_transaction(params)
+        return await self.send_raw(account.sign_transaction(tx).raw_transaction)
+
+    async def send_raw(self, raw_tx: bytes) -> Any:
+        return await self.wait_receipt(await self.limited(self.w3.eth.send_raw_transaction(raw_tx)))
+
+    async def wait_receipt(self, tx_hash) -> Any:
+        """Polls for the receipt, one capped RPC per poll; raises on revert or after RECEIPT_TIMEOUT."""
+        deadline = asyncio.get_running_loop().time() + RECEIPT_TIMEOUT
+        while True:
+            try:
+                receipt = await self.limited(self.w3.eth.get_transaction_receipt(tx_hash))
+                break
+            except TransactionNotFound:
+                if asyncio.get_running_loop().time() > deadline:
+                    raise TimeoutError(f"No receipt for {Web3.to_hex(tx_hash)} after {RECEIPT_TIMEOUT:.0f}s")
+                await asyncio.sleep(RECEIPT_POLL)
+        if receipt["status"] != 1:
+            raise Exception(f"Transaction Reverted On-Chain: Tx hash {Web3.to_hex(tx_hash)}")
+        return receipt
+
+    # --- WAITS ---
+    async def wait_for_blocks(self, num_blocks: int, poll: float = 5.0) -> int:
+        if num_blocks <= 0:
+            return await self.w3.eth.block_number
+        target = await self.w3.eth.block_number + num_blocks
+        print(f"Waiting for {num_blocks} block(s) (target {target})")
+        while (current := await self.w3.eth.block_number) < target:
+            await asyncio.sleep(poll)
+        return current
+
+    async def wait_for_proposal_succeeded(self, dao_contract, proposal_id: int, poll: float = 300.0) -> bool:
+        """Polls Governor.state until Succeeded (True) or Defeated (False)."""
+        while True:
+            state = await dao_contract.functions.state(proposal_id).call()
+            if state == PROPOSAL_SUCCEEDED:
+                return True
+            if state == PROPOSAL_DEFEATED:
+                print("[Error] Proposal was DEFEATED. Check quorum and voting power.")
+                return False
+            label = "Active" if state == PROPOSAL_ACTIVE else str(state)
+            print(f"  > State: {label} | Block: {await self.w3.eth.block_number} | next check in {poll:.0f}s")
+            await asyncio.sleep(poll)
+
+    # --- BULK LOOPS ---
+    async def fund_members(self, owner, addresses: Sequence[str], min_balance: int,
+                           buffer: int) -> Tuple[List[Tuple[str, int]], List[Tuple[str, Any]]]:
+        """
+        Tops every address up to min_balance (+ buffer for the transfer itself).
+        Transfers are submitted in owner-nonce order, then their receipts are
+        awaited concurrently. A rejected send re-reads the pending nonce and
+        retries once; if that fails too, submission stops so no later
+        transfer is stranded behind a nonce gap (those count as failures).
+        Returns (funded [(address, amount)], failures [(address, error)]).
+        """
+        balances = await self.map(lambda a: self.limited(self.w3.eth.get_balance(a)), addresses)
+        plan, failures = [], []
+        for addr, balance in zip(addresses, balances):
+            if isinstance(balance, Exception):
+                failures.append((addr, balance))
+            elif balance < min_balance:
+                plan.append((addr, min_balance - balance + buffer))
+        if not plan:
+            return [], failures
+
+        gas_price = await self.w3.eth.gas_price
+        owner_balance = await self.w3.eth.get_balance(owner.address)
+        required = sum(amount + gas_price * 21000 for _, amount in plan)
+        if owner_balance < required:
+            raise Exception(f"Owner holds {Web3.from_wei(owner_balance, 'ether')} ETH, "
+                            f"batch needs {Web3.from_wei(required, 'ether')} ETH")
+
+        nonce = await self.w3.eth.get_transaction_count(owner.address, "pending")
+
+        def submit(addr: str, amount: int, nonce: int) -> Awaitable:
+            tx = {"chainId": self.chain_id, "from": owner.address, "to": addr, "value": amount,
+                  "gas": 21000, "gasPrice": gas_price, "nonce": nonce}
+            return self.limited(self.w3.eth.send_raw_transaction(owner.sign_transaction(tx).raw_transaction))
+
+        submitted = []   # (address, amount, tx hash)
+        for k, (addr, amount) in enumerate(plan):
+            try:
+                tx_hash = await submit(addr, amount, nonce)
+            except Exception as e:
+                error, tx_hash = e, None
+                fresh = await self.w3.eth.get_transaction_count(owner.address, "pending")
+                if fresh != nonce:
+                    nonce = fresh
+                    try:
+                        tx_hash = await submit(addr, amount, nonce)
+                    except Exception as retry_error:
+                        error = retry_error
+                if tx_hash is None:
+                    failures.append((addr, error))
+                    failures.extend((a, Exception("not sent: an earlier transfer was rejected")) for a, _ in plan[k + 1:])
+                    break
+            submitted.append((addr, amount, tx_hash))
+            nonce += 1
+
+        outcomes = await self.map(lambda job: self.wait_receipt(job[2]), submitted)
+        funded = []
+        for (addr, amount, _), outcome in zip(submitted, outcomes):
+            if isinstance(outcome, Exception):
+                failures.append((addr, outcome))
+            else:
+                funded.append((addr, amount))
+        return funded, failures
+
+    async def send_votes(self, dao_contract, proposal_id: int, voters: Sequence[Any], support,
+                         gas: Optional[Dict[str, int]] = None, gas_price: Optional[int] = None) -> List[Any]:
+        """castVote from every voter concurrently; receipts (or exceptions) in voter order."""
+        if gas_price is None:
+            gas_price = await self.w3.eth.gas_price
+
+        async def vote(acct):
+            nonce = await self.limited(self.w3.eth.get_transaction_count(acct.address, "pending"))
+            return await self.send_tx(acct, dao_contract.functions.castVote(proposal_id, support), nonce,
+                                      gas=(gas or {}).get(acct.address), gas_price=gas_price)
+
+        return await asyncio.gather(*(vote(v) for v in voters), return_exceptions=True)
+
+
+# --- CLI: async member funding ---
+def _member_addresses(files: Sequence[str] = ("dao_members.json", "../dao_vul_members.json")) -> List[str]:
+    addresses = set()
+    for path in files:
+        if not os.path.exists(path):
+            print(f"Warning: member file not found at {path}")
+            continue
+        with open(path, "r") as f:
+            addresses.update(Web3.to_checksum_address(m["address"]) for m in json.load(f))
+    return sorted(addresses)
+
+
+async def _fund() -> int:
+    owner = Account.from_key(os.getenv("PRIVATE_KEY"))
+    addresses = [a for a in _member_addresses() if a != owner.address]
+    async with AsyncHarness() as h:
+        funded, failures = await h.fund_members(owner, addresses, Web3.to_wei(0.005, "ether"), Web3.to_wei(0.001, "ether"))
+    print(f"Funded {len(funded)} of {len(addresses)} member(s), "
+          f"{Web3.from_wei(sum(a for _, a in funded), 'ether')} ETH sent, {len(failures)} failure(s)")
+    for addr, err in failures:
+        print(f"  FAILURE {addr}: {err}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    if sys.argv[1:] != ["fund"]:
+        raise SystemExit("usage: python async_harness.py fund")
+    sys.exit(asyncio.run(_fund()))
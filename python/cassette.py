@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+"""
+cassette.py
+
+Record / replay of every JSON-RPC exchange of a harness run.
+
+RPC_CASSETTE=record runs against the real endpoints and writes each
+request/response pair to RPC_CASSETTE_FILE when the process exits;
+RPC_CASSETTE=replay serves the same responses back with no network, so
+reporting and parsing code can be re-run offline in seconds.
+
+On disk (gzip JSON) responses are stored once and referenced by index:
+    {"version": 1, "meta": {...}, "responses": [...],
+     "calls": {"<method> <params>": [i, j, ...]}, "sends": [k, ...]}
+A request that repeats (eth_blockNumber while waiting) replays its recorded
+answers in order and then keeps returning the last one. Raw transactions
+whose bytes changed since recording (e.g. a different cached gas limit) are
+answered with the first recorded send not yet served, in order (exact
+matches consume their recorded send too). An exception raised by the pool
+(every endpoint failed) is recorded as {"exception": {"type", "message"}}
+and raised again on replay.
+
+Values a run derives from the clock (proposal descriptions) must be pinned
+with pin(), so the replayed run issues the same requests. Callers skip
+sleeps when is_replay() is true.
+
+Usage:
+    RPC_CASSETTE=record python gas_optimizer.py
+    RPC_CASSETTE=replay python gas_optimizer.py
+"""
+
+import os
+import gzip
+import json
+import atexit
+import builtins
+import threading
+from typing import Any, Dict, List, Optional
+from web3._utils.encoding import Web3JsonEncoder
+from web3.providers.base import JSONBaseProvider
+from traffic import shared_controller
+
+RPC_CASSETTE = os.getenv("RPC_CASSETTE", "").strip().lower()    # "record" | "replay" | ""
+RPC_CASSETTE_FILE = os.getenv("RPC_CASSETTE_FILE", "reports/cassette.json.gz")
+CASSETTE_VERSION = 1
+
+SEND_METHOD = "eth_sendRawTransaction"
+
+
+class CassetteMiss(Exception):
+    """Replay got a request the recording never saw."""
+
+
+class RecordedRPCError(Exception):
+    """A recorded provider exception whose type isn't a builtin."""
+
+
+def cassette_mode() -> str:
+    if RPC_CASSETTE not in ("", "record", "replay"):
+        raise ValueError(f"RPC_CASSETTE must be 'record' or 'replay', got {RPC_CASSETTE!r}")
+    return RPC_CASSETTE
+
+
+def is_replay() -> bool:
+    return cassette_mode() == "replay"
+
+
+def request_key(method: str, params: Any) -> str:
+    return f"{method} {json.dumps(params, cls=Web3JsonEncoder, sort_keys=True, separators=(',', ':'))}"
+
+
+class Cassette:
+    def __init__(self, path: str = RPC_CASSETTE_FILE):
+        self.path = path
+        self.meta: Dict[str, Any] = {}
+        self.responses: List[Dict[str, Any]] = []
+        self.calls: Dict[str, List[int]] = {}
+        self.sends: List[int] = []
+        self._interned: Dict[str, int] = {}
+        self._cursor: Dict[str, int] = {}
+        self._sends_served: List[bool] = []
+        self._lock = threading.Lock()
+
+    # --- RECORD ---
+    def _intern(self, body: Dict[str, Any]) -> int:
+        blob = json.dumps(body, sort_keys=True, separators=(",", ":"))
+        idx = self._interned.get(blob)
+        if idx is None:
+            idx = self._interned[blob] = len(self.responses)
+            self.responses.append(body)
+        return idx
+
+    def record(self, method: str, params: Any, response: Dict[str, Any]) -> None:
+        # id/jsonrpc differ per request and are rebuilt on replay
+        body = {k: v for k, v in response.items() if k not in ("id", "jsonrpc")}
+        key = request_key(method, params)
+        with self._lock:
+            idx = self._intern(body)
+            self.calls.setdefault(key, []).append(idx)
+            if method == SEND_METHOD:
+                self.sends.append(idx)
+
+    def record_exception(self, method: str, params: Any, error: Exception) -> None:
+        self.record(method, params, {"exception": {"type": type(error).__name__, "message": str(error)}})
+
+    def save(self, path: Optional[str] = None) -> None:
+        path = path or self.path
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        with self._lock:
+            data = {"version": CASSETTE_VERSION, "meta": self.meta, "responses": self.responses,
+                    "calls": self.calls, "sends": self.sends}
+        with gzip.open(path, "wt") as f:
+            json.dump(data, f, separators=(",", ":"))
+        print(f"Saved RPC cassette ({sum(len(v) for v in self.calls.values())} calls, "
+              f"{len(self.responses)} distinct responses): {path}")
+
+    # --- REPLAY ---
+    @classmethod
+    def load(cls, path: str = RPC_CASSETTE_FILE) -> "Cassette":
+        with gzip.open(path, "rt") as f:
+            data = json.load(f)
+        if data.get("version") != CASSETTE_VERSION:
+            raise ValueError(f"Unsupported cassette version {data.get('version')} in {path}")
+        cassette = cls(path)
+        cassette.meta = data["meta"]
+        cassette.responses = data["responses"]
+        cassette.calls = data["calls"]
+        cassette.sends = data["sends"]
+        cassette._sends_served = [False] * len(cassette.sends)
+        return cassette
+
+    def _serve_send(self, idx: Optional[int] = None) -> Optional[int]:
+        """Marks the first unserved recorded send (with response `idx`, if given) as served."""
+        for pos, sent in enumerate(self.sends):
+            if not self._sends_served[pos] and (idx is None or sent == idx):
+                self._sends_served[pos] = True
+                return sent
+        return None
+
+    @staticmethod
+    def _answer(body: Dict[str, Any]) -> Dict[str, Any]:
+        error = body.get("exception")
+        if error is None:
+            return dict(body)
+        exc_type = getattr(builtins, error["type"], None)
+        if isinstance(exc_type, type) and issubclass(exc_type, Exception):
+            raise exc_type(error["message"])
+        raise RecordedRPCError(f"{error['type']}: {error['message']}")
+
+    def play(self, method: str, params: Any) -> Dict[str, Any]:
+        key = request_key(method, params)
+        with self._lock:
+            answers = self.calls.get(key)
+            if answers:
+                n = self._cursor.get(key, 0)
+                self._cursor[key] = n + 1
+                idx = answers[min(n, len(answers) - 1)]
+                if method == SEND_METHOD:
+                    self._serve_send(idx)
+                body = self.responses[idx]
+            elif method == SEND_METHOD:
+                # Changed bytes: the next send the run hasn't been answered with yet
+                idx = self._serve_send()
+                body = None if idx is None else self.responses[idx]
+            else:
+                body = None
+        if body is not None:
+            return self._answer(body)
+        raise CassetteMiss(f"No recorded response for {key[:200]}")
+
+    # --- PINNED VALUES ---
+    def pin(self, name: str, value: Any, replay: bool) -> Any:
+        """Records a run-specific value, or returns the recorded one on replay."""
+        with self._lock:
+            if replay:
+                if name not in self.meta:
+                    raise CassetteMiss(f"Cassette has no pinned value {name!r}")
+                return self.meta[name]
+            self.meta[name] = value
+            return value
+
+
+class ReplayProvider(JSONBaseProvider):
+    """Answers every request from a cassette; never touches the network."""
+
+    def __init__(self, cassette: Cassette, **kwargs: Any):
+        super().__init__(**kwargs)
+        self.cassette = cassette
+        self.traffic = shared_controller()   # bulk loops still use provider.traffic.map
+        self._ids = 0
+        self._lock = threading.Lock()
+
+    def __str__(self) -> str:
+        return f"RPC cassette replay ({self.cassette.path})"
+
+    def make_request(self, method, params):
+        with self._lock:
+            self._ids += 1
+            request_id = self._ids
+        return {"jsonrpc": "2.0", "id": request_id, **self.cassette.play(method, params)}
+
+    def is_connected(self, show_traceback: bool = False) -> bool:
+        return True
+
+    def stats(self) -> List[dict]:
+        return []
+
+
+_shared: Optional[Cassette] = None
+_shared_lock = threading.Lock()
+
+
+def shared_cassette() -> Optional[Cassette]:
+    """Process-wide cassette for the configured mode (None when RPC_CASSETTE is unset)."""
+    global _shared
+    mode = cassette_mode()
+    if not mode:
+        return None
+    with _shared_lock:
+        if _shared is None:
+            if mode == "replay":
+                _shared = Cassette.load(RPC_CASSETTE_FILE)
+                print(f"Replaying RPC cassette: {RPC_CASSETTE_FILE}")
+            else:
+                _shared = Cassette(RPC_CASSETTE_FILE)
+                atexit.register(_shared.save)
+        return _shared
+
+
+def pin(name: str, value: Any) -> Any:
+    """pin("description", f"... {int(time.time())}"): stable across record and replay."""
+    cassette = shared_cassette()
+    return value if cassette is None else cassette.pin(name, value, is_replay())
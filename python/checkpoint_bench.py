@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+"""
+checkpoint_bench.py
+
+Vote and transfer cost as a function of ERC20Votes checkpoint depth, on anvil.
+
+DAOOptimized weighs a vote with token.getPastVotes(voter, snapshot), a
+binary search over the voter's checkpoints (Trace208.upperLookupRecent:
+a probe at len - sqrt(len), then a search of the remaining range), and
+every transfer or delegation pushes new checkpoints. Harness members only
+ever hold one checkpoint. Here one member ("deep") is given a history of
+D = 1..10,000 checkpoints, one per block, written with anvil_setStorageAt
+(StateSeeder.seed_token(depth=D)) instead of D transfers in D blocks.
+
+Measured per depth:
+- cast_vote:       DAOOptimized.castVote by the deep member (gasUsed)
+- lookup_recent:   getPastVotes at the proposal snapshot (eth_estimateGas)
+- lookup_mid:      getPastVotes at the middle of the history (eth_estimateGas)
+- transfer:        deep member -> fresh member (moves votes: two checkpoint pushes)
+- delegate:        deep member re-delegates to another fresh member
+- vulnerable_*:    VulnerableDAO.castVote and VulnerableMembershipToken
+                   transfer for the same member: plain balanceOf, no history
+
+Each metric gets a least-squares fit base + per_doubling * log2(D).
+Everything runs from one snapshot (fixtures.py) per depth.
+
+Usage (anvil running, `forge build` done):
+    python checkpoint_bench.py --depths 1,10,100,1000,10000
+"""
+
+import os
+import sys
+import time
+import json
+import math
+import argparse
+from dataclasses import dataclass, asdict
+from typing import Any, Dict, List
+from web3 import Web3
+from rpc_pool import make_web3
+from traffic import shared_controller
+from proposal_ids import governor_proposal_id, vulnerable_proposal_id
+from state_seeding import StateSeeder, StorageLayout
+from scale_sim import (
+    LocalChain, deploy_optimized_stack, load_artifact, synthetic_members, linear_fit,
+    SIM_RPC_URL, MEMBER_BALANCE, VOTING_DELAY, REPORT_DIR,
+)
+
+UNIT = Web3.to_wei(1, "ether")
+GAS_HEADROOM = 1.3
+METRICS = ("cast_vote", "lookup_recent", "lookup_mid", "transfer", "delegate",
+           "vulnerable_cast_vote", "vulnerable_transfer")
+
+
+@dataclass
+class DepthPoint:
+    depth: int
+    checkpoints: int = 0          # numCheckpoints read back after seeding
+    cast_vote: int = 0
+    lookup_recent: int = 0
+    lookup_mid: int = 0
+    transfer: int = 0
+    delegate: int = 0
+    vulnerable_cast_vote: int = 0
+    vulnerable_transfer: int = 0
+    error: str = ""
+
+
+@dataclass
+class Bench:
+    """The deployed contracts every point reuses (restored from the snapshot)."""
+    token: Any
+    dao: Any
+    vulnerable_token: Any
+    vulnerable_dao: Any
+    deep: str       # gets the seeded history
+    fresh: str      # transfer recipient (one checkpoint)
+    delegatee: str  # re-delegation target (one checkpoint)
+
+
+# --- SETUP ---
+def deploy_bench(chain: LocalChain) -> Bench:
+    deep, fresh, delegatee = synthetic_members(3, "checkpoint-bench")
+    stack = deploy_optimized_stack(chain, [fresh, delegatee], quorum_numerator=0)
+    chain.fund([deep], MEMBER_BALANCE)
+
+    token_abi, token_bin = load_artifact("VulnerableMembershipToken")
+    dao_abi, dao_bin = load_artifact("VulnerableDAO")
+    vtoken, _ = chain.deploy(token_abi, token_bin, "Checkpoint Bench", "CPB")
+    vdao, _ = chain.deploy(dao_abi, dao_bin, vtoken.address, [deep, fresh, delegatee])
+    # 1 of 3 tokens: the deep member's vote never reaches yes*2 >= supply, so it doesn't execute
+    chain.seeder.seed_token(vtoken.address, StorageLayout.from_artifact("VulnerableMembershipToken"),
+                            {deep: UNIT, fresh: UNIT, delegatee: UNIT})
+    return Bench(stack.token, stack.dao, vtoken, vdao, deep, fresh, delegatee)
+
+
+# --- MEASUREMENT ---
+def send(chain: LocalChain, sender: str, tx_func) -> int:
+    return chain.send(sender, tx_func, int(tx_func.estimate_gas({"from": sender}) * GAS_HEADROOM))["gasUsed"]
+
+
+def measure(chain: LocalChain, bench: Bench, layout: StorageLayout, depth: int) -> DepthPoint:
+    point = DepthPoint(depth)
+    token, deep = bench.token, bench.deep
+    chain.seeder.seed_token(token.address, layout, {deep: UNIT}, depth=depth)
+    point.checkpoints = token.functions.numCheckpoints(deep).call()
+    if point.checkpoints != depth:
+        raise Exception(f"seeded {point.checkpoints} checkpoint(s), expected {depth}")
+
+    # Both proposals before any vote, so both snapshots follow the whole history
+    targets, values, calldatas = [chain.deployer], [0], [b""]
+    description = f"checkpoint depth {depth}"
+    chain.send(chain.deployer, bench.dao.functions.propose(targets, values, calldatas, description))
+    proposal_id = governor_proposal_id(targets, values, calldatas, description)
+    receipt = chain.send(chain.deployer, bench.vulnerable_dao.functions.propose(chain.deployer, 0, b"", description))
+    vulnerable_id = vulnerable_proposal_id(receipt, bench.vulnerable_dao.address)
+    chain.rpc("anvil_mine", Web3.to_hex(VOTING_DELAY + 1))
+
+    snapshot = bench.dao.functions.proposalSnapshot(proposal_id).call()
+    last_key, _ = token.functions.checkpoints(deep, depth - 1).call()
+    mid_key = last_key - depth // 2
+    point.lookup_recent = token.functions.getPastVotes(deep, snapshot).estimate_gas({"from": deep})
+    point.lookup_mid = token.functions.getPastVotes(deep, mid_key).estimate_gas({"from": deep})
+    point.cast_vote = send(chain, deep, bench.dao.functions.castVote(proposal_id, 1))
+    point.vulnerable_cast_vote = send(chain, deep, bench.vulnerable_dao.functions.castVote(vulnerable_id, True))
+
+    point.transfer = send(chain, deep, token.functions.transfer(bench.fresh, UNIT // 2))
+    point.delegate = send(chain, deep, token.functions.delegate(bench.delegatee))
+    point.vulnerable_transfer = send(chain, deep, bench.vulnerable_token.functions.transfer(bench.fresh, UNIT // 2))
+    return point
+
+
+def fits(points: List[DepthPoint]) -> Dict[str, Dict[str, float]]:
+    """Per metric: base + per_doubling * log2(depth)."""
+    rows = [p for p in points if not p.error]
+    if len(rows) < 2:
+        return {}
+    out: Dict[str, Dict[str, float]] = {}
+    for metric in METRICS:
+        base, slope = linear_fit([(math.log2(p.depth), getattr(p, metric)) for p in rows])
+        out[metric] = {"base": round(base), "per_doubling": round(slope, 1)}
+    return out
+
+
+# --- REPORTING ---
+def log_results(points: List[DepthPoint], fitted: Dict[str, Dict[str, float]]) -> None:
+    print("\n" + "=" * 104)
+    print(f"{'depth':>7}{'castVote':>11}{'lookup now':>12}{'lookup mid':>12}{'transfer':>11}{'delegate':>11}"
+          f"{'| vuln vote':>13}{'vuln xfer':>11}")
+    print("-" * 104)
+    for p in points:
+        if p.error:
+            print(f"{p.depth:>7}  ! {p.error}")
+            continue
+        print(f"{p.depth:>7,}{p.cast_vote:>11,}{p.lookup_recent:>12,}{p.lookup_mid:>12,}{p.transfer:>11,}"
+              f"{p.delegate:>11,}{'| ':>4}{p.vulnerable_cast_vote:>9,}{p.vulnerable_transfer:>11,}")
+    if fitted:
+        print("-" * 104)
+        print("Marginal gas per doubling of checkpoint depth: " +
+              ", ".join(f"{m}={f['per_doubling']:,} (base {f['base']:,})" for m, f in fitted.items()))
+    print("=" * 104)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="ERC20Votes checkpoint-depth benchmark on anvil.")
+    parser.add_argument("--depths", default="1,10,100,1000,10000", help="comma-separated checkpoint counts")
+    args = parser.parse_args()
+    depths = [int(x) for x in args.depths.split(",") if x.strip()]
+
+    w3 = make_web3([SIM_RPC_URL])
+    if not w3.is_connected():
+        print(f"Cannot reach {SIM_RPC_URL}; start anvil first.")
+        return 1
+    # Histories are always seeded: 10,000 checkpoints by transaction would take 10,000 blocks
+    chain = LocalChain(w3, shared_controller(), StateSeeder(SIM_RPC_URL))
+    chain.rpc("anvil_autoImpersonateAccount", True)
+    bench = deploy_bench(chain)
+    layout = StorageLayout.from_artifact("MembershipTokenMintable", "MembershipToken")
+    chain.fixtures.prepare("bench")
+
+    points = []
+    for depth in depths:
+        print(f"[Bench] {depth:,} checkpoint(s)...")
+        chain.fixtures.reset("bench")
+        try:
+            points.append(measure(chain, bench, layout, depth))
+        except Exception as e:
+            points.append(DepthPoint(depth, error=str(e)[:200]))
+
+    fitted = fits(points)
+    log_results(points, fitted)
+    os.makedirs(REPORT_DIR, exist_ok=True)
+    path = f"{REPORT_DIR}/checkpoint_depth_{time.strftime('%Y%m%d_%H%M%S')}.json"
+    with open(path, "w") as f:
+        json.dump({"points": [asdict(p) for p in points], "fits": fitted}, f, indent=2)
+    print(f"Saved {path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -14,6 +14,13 @@ from datetime import datetime
 from web3 import Web3
 from eth_account import Account
 from dotenv import load_dotenv
+from rpc_pool import make_web3, endpoint_urls
+from rpc_metrics import RPCRecorder, install_rpc_metrics
+from gas_estimator import GasLimitEstimator
+from proposal_ids import hash_proposal, vulnerable_proposal_id
+from event_decoder import EventRegistry
+from tx_records import TxRecord, TxRecordSet
+from inclusion import InclusionTracker
 
 load_dotenv()
 
@@ -39,7 +46,9 @@ REPORT_DIR = "reports"
 os.makedirs(REPORT_DIR, exist_ok=True)
 
 # Safety checks
-for varname in ["RPC_URL", "PRIVATE_KEY", "PUBLIC_ADDRESS", "BASE_DAO", "BASE_TREASURY", "OPT_DAO", "OPT_TREASURY"]:
+if not endpoint_urls():
+    raise SystemExit("Missing env var: RPC_URL or RPC_URLS. Fill .env and retry.")
+for varname in ["PRIVATE_KEY", "PUBLIC_ADDRESS", "BASE_DAO", "BASE_TREASURY", "OPT_DAO", "OPT_TREASURY"]:
     if not globals().get(varname):
         raise SystemExit(f"Missing env var: {varname}. Fill .env and retry.")
 
@@ -58,12 +67,22 @@ def save_json(obj, filename):
         json.dump(obj, f, indent=2)
     print(f"Saved: {filename}")
 
+inclusion = None   # InclusionTracker (set in main): per-tx submit/pending/inclusion/confirm timings
+
+def step_record(txh, receipt, events):
+    """Compact per-step record: fixed fields, inclusion timings and decoded events instead of the full receipt."""
+    timing = inclusion.pop(txh)
+    if timing is not None:
+        inclusion.confirm(timing)
+    record = TxRecord.from_receipt(receipt, timing=timing).to_dict()
+    record["events"] = [ev.to_dict() for ev in events]
+    return record
+
 def tx_send_and_wait(web3, tx_dict, priv_key, verbose=True):
     signed = web3.eth.account.sign_transaction(tx_dict, priv_key)
-    tx_hash = web3.eth.send_raw_transaction(signed.rawTransaction)
-    txh_hex = web3.to_hex(tx_hash)
+    txh_hex, timing = inclusion.submit(signed.raw_transaction)
     if verbose: print(f"  Sent tx: {txh_hex}")
-    receipt = web3.eth.wait_for_transaction_receipt(tx_hash, timeout=600)
+    receipt = inclusion.wait(txh_hex, timing)
     if verbose: print(f"  Included block: {receipt.blockNumber}, gasUsed: {receipt.gasUsed}")
     return txh_hex, receipt
 
@@ -80,13 +99,17 @@ def read_members(path):
 # -------------------------
 # Main test logic
 # -------------------------
-def run_proposal_flow(web3, dao_contract, treasury_contract, label, members_privkeys, main_privkey):
+def run_proposal_flow(web3, dao_contract, treasury_contract, label, members_privkeys, main_privkey, gas_estimator, rpc_recorder,
+                      event_registry):
     """
     Runs propose -> many votes (members) -> queue -> execute
     Uses main_privkey for propose/queue/execute.
     members_privkeys: list of private keys used to call castVote
-    Returns a dict with detailed receipts and gas usage.
+    gas_estimator: GasLimitEstimator supplying cached gas limits
+    rpc_recorder: RPCRecorder that RPC calls of each step are attributed to
+    Returns a dict of compact per-step records (see tx_records.py) and gas usage.
     """
+    member_count = len(members_privkeys)
     results = {"label": label, "steps": {}}
     sender_addr = web3.to_checksum_address(PUBLIC_ADDRESS)
     chain_id = web3.eth.chain_id
@@ -117,122 +140,117 @@ def run_proposal_flow(web3, dao_contract, treasury_contract, label, members_priv
 
     # ---------------- PROPOSE ----------------
     print(f"\n[{label}] PROPOSE")
+    rpc_recorder.set_step(label, "propose")
     nonce = web3.eth.get_transaction_count(sender_addr)
-    tx_propose = dao_contract.functions.propose(
+    fn_propose = dao_contract.functions.propose(
         [treasury_contract.address],
         [0],
         [transfer_data],
         description
-    ).build_transaction({
+    )
+    tx_propose = fn_propose.build_transaction({
         "chainId": chain_id,
         "from": sender_addr,
         "nonce": nonce,
-        "gas": 5_000_000,
+        "gas": gas_estimator.limit_for_call(fn_propose, sender_addr, member_count=member_count, default=5_000_000),
         "gasPrice": web3.eth.gas_price
     })
     txh, receipt = tx_send_and_wait(web3, tx_propose, main_privkey)
-    results["steps"]["propose"] = {
-        "tx_hash": txh, "receipt": dict(receipt), "gas_used": receipt.gasUsed
-    }
+    results["steps"]["propose"] = step_record(txh, receipt, event_registry.decode_receipt(receipt))
 
-    # Attempt to compute proposalId using hashProposal if available
-    try:
-        prop_id = dao_contract.functions.hashProposal(
-            [treasury_contract.address],
-            [0],
-            [transfer_data],
-            description_hash
-        ).call()
-        print(f"  proposalId: {prop_id}")
-    except Exception as e:
-        # fallback: try reading latest events to get created proposal id
-        print("  Could not call hashProposal():", str(e))
-        # scan event logs: 'ProposalCreated' typical event
-        prop_id = None
-        receipt_logs = receipt.logs
-        # naive parse: try to find ProposalCreated topic if ABI present
+    # proposalId computed locally: OZ Governor ids are a hash of the proposal,
+    # VulnerableDAO ids come from the ProposalCreated log of this receipt
+    if any(f.get("type") == "function" and f.get("name") == "hashProposal" for f in dao_contract.abi):
+        prop_id = hash_proposal([treasury_contract.address], [0], [transfer_data], description_hash)
+    else:
         try:
-            for log in receipt.logs:
-                try:
-                    decoded = dao_contract.events.ProposalCreated().processLog(log)
-                    prop_id = decoded["args"]["id"] if "id" in decoded["args"] else decoded["args"].get("proposalId")
-                    print("  Found ProposalCreated in logs:", prop_id)
-                    break
-                except Exception:
-                    continue
-        except Exception:
+            prop_id = vulnerable_proposal_id(receipt, dao_contract.address)
+        except Exception as e:
+            print("  Could not read proposal id from receipt:", str(e))
             prop_id = None
+    print(f"  proposalId: {prop_id}")
 
     if prop_id is None:
         raise SystemExit("Failed to determine proposal id. Cannot continue flow.")
 
     # ---------------- VOTING (multi-member) ----------------
+    rpc_recorder.set_step(label, "votes")
     print(f"\n[{label}] CAST VOTES using {len(members_privkeys)} members (will stop early if any error)")
 
-    votes_info = []
-    i = 0
-    for member_pk in members_privkeys:
-        i += 1
+    def cast_vote(indexed_pk):
+        i, member_pk = indexed_pk
         acct = Account.from_key(member_pk)
         member_addr = acct.address
         try:
             # build tx for castVote(proposalId, support)
             nonce_m = web3.eth.get_transaction_count(member_addr)
             # support = 1 (for)
-            tx_vote = dao_contract.functions.castVote(prop_id, 1).build_transaction({
+            fn_vote = dao_contract.functions.castVote(prop_id, 1)
+            tx_vote = fn_vote.build_transaction({
                 "chainId": chain_id,
                 "from": member_addr,
                 "nonce": nonce_m,
-                "gas": 500_000,
+                "gas": gas_estimator.limit_for_call(fn_vote, member_addr, member_count=member_count, default=500_000),
                 "gasPrice": web3.eth.gas_price
             })
             txh_m, receipt_m = tx_send_and_wait(web3, tx_vote, member_pk, verbose=False)
             print(f"  vote #{i} by {member_addr} -> gas {receipt_m.gasUsed}")
-            votes_info.append({"member": member_addr, "tx_hash": txh_m, "gas_used": receipt_m.gasUsed, "status": receipt_m.status})
+            return member_addr, txh_m, receipt_m
         except Exception as e:
             # log and continue
             print(f"  vote #{i} FAILED for {member_addr}: {e}")
-            votes_info.append({"member": member_addr, "error": str(e)})
-        # slight delay to avoid nonce/rate issues
-        time.sleep(0.15)
+            return member_addr, None, e
+
+    # votes go out concurrently; the pool's traffic controller paces them instead of a fixed delay
+    votes = TxRecordSet()
+    for member_addr, txh_m, outcome in web3.provider.traffic.map(cast_vote, enumerate(members_privkeys, start=1)):
+        if txh_m is None:
+            votes.failure(member_addr, outcome)
+        else:
+            votes.add(outcome, timing=inclusion.pop(txh_m))
+    inclusion.confirm_records(votes)
 
-    results["steps"]["votes"] = votes_info
+    results["steps"]["votes"] = votes.to_dict()
 
     # ---------------- QUEUE ----------------
     print(f"\n[{label}] QUEUE")
+    rpc_recorder.set_step(label, "queue")
     nonce = web3.eth.get_transaction_count(sender_addr)
-    tx_queue = dao_contract.functions.queue(
+    fn_queue = dao_contract.functions.queue(
         [treasury_contract.address],
         [0],
         [transfer_data],
         description_hash
-    ).build_transaction({
+    )
+    tx_queue = fn_queue.build_transaction({
         "chainId": chain_id,
         "from": sender_addr,
         "nonce": nonce,
-        "gas": 800_000,
+        "gas": gas_estimator.limit_for_call(fn_queue, sender_addr, member_count=member_count, default=800_000),
         "gasPrice": web3.eth.gas_price
     })
     txh_q, receipt_q = tx_send_and_wait(web3, tx_queue, main_privkey)
-    results["steps"]["queue"] = {"tx_hash": txh_q, "receipt": dict(receipt_q), "gas_used": receipt_q.gasUsed}
+    results["steps"]["queue"] = step_record(txh_q, receipt_q, event_registry.decode_receipt(receipt_q))
 
     # ---------------- EXECUTE ----------------
     print(f"\n[{label}] EXECUTE")
+    rpc_recorder.set_step(label, "execute")
     nonce = web3.eth.get_transaction_count(sender_addr)
-    tx_exec = dao_contract.functions.execute(
+    fn_exec = dao_contract.functions.execute(
         [treasury_contract.address],
         [0],
         [transfer_data],
         description_hash
-    ).build_transaction({
+    )
+    tx_exec = fn_exec.build_transaction({
         "chainId": chain_id,
         "from": sender_addr,
         "nonce": nonce,
-        "gas": 5_000_000,
+        "gas": gas_estimator.limit_for_call(fn_exec, sender_addr, member_count=member_count, default=5_000_000),
         "gasPrice": web3.eth.gas_price
     })
     txh_e, receipt_e = tx_send_and_wait(web3, tx_exec, main_privkey)
-    results["steps"]["execute"] = {"tx_hash": txh_e, "receipt": dict(receipt_e), "gas_used": receipt_e.gasUsed}
+    results["steps"]["execute"] = step_record(txh_e, receipt_e, event_registry.decode_receipt(receipt_e))
 
     # Save run-level report
     fname = f"{REPORT_DIR}/{label}_run_{timestamp()}.json"
@@ -245,8 +263,11 @@ def run_proposal_flow(web3, dao_contract, treasury_contract, label, members_priv
 # Top-level runner
 # -------------------------
 def main():
-    web3 = Web3(Web3.HTTPProvider(RPC_URL))
-    assert web3.isConnected(), "RPC not connected"
+    global inclusion
+    web3 = make_web3()
+    rpc_recorder = install_rpc_metrics(web3, RPCRecorder())
+    inclusion = InclusionTracker(web3, timeout=600)
+    assert web3.is_connected(), "RPC not connected"
 
     print("Loading ABIs...")
     dao_abi_opt = load_json(ABI_DAO_OPT)["abi"]
@@ -261,6 +282,20 @@ def main():
     opt_dao = web3.eth.contract(address=Web3.to_checksum_address(OPT_DAO), abi=dao_abi_opt)
     opt_treasury = web3.eth.contract(address=Web3.to_checksum_address(OPT_TREASURY), abi=treasury_abi_opt)
 
+    # gas limits: estimated once per (contract, selector, arg shape, member bucket), cached across runs
+    gas_estimator = GasLimitEstimator(web3, cache_file=f"{REPORT_DIR}/gas_limit_cache.json", artifact_root="out")
+    gas_estimator.register(BASE_DAO, "VulnerableDAO")
+    gas_estimator.register(BASE_TREASURY, "TreasuryBasic")
+    gas_estimator.register(OPT_DAO, "DAOOptimized")
+    gas_estimator.register(OPT_TREASURY, "TreasurySecure")
+
+    # event decoders compiled once from the artifact ABIs, shared by every step
+    event_registry = EventRegistry.from_artifacts("out")
+    event_registry.label(BASE_DAO, "VulnerableDAO")
+    event_registry.label(BASE_TREASURY, "TreasuryBasic")
+    event_registry.label(OPT_DAO, "DAOOptimized")
+    event_registry.label(OPT_TREASURY, "TreasurySecure")
+
     # load members
     members_privkeys = read_members(MEMBERS_FILE)
     members_count = len(members_privkeys)
@@ -273,14 +308,16 @@ def main():
 
     # Run baseline
     print("\n====== RUNNING BASELINE (VULNERABLE DAO) ======")
-    baseline_results = run_proposal_flow(web3, base_dao, base_treasury, "baseline", members_for_test, PRIVATE_KEY)
+    baseline_results = run_proposal_flow(web3, base_dao, base_treasury, "baseline", members_for_test, PRIVATE_KEY, gas_estimator, rpc_recorder,
+                                         event_registry)
 
     # small pause
     time.sleep(3)
 
     # Run optimized
     print("\n====== RUNNING OPTIMIZED DAO ======")
-    optimized_results = run_proposal_flow(web3, opt_dao, opt_treasury, "optimized", members_for_test, PRIVATE_KEY)
+    optimized_results = run_proposal_flow(web3, opt_dao, opt_treasury, "optimized", members_for_test, PRIVATE_KEY, gas_estimator, rpc_recorder,
+                                          event_registry)
 
     # -------------------------
     # Compare gas usage
@@ -293,15 +330,24 @@ def main():
         s["propose_gas"] = steps["propose"]["gas_used"]
         s["queue_gas"] = steps["queue"]["gas_used"]
         s["execute_gas"] = steps["execute"]["gas_used"]
-        # votes — compute total gas used and average for successful votes
-        votes = [v for v in steps["votes"] if v.get("gas_used")]
-        total_votes_gas = sum(v["gas_used"] for v in votes) if votes else 0
-        avg_vote_gas = (total_votes_gas / len(votes)) if votes else 0
-        s["votes_total_gas"] = total_votes_gas
-        s["votes_count"] = len(votes)
-        s["votes_avg_gas"] = avg_vote_gas
+        # votes — total gas and average over successful votes (precomputed aggregates)
+        votes = steps["votes"]["aggregates"]
+        s["votes_total_gas"] = votes["gas_total"]
+        s["votes_count"] = votes["ok"]
+        s["votes_avg_gas"] = votes["gas_avg"]
         return s
 
+    # Inclusion latency per step (ms from submission): single txs as-is, votes as p50/p95
+    def summarize_latency(res):
+        steps = res["steps"]
+        out = {}
+        for name in ("propose", "queue", "execute"):
+            out[name] = {"inclusion_ms": steps[name]["inclusion_ms"], "confirm_ms": steps[name]["confirm_ms"]}
+        votes = steps["votes"]["aggregates"]
+        out["votes"] = {k: votes[k] for k in ("inclusion_ms_p50", "inclusion_ms_p95", "confirm_ms_p50", "confirm_ms_p95")}
+        return out
+
+    summary["latency"] = {"baseline": summarize_latency(baseline_results), "optimized": summarize_latency(optimized_results)}
     base_summary = summarize_steps(baseline_results)
     opt_summary = summarize_steps(optimized_results)
 
@@ -329,12 +375,21 @@ def main():
         md_lines.append(f"- Optimized: {v['optimized']}")
         md_lines.append(f"- Saved: {v['difference']} gas ({v['pct_saved']:.2f}%)")
         md_lines.append("")
+    md_lines += ["## Inclusion latency (ms from submission)", ""]
+    for side, steps in summary["latency"].items():
+        md_lines.append(f"### {side}")
+        for step, values in steps.items():
+            md_lines.append(f"- {step}: " + ", ".join(f"{k}={v:.0f}" for k, v in values.items()))
+        md_lines.append("")
 
     md_path = f"{REPORT_DIR}/gas_report_{timestamp()}.md"
     with open(md_path, "w") as f:
         f.write("\n".join(md_lines))
     print(f"Markdown summary saved: {md_path}")
 
+    print(gas_estimator.summary())
+    print(rpc_recorder.summary_table())
+    rpc_recorder.save(f"{REPORT_DIR}/rpc_stats_{timestamp()}.json")
     print("\nALL DONE. Reports are in the reports/ directory.")
 
 if __name__ == "__main__":
@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""
+deployments.py
+
+Deployment registry built from Foundry broadcast history
+(broadcast/<Script>.s.sol/<chainId>/run-<ts>.json).
+
+Every run file is parsed once into compact records (contract name, address,
+deploy block, tx hash, gas) and cached in DEPLOYMENTS_CACHE keyed by file
+mtime; only new or modified run files are re-parsed on later startups.
+
+Stacks are looked up by script name or version alias:
+    registry = DeploymentRegistry()
+    v4 = registry.stack("V4")                   # latest DeployV4_ODAO_TSecure run
+    v4.address("DAOOptimized"), v4.address("TimelockController")
+    registry.stack("V3", run=-2)                # the run before the latest
+    registry.pinned("V3", 1765480405553)        # broadcast run-1765480405553.json, wherever it sits
+    registry.latest("MembershipToken").address
+"""
+
+import os
+import re
+import json
+from dataclasses import dataclass, asdict
+from pathlib import Path
+from typing import Dict, List, Optional
+from web3 import Web3
+
+CHAIN_ID = int(os.getenv("CHAIN_ID", "11155111"))
+BROADCAST_ROOT = os.getenv("BROADCAST_ROOT", "../broadcast")
+DEPLOYMENTS_CACHE = os.getenv("DEPLOYMENTS_CACHE", "deployments_index.json")
+
+# "V4" -> DeployV4_ODAO_TSecure, ...
+VERSION_ALIAS = re.compile(r"^Deploy(V\d+)_")
+
+
+@dataclass
+class Deployment:
+    contract: str
+    address: str
+    block: int
+    tx_hash: str
+    gas_used: int
+    script: str
+    run: int          # broadcast timestamp (ms)
+
+
+@dataclass
+class Stack:
+    script: str
+    run: int
+    contracts: Dict[str, Deployment]
+
+    def address(self, contract: str) -> str:
+        if contract not in self.contracts:
+            raise KeyError(f"{self.script} run {self.run} did not deploy {contract} (has: {', '.join(self.contracts)})")
+        return self.contracts[contract].address
+
+    @property
+    def deploy_block(self) -> int:
+        return min(d.block for d in self.contracts.values())
+
+
+def _parse_run(path: Path) -> List[dict]:
+    with open(path, "r") as f:
+        run = json.load(f)
+    script = path.parent.parent.name.replace(".s.sol", "")
+    receipts = {r["transactionHash"]: r for r in run.get("receipts", [])}
+    records = []
+    for tx in run.get("transactions", []):
+        receipt = receipts.get(tx.get("hash"))
+        if tx.get("transactionType") not in ("CREATE", "CREATE2") or not receipt or not tx.get("contractAddress"):
+            continue
+        records.append(asdict(Deployment(
+            contract=tx["contractName"],
+            address=Web3.to_checksum_address(tx["contractAddress"]),
+            block=int(receipt["blockNumber"], 16),
+            tx_hash=tx["hash"],
+            gas_used=int(receipt["gasUsed"], 16),
+            script=script,
+            run=int(run.get("timestamp", 0)),
+        )))
+    return records
+
+
+class DeploymentRegistry:
+    def __init__(self, broadcast_root: str = BROADCAST_ROOT, chain_id: int = CHAIN_ID,
+                 cache_file: str = DEPLOYMENTS_CACHE):
+        self.root = Path(broadcast_root)
+        self.chain_id = chain_id
+        self.cache_file = Path(cache_file)
+        self.deployments: List[Deployment] = []
+        self._load()
+
+    # --- INDEX ---
+    def _load(self) -> None:
+        cache = {"chain_id": self.chain_id, "files": {}}
+        if self.cache_file.exists():
+            with open(self.cache_file, "r") as f:
+                cache = json.load(f)
+            if cache.get("chain_id") != self.chain_id:
+                cache = {"chain_id": self.chain_id, "files": {}}
+
+        files = {}
+        changed = False
+        # run-latest.json duplicates the newest timestamped run
+        for path in sorted(self.root.glob(f"*/{self.chain_id}/run-[0-9]*.json")):
+            key = str(path)
+            mtime = path.stat().st_mtime
+            entry = cache["files"].get(key)
+            if entry is None or entry["mtime"] != mtime:
+                entry = {"mtime": mtime, "deployments": _parse_run(path)}
+                changed = True
+            files[key] = entry
+        changed = changed or set(files) != set(cache["files"])
+
+        if changed:
+            with open(self.cache_file, "w") as f:
+                json.dump({"chain_id": self.chain_id, "files": files}, f, indent=1)
+        self.deployments = [Deployment(**d) for entry in files.values() for d in entry["deployments"]]
+        self.deployments.sort(key=lambda d: (d.run, d.block))
+
+    # --- LOOKUPS ---
+    def scripts(self) -> List[str]:
+        return sorted({d.script for d in self.deployments})
+
+    def _script_for(self, name: str) -> str:
+        for script in self.scripts():
+            match = VERSION_ALIAS.match(script)
+            if script == name or (match and match.group(1) == name):
+                return script
+        raise KeyError(f"No broadcast runs for stack '{name}' under {self.root} (chain {self.chain_id})")
+
+    def runs(self, name: str) -> List[Stack]:
+        """Every broadcast run of a deploy script, oldest first."""
+        script = self._script_for(name)
+        by_run: Dict[int, Dict[str, Deployment]] = {}
+        for d in self.deployments:
+            if d.script == script:
+                by_run.setdefault(d.run, {})[d.contract] = d
+        return [Stack(script, run, contracts) for run, contracts in sorted(by_run.items())]
+
+    def stack(self, name: str, run: int = -1) -> Stack:
+        """A deploy script's run by index (default: latest)."""
+        return self.runs(name)[run]
+
+    def pinned(self, name: str, timestamp: int) -> Stack:
+        """A deploy script's run by broadcast timestamp (run-<timestamp>.json); KeyError if it is gone."""
+        for stack in self.runs(name):
+            if stack.run == timestamp:
+                return stack
+        raise KeyError(f"No {self._script_for(name)} run {timestamp} under {self.root} (chain {self.chain_id})")
+
+    def latest(self, contract: str) -> Deployment:
+        """Most recent deployment of a contract across all scripts."""
+        matches = [d for d in self.deployments if d.contract == contract]
+        if not matches:
+            raise KeyError(f"No broadcast deployment of {contract}")
+        return matches[-1]
+
+    def find(self, address: str) -> Optional[Deployment]:
+        address = Web3.to_checksum_address(address)
+        return next((d for d in self.deployments if d.address == address), None)
+
+    def deploy_block(self, addresses: List[str]) -> Optional[int]:
+        """Earliest deploy block among addresses (None if none are in the broadcast history)."""
+        blocks = [d.block for d in map(self.find, addresses) if d is not None]
+        return min(blocks) if blocks else None
+
+
+def env_or_stack(var: str, registry: DeploymentRegistry, stack: str, contract: str) -> Optional[str]:
+    """.env value when set, else the contract's address in the stack's latest broadcast run."""
+    value = os.getenv(var)
+    if value:
+        return value
+    try:
+        return registry.stack(stack).address(contract)
+    except KeyError:
+        return None
@@ -18,19 +18,21 @@ from pathlib import Path
 from dotenv import load_dotenv
 from web3 import Web3
 from eth_account import Account
+from rpc_pool import make_web3
+from gas_estimator import GasLimitEstimator
 
 load_dotenv()
 
-RPC_URL = os.getenv("RPC_URL")
+RPC_URL = os.getenv("RPC_URLS") or os.getenv("RPC_URL")  # comma-separated list enables the endpoint pool
 PRIVATE_KEY = os.getenv("PRIVATE_KEY")  # owner / deployer private key
 TOKEN_ADDRESS = Web3.to_checksum_address(os.getenv("TOKEN_ADDRESS"))
 MEMBERS_FILE = os.getenv("MEMBERS_FILE", "./dao_members.json")
 CHAIN_ID = int(os.getenv("CHAIN_ID", "11155111"))  # Sepolia chain id default
 
 if not RPC_URL or not PRIVATE_KEY or not TOKEN_ADDRESS:
-    raise SystemExit("RPC_URL, PRIVATE_KEY and TOKEN_ADDRESS environment variables must be set.")
+    raise SystemExit("RPC_URL (or RPC_URLS), PRIVATE_KEY and TOKEN_ADDRESS environment variables must be set.")
 
-w3 = Web3(Web3.HTTPProvider(RPC_URL))
+w3 = make_web3()
 owner_acct = Account.from_key(PRIVATE_KEY)
 owner_addr = owner_acct.address
 
@@ -68,6 +70,8 @@ TOKEN_ABI = [
 ]
 
 token = w3.eth.contract(address=TOKEN_ADDRESS, abi=TOKEN_ABI)
+gas_estimator = GasLimitEstimator(w3)
+gas_estimator.register(TOKEN_ADDRESS, "MembershipTokenMintable", "MembershipToken")
 
 # load members
 members_path = Path(MEMBERS_FILE)
@@ -162,9 +166,10 @@ for idx, m in enumerate(members[START_INDEX:], start=START_INDEX):
 #    nonce += 1
     # delegate (self-delegate)
     print(f"       Delegating to {member_addr}")
-    tx2 = token.functions.delegate(member_addr).build_transaction({
+    fn_delegate = token.functions.delegate(member_addr)
+    tx2 = fn_delegate.build_transaction({
         "chainId": CHAIN_ID,
-        "gas": 200_000,
+        "gas": gas_estimator.limit_for_call(fn_delegate, owner_addr, default=200_000),
         "gasPrice": gas_price,
         "nonce": nonce,
         "from": owner_addr,
@@ -182,9 +187,6 @@ for idx, m in enumerate(members[START_INDEX:], start=START_INDEX):
         "delegate_blockNumber": receipt2.blockNumber,
     })
 
-    # small pause to avoid node throttling
-    time.sleep(0.15)
-
 # 2) Mint remainder to owner
 #if remainder_for_owner > 0:
 #    print("Minting remainder to owner:", owner_addr)
@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+"""
+event_decoder.py
+
+Topic-indexed log decoder for the DAO, treasury and membership-token events.
+
+The registry is built once from the Foundry artifact ABIs. Every event is
+compiled into a decoder keyed by (topic0, topic count), so decoding a
+receipt is one dict lookup per log: no per-log ABI scans and no
+try/except over candidate events. Logs from unknown events are skipped.
+
+Usage:
+    registry = EventRegistry.from_artifacts("../out")
+    for ev in registry.decode_receipt(receipt):
+        print(ev.name, ev.args)
+"""
+
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+import json
+from eth_abi import decode
+from hexbytes import HexBytes
+from web3 import Web3
+
+EVENT_CONTRACTS = (
+    "VulnerableDAO",
+    "DAOOptimized",
+    "TreasuryBasic",
+    "TreasurySecure",
+    "MembershipToken",
+    "VulnerableMembershipToken",
+    "MembershipTokenMintable:MembershipToken",   # <source>:<contract>
+    "TimelockController",
+)
+
+
+@dataclass
+class DecodedEvent:
+    name: str
+    contract: str
+    address: str
+    args: Dict[str, Any]
+    block_number: int = 0
+    tx_hash: str = ""
+    log_index: int = 0
+
+    def to_dict(self) -> Dict[str, Any]:
+        """JSON-friendly form for reports (bytes as 0x-hex)."""
+        return {
+            "event": self.name,
+            "contract": self.contract,
+            "address": self.address,
+            "args": {k: _jsonable(v) for k, v in self.args.items()},
+            "block": self.block_number,
+            "tx": self.tx_hash,
+            "log_index": self.log_index,
+        }
+
+
+def _jsonable(value: Any) -> Any:
+    if isinstance(value, (bytes, bytearray)):
+        return Web3.to_hex(value)
+    if isinstance(value, (list, tuple)):
+        return [_jsonable(v) for v in value]
+    return value
+
+
+def _abi_type(inp: Dict[str, Any]) -> str:
+    """Canonical type string, expanding tuple components."""
+    t = inp["type"]
+    if t.startswith("tuple"):
+        return "(" + ",".join(_abi_type(c) for c in inp["components"]) + ")" + t[len("tuple"):]
+    return t
+
+
+def _is_dynamic(abi_type: str) -> bool:
+    return abi_type in ("string", "bytes") or abi_type.endswith("]") or abi_type.startswith("(")
+
+
+class _CompiledEvent:
+    __slots__ = ("name", "contract", "topic_fields", "data_names", "data_types")
+
+    def __init__(self, name: str, contract: str, inputs: Sequence[Dict[str, Any]]):
+        self.name = name
+        self.contract = contract
+        # Indexed dynamic values are stored as their keccak hash: kept as raw bytes32
+        self.topic_fields: List[Tuple[str, Optional[str]]] = [
+            (i["name"], None if _is_dynamic(_abi_type(i)) else _abi_type(i)) for i in inputs if i.get("indexed")
+        ]
+        self.data_names = [i["name"] for i in inputs if not i.get("indexed")]
+        self.data_types = [_abi_type(i) for i in inputs if not i.get("indexed")]
+
+    def decode(self, topics: Sequence[Any], data: bytes) -> Dict[str, Any]:
+        args: Dict[str, Any] = {}
+        for (name, abi_type), topic in zip(self.topic_fields, topics[1:]):
+            raw = bytes(HexBytes(topic))
+            args[name] = decode([abi_type], raw)[0] if abi_type else raw
+        if self.data_types:
+            args.update(zip(self.data_names, decode(self.data_types, data)))
+        return args
+
+
+class EventRegistry:
+    def __init__(self):
+        self.decoders: Dict[Tuple[bytes, int], _CompiledEvent] = {}
+        self.labels: Dict[str, str] = {}   # checksum address -> contract name
+
+    @classmethod
+    def from_artifacts(cls, artifact_root: str = "../out", contracts: Iterable[str] = EVENT_CONTRACTS) -> "EventRegistry":
+        """
+        Builds the registry from out/<source>.sol/<contract>.json, one
+        "<source>[:<contract>]" per entry; missing artifacts are skipped.
+        """
+        registry = cls()
+        for spec in contracts:
+            name, _, contract = spec.partition(":")
+            path = Path(artifact_root) / f"{name}.sol" / f"{contract or name}.json"
+            if not path.exists():
+                print(f"  [EventRegistry] artifact not found, skipping: {path}")
+                continue
+            with open(path, "r") as f:
+                registry.add_abi(name, json.load(f)["abi"])
+        return registry
+
+    def add_abi(self, contract: str, abi: Sequence[Dict[str, Any]]) -> None:
+        for item in abi:
+            if item.get("type") != "event" or item.get("anonymous"):
+                continue
+            inputs = item.get("inputs", [])
+            signature = f"{item['name']}({','.join(_abi_type(i) for i in inputs)})"
+            topic0 = bytes(Web3.keccak(text=signature))
+            topic_count = 1 + sum(1 for i in inputs if i.get("indexed"))
+            # Shared signatures (OZ base events) decode identically: first registration wins
+            self.decoders.setdefault((topic0, topic_count), _CompiledEvent(item["name"], contract, inputs))
+
+    def label(self, address: Optional[str], contract: str) -> None:
+        """Names the contract deployed at address (reported instead of the ABI owner)."""
+        if address:
+            self.labels[Web3.to_checksum_address(address)] = contract
+
+    # --- DECODING ---
+    def decode_log(self, log: Any) -> Optional[DecodedEvent]:
+        topics = log["topics"]
+        if not topics:
+            return None
+        decoder = self.decoders.get((bytes(HexBytes(topics[0])), len(topics)))
+        if decoder is None:
+            return None
+        address = Web3.to_checksum_address(log["address"])
+        tx_hash = log.get("transactionHash")
+        return DecodedEvent(
+            name=decoder.name,
+            contract=self.labels.get(address, decoder.contract),
+            address=address,
+            args=decoder.decode(topics, bytes(HexBytes(log["data"]))),
+            block_number=log.get("blockNumber") or 0,
+            tx_hash=Web3.to_hex(tx_hash) if tx_hash is not None else "",
+            log_index=log.get("logIndex") or 0,
+        )
+
+    def decode_logs(self, logs: Iterable[Any]) -> List[DecodedEvent]:
+        """Decodes a log batch in one pass; logs of unregistered events are dropped."""
+        decoded = []
+        for log in logs:
+            ev = self.decode_log(log)
+            if ev is not None:
+                decoded.append(ev)
+        return decoded
+
+    def decode_receipt(self, receipt: Any) -> List[DecodedEvent]:
+        return self.decode_logs(receipt["logs"])
+
+
+def find_events(events: Iterable[DecodedEvent], name: str, address: Optional[str] = None) -> List[DecodedEvent]:
+    """Filters decoded events by name (and emitting address)."""
+    address = Web3.to_checksum_address(address) if address else None
+    return [e for e in events if e.name == name and (address is None or e.address == address)]
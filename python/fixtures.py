@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+fixtures.py
+
+Named chain-state fixtures on a local node (anvil).
+
+A fixture runs its setup once, then takes an evm_snapshot. Every later
+reset is an evm_revert to that snapshot, which takes milliseconds instead
+of a redeploy, so each scenario or sweep point starts from identical state.
+anvil drops a snapshot when it is reverted to, so reset() re-snapshots
+right away.
+
+With a state_dir the post-setup state is also written with anvil_dumpState
+({state_dir}/{name}.state); a later process (or a fresh anvil) restores it
+with anvil_loadState and skips the setup altogether. Delete the file when
+the setup changes.
+
+Reverting rewinds nonces and reuses block numbers: anything that caches
+per-block or per-account chain data registers on_reset() to clear it.
+
+Usage:
+    fixtures = StateFixtures(w3, state_dir="reports/fixtures")
+    fixtures.on_reset(inclusion.forget_blocks)
+    fixtures.prepare("stacks", setup=deploy_and_seed)
+    for scenario in scenarios:
+        fixtures.reset("stacks")
+        run(scenario)
+"""
+
+import os
+import time
+from typing import Any, Callable, Dict, List, Optional
+from web3 import Web3
+
+FIXTURE_STATE_DIR = os.getenv("FIXTURE_STATE_DIR", "reports/fixtures")
+
+
+class StateFixtures:
+    def __init__(self, w3: Web3, state_dir: Optional[str] = None):
+        self.w3 = w3
+        self.state_dir = state_dir
+        self.snapshots: Dict[str, str] = {}    # fixture name -> live snapshot id
+        self.resets = 0
+        self._listeners: List[Callable[[], Any]] = []
+
+    def rpc(self, method: str, *params) -> Any:
+        return self.w3.manager.request_blocking(method, list(params))
+
+    def on_reset(self, callback: Callable[[], Any]) -> None:
+        """callback() runs after every revert (cache invalidation)."""
+        self._listeners.append(callback)
+
+    # --- SNAPSHOTS ---
+    def snapshot(self, name: str) -> str:
+        self.snapshots[name] = self.rpc("evm_snapshot")
+        return self.snapshots[name]
+
+    def reset(self, name: str) -> float:
+        """Reverts to the fixture's snapshot and re-arms it; returns the revert time in ms."""
+        if name not in self.snapshots:
+            raise KeyError(f"No snapshot for fixture {name!r}; call prepare() first")
+        start = time.perf_counter()
+        if not self.rpc("evm_revert", self.snapshots[name]):
+            raise Exception(f"evm_revert to {name!r} ({self.snapshots[name]}) was rejected by the node")
+        self.snapshot(name)
+        for callback in self._listeners:
+            callback()
+        self.resets += 1
+        return (time.perf_counter() - start) * 1000
+
+    # --- STATE FILES ---
+    def state_path(self, name: str) -> Optional[str]:
+        return os.path.join(self.state_dir, f"{name}.state") if self.state_dir else None
+
+    def dump(self, name: str) -> Optional[str]:
+        path = self.state_path(name)
+        if path is None:
+            return None
+        os.makedirs(self.state_dir, exist_ok=True)
+        with open(path, "w") as f:
+            f.write(self.rpc("anvil_dumpState"))
+        print(f"[Fixture] Dumped state {name!r}: {path}")
+        return path
+
+    def load(self, name: str) -> bool:
+        path = self.state_path(name)
+        if path is None or not os.path.exists(path):
+            return False
+        with open(path, "r") as f:
+            if not self.rpc("anvil_loadState", f.read().strip()):
+                raise Exception(f"anvil_loadState rejected {path}")
+        for callback in self._listeners:
+            callback()
+        print(f"[Fixture] Loaded state {name!r} from {path}")
+        return True
+
+    # --- FIXTURES ---
+    def prepare(self, name: str, setup: Optional[Callable[[], Any]] = None) -> str:
+        """
+        Makes fixture `name` current: reverts to its snapshot if one is live,
+        else restores its state file, else runs setup() (and dumps the result).
+        The snapshot is taken either way.
+        """
+        if name in self.snapshots:
+            self.reset(name)
+            return self.snapshots[name]
+        if not self.load(name):
+            start = time.perf_counter()
+            if setup is not None:
+                setup()
+            print(f"[Fixture] Setup {name!r} took {time.perf_counter() - start:.1f}s")
+            self.dump(name)
+        return self.snapshot(name)
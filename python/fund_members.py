@@ -9,14 +9,16 @@ from the deployer account to cover gas fees.
 
 import os
 import json
-import time
 from web3 import Web3
 from eth_account import Account
 from dotenv import load_dotenv
+from rpc_pool import make_web3
+from traffic import shared_controller
+from vote_relayer import is_relayed_mode
 
 # --- CONFIGURATION ---
 load_dotenv()
-RPC_URL = os.getenv("RPC_URL")
+RPC_URL = os.getenv("RPC_URLS") or os.getenv("RPC_URL")  # comma-separated list enables the endpoint pool
 PRIVATE_KEY = os.getenv("PRIVATE_KEY")  # The funded deployer private key
 CHAIN_ID = int(os.getenv("CHAIN_ID", "11155111"))  # Sepolia chain id default
 
@@ -32,9 +34,10 @@ TARGET_MIN_BALANCE_ETH = 0.005
 TRANSACTION_BUFFER_ETH = 0.001
 
 if not RPC_URL or not PRIVATE_KEY:
-    raise SystemExit("RPC_URL and PRIVATE_KEY environment variables must be set.")
+    raise SystemExit("RPC_URL (or RPC_URLS) and PRIVATE_KEY environment variables must be set.")
 
-w3 = Web3(Web3.HTTPProvider(RPC_URL))
+w3 = make_web3()
+traffic = shared_controller()  # paces all RPCs; replaces the fixed per-transfer sleep
 owner_acct = Account.from_key(PRIVATE_KEY)
 owner_addr = owner_acct.address
 
@@ -58,6 +61,9 @@ def load_all_member_addresses() -> set:
     try:
         with open(OPT_MEMBERS_FILE, "r") as f:
             optimized_members = json.load(f)
+            if is_relayed_mode():
+                # Relayed votes are paid by the relayer; only the proposer (index 0) sends its own txs
+                optimized_members = optimized_members[:1]
             for m in optimized_members:
                 all_addresses.add(Web3.to_checksum_address(m['address']))
     except FileNotFoundError:
@@ -89,10 +95,8 @@ def load_all_member_addresses() -> set:
 
     return all_addresses
 
-def send_eth_transaction(to_address: str, top_up_amount_wei: int, nonce: int) -> tuple[str, int]:
-    """Builds, signs, and sends a simple ETH transfer transaction."""
-    gas_price = w3.eth.gas_price
-    
+def submit_eth_transaction(to_address: str, top_up_amount_wei: int, nonce: int, gas_price: int) -> str:
+    """Builds, signs, and sends a simple ETH transfer transaction; returns its hash without waiting."""
     # 1. Build the transaction
     tx = {
         'from': owner_addr,
@@ -106,9 +110,10 @@ def send_eth_transaction(to_address: str, top_up_amount_wei: int, nonce: int) ->
 
     # 2. Sign and Send
     signed_tx = owner_acct.sign_transaction(tx)
-    tx_hash = w3.eth.send_raw_transaction(signed_tx.raw_transaction).hex()
-    
-    # Wait for receipt
+    return w3.eth.send_raw_transaction(signed_tx.raw_transaction).hex()
+
+def wait_eth_transaction(to_address: str, tx_hash: str) -> tuple[str, int]:
+    """Waits for a submitted transfer's receipt."""
     receipt = w3.eth.wait_for_transaction_receipt(tx_hash, timeout=300)
     
     if receipt.status != 1:
@@ -142,9 +147,14 @@ def main():
     total_eth_sent = 0 # Initialize a cleaner variable for the total value
     successful_count = 0 # CRITICAL: New variable to track success
     
-    # --- LOOP START ---
-    for i, member_addr in enumerate(members_to_fund):
-        current_balance_wei = w3.eth.get_balance(member_addr)
+    # --- BALANCE SCAN (concurrent reads) ---
+    balances = traffic.map(w3.eth.get_balance, members_to_fund)
+
+    plan = []
+    for i, (member_addr, current_balance_wei) in enumerate(zip(members_to_fund, balances)):
+        if isinstance(current_balance_wei, Exception):
+            print(f"[{i+1}/{total_members}] ERROR: balance read failed for {member_addr}: {current_balance_wei}")
+            continue
         
         # --- CONDITIONAL FUNDING CHECK ---
         if current_balance_wei >= TARGET_MIN_BALANCE_WEI:
@@ -157,33 +167,53 @@ def main():
         
         # Total amount to send: shortfall + buffer for the funding transaction itself
         top_up_amount_wei = shortfall_wei + TRANSACTION_BUFFER_WEI
-        
-        # Check current balance of deployer before sending
-        sender_balance = w3.eth.get_balance(owner_addr)
-        required_sender_eth = top_up_amount_wei + w3.to_wei('0.1', 'gwei') * 21000
-        if sender_balance < required_sender_eth:
-            print("\nFATAL ERROR: Deployer account ran out of ETH for funding!")
-            print(f"Please fund the deployer address ({owner_addr}) and restart.")
-            # Added break here to stop execution if funds are insufficient
-            break 
-
-        print(f"    -> Current: {w3.from_wei(current_balance_wei, 'ether'):.4f} ETH | Shortfall: {w3.from_wei(shortfall_wei, 'ether'):.6f} ETH | Sending: {w3.from_wei(top_up_amount_wei, 'ether'):.6f} ETH")            
+        print(f"[{i+1}/{total_members}] {member_addr} -> Current: {w3.from_wei(current_balance_wei, 'ether'):.4f} ETH | Shortfall: {w3.from_wei(shortfall_wei, 'ether'):.6f} ETH | Sending: {w3.from_wei(top_up_amount_wei, 'ether'):.6f} ETH")            
+        plan.append((member_addr, top_up_amount_wei))
+
+    # Check the deployer can cover the whole batch before sending anything
+    sender_balance = w3.eth.get_balance(owner_addr)
+    required_sender_eth = sum(amount + w3.to_wei('0.1', 'gwei') * 21000 for _, amount in plan)
+    if sender_balance < required_sender_eth:
+        print("\nFATAL ERROR: Deployer account does not hold enough ETH for this funding batch!")
+        print(f"Required: {w3.from_wei(required_sender_eth, 'ether')} ETH | Available: {w3.from_wei(sender_balance, 'ether')} ETH")
+        print(f"Please fund the deployer address ({owner_addr}) and restart.")
+        return
 
+    # --- SUBMIT (in nonce order, so a rejected send never leaves a gap behind later transfers) ---
+    gas_price = w3.eth.gas_price
+    submitted = []
+    for k, (member_addr, amount) in enumerate(plan):
         try:
-            # Pass the calculated top-up amount to the helper function
-            tx_hash, gas_used = send_eth_transaction(member_addr, top_up_amount_wei, nonce)
-            
-            total_gas_spent += gas_used
-            total_eth_sent += top_up_amount_wei 
-            successful_count += 1 
-            print(f"    -> SUCCESS: Hash: {tx_hash} | Gas Used: {gas_used}")
-            nonce += 1
-            # Small pause to avoid RPC node throttling
-            time.sleep(0.05)
-
+            tx_hash = submit_eth_transaction(member_addr, amount, nonce, gas_price)
         except Exception as e:
-            print(f"    -> FAILURE: Error sending ETH to {member_addr}: {e}")
-            break 
+            error, tx_hash = e, None
+            # The node may know a different next nonce (e.g. a tx sent elsewhere): re-read it and retry once
+            fresh = w3.eth.get_transaction_count(owner_addr, "pending")
+            if fresh != nonce:
+                nonce = fresh
+                try:
+                    tx_hash = submit_eth_transaction(member_addr, amount, nonce, gas_price)
+                except Exception as retry_error:
+                    error = retry_error
+            if tx_hash is None:
+                print(f"    -> FAILURE: Error sending ETH to {member_addr}: {error}")
+                print(f"WARNING: Stopped submitting; {len(plan) - k - 1} later transfer(s) not sent. Re-run to continue.")
+                break
+        submitted.append((member_addr, amount, tx_hash))
+        nonce += 1
+
+    # --- CONFIRM (concurrent receipt waits) ---
+    outcomes = traffic.map(lambda job: wait_eth_transaction(job[0], job[2]), submitted)
+
+    for (member_addr, top_up_amount_wei, _), outcome in zip(submitted, outcomes):
+        if isinstance(outcome, Exception):
+            print(f"    -> FAILURE: Error sending ETH to {member_addr}: {outcome}")
+            continue
+        tx_hash, gas_used = outcome
+        total_gas_spent += gas_used
+        total_eth_sent += top_up_amount_wei 
+        successful_count += 1 
+        print(f"    -> SUCCESS: {member_addr} | Hash: {tx_hash} | Gas Used: {gas_used}")
     # --- LOOP ENDS HERE ---
 
     print("\n--- FUNDING COMPLETE ---")
@@ -191,6 +221,7 @@ def main():
     print(f"Funded {successful_count} addresses (out of {total_members}).")
     print(f"Total ETH sent (value): {w3.from_wei(total_eth_sent, 'ether')} ETH")
     print(f"Total gas used for funding: {total_gas_spent} gas")
+    print(traffic.summary())
     print("You can now re-run gas_optimizer.py.")
 
 if __name__ == "__main__":
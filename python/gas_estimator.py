@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+gas_estimator.py
+
+Cached gas-limit estimation replacing the hard-coded limits in the harness.
+
+eth_estimateGas is called once per
+(contract, function selector, argument shape, member-count bucket)
+and the result is stored with a safety margin in GAS_CACHE_FILE. Entries
+remember the hash of the contract's build artifact and are re-estimated
+when the artifact changes (i.e. after a recompile / redeploy).
+"""
+
+import os
+import json
+import hashlib
+import threading
+from pathlib import Path
+from typing import Any, Dict, Optional
+from web3 import Web3
+
+GAS_CACHE_FILE = os.getenv("GAS_CACHE_FILE", "gas_limit_cache.json")
+GAS_SAFETY_MARGIN = float(os.getenv("GAS_SAFETY_MARGIN", "1.2"))
+
+
+def argument_shape(args: Any) -> str:
+    """Describes the size-relevant shape of call arguments (array / bytes lengths)."""
+    if isinstance(args, (list, tuple)):
+        return "[" + ",".join(argument_shape(a) for a in args) + "]"
+    if isinstance(args, (bytes, bytearray)):
+        return f"b{(len(args) + 31) // 32}"
+    if isinstance(args, str) and args.startswith("0x") and len(args) != 42:
+        return f"b{(len(args) - 2 + 63) // 64}"
+    if isinstance(args, str) and not args.startswith("0x"):
+        return f"s{(len(args) + 31) // 32}"
+    return "_"
+
+
+def encode_call(tx_func) -> str:
+    """Calldata of a bound ContractFunction, through the public Contract.encode_abi."""
+    contract = tx_func.w3.eth.contract(abi=tx_func.contract_abi)
+    return contract.encode_abi(tx_func.abi_element_identifier, args=tx_func.args, kwargs=tx_func.kwargs)
+
+
+def member_bucket(member_count: int) -> int:
+    """Power-of-two bucket so O(N) member loops share an estimate per size class."""
+    return member_count.bit_length() if member_count > 0 else 0
+
+
+class GasLimitEstimator:
+    def __init__(self, w3: Web3, cache_file: str = GAS_CACHE_FILE, margin: float = GAS_SAFETY_MARGIN,
+                 artifact_root: str = "../out"):
+        self.w3 = w3
+        self.cache_file = Path(cache_file)
+        self.margin = margin
+        self.artifact_root = Path(artifact_root)
+        self.artifact_hashes: Dict[str, str] = {}
+        self.cache: Dict[str, Dict[str, Any]] = {}
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()   # concurrent senders share one cache file
+        if self.cache_file.exists():
+            with open(self.cache_file, "r") as f:
+                self.cache = json.load(f)
+
+    # --- ARTIFACT TRACKING ---
+    def register(self, address: Optional[str], source: str, contract: Optional[str] = None) -> None:
+        """
+        Associates a deployed address with its Foundry artifact
+        (out/<source>.sol/<contract or source>.json) for invalidation.
+        """
+        if not address:
+            return
+        path = self.artifact_root / f"{source}.sol" / f"{contract or source}.json"
+        digest = ""
+        if path.exists():
+            with open(path, "r") as f:
+                bytecode = json.load(f).get("deployedBytecode", {}).get("object", "")
+            digest = hashlib.sha256(bytecode.encode()).hexdigest()[:16]
+        else:
+            print(f"  [GasEstimator] artifact not found: {path}; limits for {address} won't be invalidated on rebuild")
+        self.artifact_hashes[Web3.to_checksum_address(address)] = digest
+
+    # --- ESTIMATION ---
+    def with_margin(self, gas: int) -> int:
+        return int(gas * self.margin)
+
+    def _key(self, to: str, selector: str, shape: str, bucket: int, variant: str) -> str:
+        return "|".join([to, selector, shape, str(bucket), variant])
+
+    def limit_for(self, tx: Dict[str, Any], shape: Optional[str] = None, member_count: int = 0,
+                  variant: str = "", default: Optional[int] = None) -> int:
+        """
+        Returns a cached gas limit for a (to, data, value, from) transaction dict,
+        estimating it on a cache miss. Falls back to `default` if estimation fails.
+        """
+        data = tx.get("data") or "0x"
+        if isinstance(data, (bytes, bytearray)):
+            data = Web3.to_hex(data)
+        to = Web3.to_checksum_address(tx["to"])
+        selector = data[:10] if len(data) >= 10 else "0x"
+        shape = shape if shape is not None else f"w{(len(data) - 10 + 63) // 64}"
+        key = self._key(to, selector, shape, member_bucket(member_count), variant)
+        artifact = self.artifact_hashes.get(to, "")
+
+        with self._lock:
+            entry = self.cache.get(key)
+            if entry and entry["artifact"] == artifact:
+                self.hits += 1
+                return entry["limit"]
+
+            self.misses += 1
+
+        # Estimated outside the lock, so concurrent misses (traffic.map waves) run in parallel
+        call = {"from": tx["from"], "to": to, "data": data, "value": tx.get("value", 0)}
+        try:
+            estimate = self.w3.eth.estimate_gas(call)
+        except Exception as e:
+            if default is None:
+                raise
+            print(f"  [GasEstimator] estimateGas failed for {selector} on {to} ({e}); using default {default}")
+            return default
+
+        limit = self.with_margin(estimate)
+        with self._lock:
+            self.cache[key] = {"limit": limit, "estimate": estimate, "artifact": artifact}
+            self._save()
+        return limit
+
+    def limit_for_call(self, tx_func, sender: str, value: int = 0, member_count: int = 0,
+                       variant: str = "", default: Optional[int] = None) -> int:
+        """Gas limit for a web3 ContractFunction call, keyed by its argument shape."""
+        tx = {
+            "from": sender,
+            "to": tx_func.address,
+            "data": encode_call(tx_func),
+            "value": value,
+        }
+        return self.limit_for(tx, shape=argument_shape(tx_func.args), member_count=member_count,
+                              variant=variant, default=default)
+
+    def _save(self) -> None:
+        with open(self.cache_file, "w") as f:
+            json.dump(self.cache, f, indent=2, sort_keys=True)
+
+    def summary(self) -> str:
+        return f"gas-limit cache: {self.hits} hit(s), {self.misses} estimate(s), {len(self.cache)} entries"
@@ -2,31 +2,50 @@ import os
 import time
 import json
 import logging
-from dataclasses import dataclass, asdict
-from typing import Dict, Any, List, Tuple
+from dataclasses import dataclass, asdict, field
+from typing import Dict, Any, List, Optional, Tuple
 from pathlib import Path
 from dotenv import load_dotenv
 from web3 import Web3
 from eth_account import Account
+from rpc_pool import make_web3
+from traffic import shared_controller
+from rpc_metrics import RPCRecorder, install_rpc_metrics
+from proposal_ids import governor_proposal_id, vulnerable_proposal_id
+from simulation import simulate_batch, require_batch_success, is_fast_mode
+from gas_estimator import GasLimitEstimator
+from event_decoder import EventRegistry, find_events
+from vote_relayer import VoteRelayer, VOTE_RELAYER_ADDR, is_relayed_mode
+from deployments import DeploymentRegistry, env_or_stack
+from tx_records import TxRecordSet
+from vote_scheduler import VoteScheduler
+from quorum_planner import QuorumPlanner, is_planned_mode
+from inclusion import InclusionTracker
+from tracing import Tracer, install_tracing, WAIT_CATEGORY, TRACE_FILE
+from cassette import pin, is_replay
+from fixtures import StateFixtures, FIXTURE_STATE_DIR
+from state_diff import StateDiff, collect_state_diffs, compare_roles, same_code
 
 # --- CONFIGURATION & ENV VARS ---
 load_dotenv()
 RPC_URL = os.getenv("RPC_URL")
 PRIVATE_KEY = os.getenv("PRIVATE_KEY") # Owner/Deployer key (Used for Timelock Admin execution if needed)
 CHAIN_ID = int(os.getenv("CHAIN_ID", "11155111"))
-
-# Deployed addresses (Set these in your .env file)
-V1_DAO_ADDR = os.getenv("V1_DAO_ADDR")          # Vulnerable DAO
-V1_TREASURY_ADDR = os.getenv("V1_TREASURY_ADDR")# TreasuryBasic
-V2_DAO_ADDR = os.getenv("V2_DAO_ADDR")          # Vulnerable DAO
-V2_TREASURY_ADDR = os.getenv("V2_TREASURY_ADDR")# TreasurySecure
-V3_DAO_ADDR = os.getenv("V3_DAO_ADDR")          # DAOOptimized
-V3_TREASURY_ADDR = os.getenv("V3_TREASURY_ADDR")# TreasuryBasic
-V4_DAO_ADDR = os.getenv("V4_DAO_ADDR")          # DAOOptimized
-V4_TREASURY_ADDR = os.getenv("V4_TREASURY_ADDR")# TreasurySecure
-VUL_TOKEN_ADDR = os.getenv("VUL_TOKEN_ADDR")    # VulnerableMembershipToken
-OPT_TOKEN_ADDR = os.getenv("OPT_TOKEN_ADDR")    # MembershipTokenMintable
-TIMELOCK_ADDR = os.getenv("TIMELOCK_ADDR")      # TimelockController
+FIXTURE_MODE = os.getenv("FIXTURE_MODE", "")  # local node only: "snapshot" (evm_snapshot) or "dump" (+ anvil_dumpState)
+
+# Deployed addresses: .env overrides, else the latest broadcast run of each stack
+deployments = DeploymentRegistry()
+V1_DAO_ADDR = env_or_stack("V1_DAO_ADDR", deployments, "V1", "VulnerableDAO")
+V1_TREASURY_ADDR = env_or_stack("V1_TREASURY_ADDR", deployments, "V1", "TreasuryBasic")
+V2_DAO_ADDR = env_or_stack("V2_DAO_ADDR", deployments, "V2", "VulnerableDAO")
+V2_TREASURY_ADDR = env_or_stack("V2_TREASURY_ADDR", deployments, "V2", "TreasurySecure")
+V3_DAO_ADDR = env_or_stack("V3_DAO_ADDR", deployments, "V3", "DAOOptimized")
+V3_TREASURY_ADDR = env_or_stack("V3_TREASURY_ADDR", deployments, "V3", "TreasuryBasic")
+V4_DAO_ADDR = env_or_stack("V4_DAO_ADDR", deployments, "V4", "DAOOptimized")
+V4_TREASURY_ADDR = env_or_stack("V4_TREASURY_ADDR", deployments, "V4", "TreasurySecure")
+VUL_TOKEN_ADDR = env_or_stack("VUL_TOKEN_ADDR", deployments, "DeployVulnerableToken", "VulnerableMembershipToken")
+OPT_TOKEN_ADDR = os.getenv("OPT_TOKEN_ADDR")    # MembershipTokenMintable (not in broadcast history)
+TIMELOCK_ADDR = env_or_stack("TIMELOCK_ADDR", deployments, "V4", "TimelockController")
 
 # For O(N) cost demonstration, we need a majority: 61 votes
 VOTER_COUNT = 40
@@ -34,7 +53,7 @@ VOTER_COUNT = 40
 # Test Parameters
 RECIPIENT_ADDR = Web3.to_checksum_address("0x" + "DEADBEEF" * 5)
 PROPOSAL_VALUE = Web3.to_wei(0.0004, 'ether')
-PROPOSAL_DESCRIPTION = f"Proposal to transfer funds to treasury {int(time.time())}"
+PROPOSAL_DESCRIPTION = pin("proposal_description", f"Proposal to transfer funds to treasury {int(time.time())}") # Same text on cassette replay
 
 
 # --- DYNAMIC MEMBER LOADING ---
@@ -101,11 +120,30 @@ VUL_PROPOSER_KEY = VULNERABLE_MEMBERS[0]['privateKey']
 OPT_PROPOSER_KEY = OPTIMIZED_MEMBERS[0]['privateKey']
 
 # --- WEB3 SETUP ---
-w3 = Web3(Web3.HTTPProvider(RPC_URL))
+w3 = make_web3()
+traffic = shared_controller() # Paces every RPC of the pool; bulk loops use traffic.map
+rpc_recorder = install_rpc_metrics(w3, RPCRecorder()) # RPC count/bytes/latency per scenario step
+inclusion = InclusionTracker(w3) # submit -> pending -> inclusion -> confirmation timings per tx
+tracer = install_tracing(w3, Tracer()) # scenario -> phase -> tx -> RPC spans (TRACE_FILE enables)
+REPORT_DIR = "reports"
 deployer_acct = Account.from_key(PRIVATE_KEY) # Timelock Admin Key
 deployer_addr = deployer_acct.address
 deployer_nonce = w3.eth.get_transaction_count(deployer_addr)
 
+# --- GAS LIMITS (estimated once per contract/selector/shape, cached on disk) ---
+gas_estimator = GasLimitEstimator(w3)
+event_registry = EventRegistry.from_artifacts()
+for _addr, _name in [
+    (V1_DAO_ADDR, "VulnerableDAO"), (V2_DAO_ADDR, "VulnerableDAO"),
+    (V3_DAO_ADDR, "DAOOptimized"), (V4_DAO_ADDR, "DAOOptimized"),
+    (V1_TREASURY_ADDR, "TreasuryBasic"), (V3_TREASURY_ADDR, "TreasuryBasic"),
+    (V2_TREASURY_ADDR, "TreasurySecure"), (V4_TREASURY_ADDR, "TreasurySecure"),
+    (VUL_TOKEN_ADDR, "VulnerableMembershipToken"), (OPT_TOKEN_ADDR, "MembershipTokenMintable:MembershipToken"),
+]:
+    _source, _, _contract = _name.partition(":")   # <source>[:<contract>] artifact
+    gas_estimator.register(_addr, _source, _contract or None)
+    event_registry.label(_addr, _source)
+
 # --- DATA STRUCTURES & LOGGING ---
 @dataclass
 class ScenarioResult:
@@ -119,46 +157,171 @@ class ScenarioResult:
     tx_execute: str = ""
     calldata_size: int = 0
     execution_path: str = "N/A" 
+    events: List[dict] = field(default_factory=list)
+    votes: TxRecordSet = field(default_factory=TxRecordSet)   # every vote tx: gas, block, status, latency
+    ops: Dict[str, TxRecordSet] = field(default_factory=dict) # propose / queue / execute txs
+    dao: str = ""
+    treasury: str = ""
+    state_diff: Optional[StateDiff] = None # prestateTracer diff of the executing tx
+
+    @property
+    def executing_tx(self) -> str:
+        """execute(), or VulnerableDAO's final vote, which executes inline."""
+        return self.tx_execute or self.tx_vote
+
+    def step(self, name: str) -> TxRecordSet:
+        return self.ops.setdefault(name, TxRecordSet())
+
+    def records(self) -> Dict[str, TxRecordSet]:
+        """Every recorded tx set in lifecycle order."""
+        steps = {name: self.ops[name] for name in ("propose",) if name in self.ops}
+        steps["votes"] = self.votes
+        steps.update((name, rs) for name, rs in self.ops.items() if name != "propose")
+        return steps
+
+def set_phase(phase: str) -> None:
+    """Starts a lifecycle phase for both the RPC accounting and the tracer."""
+    rpc_recorder.set_step(phase=phase)
+    tracer.phase(phase)
+
+def sleep(seconds: float, reason: str) -> None:
+    """time.sleep, traced as a wait span; fast-forwarded when replaying a cassette."""
+    with tracer.span(reason, WAIT_CATEGORY, seconds=seconds):
+        if not is_replay():
+            time.sleep(seconds)
+
+def record_events(res: ScenarioResult, receipt, step: str) -> list:
+    """Decodes a receipt's logs in one pass and keeps them on the scenario result."""
+    events = event_registry.decode_receipt(receipt)
+    for ev in events:
+        print(f"  [event] {step}: {ev.contract}.{ev.name} {ev.to_dict()['args']}")
+        res.events.append({"step": step, **ev.to_dict()})
+    return events
+
+def build_tx(account, tx_func, nonce: int, gas: int = None) -> dict:
+    """Builds the legacy-priced transaction used by every harness send."""
+    gas_price = w3.to_wei('1.0', 'gwei') 
+    if gas is None:
+        gas = gas_estimator.limit_for_call(tx_func, account.address, member_count=VOTER_COUNT + 1, default=1_000_000)
+    return tx_func.build_transaction({
+        "chainId": CHAIN_ID,
+        "gas": gas, 
+        "gasPrice": gas_price,
+        "nonce": nonce,
+        "from": account.address,
+    })
+
+def preflight_votes(dao_contract, proposal_id, voters: List[Any], support, executor_last: bool = False) -> list:
+    """
+    Simulates every planned castVote for a proposal in one batched RPC before
+    any of them is broadcast. Raises with per-voter revert reasons on failure.
+    executor_last leaves the last vote (VulnerableDAO executor vote) unbounded so
+    its simulated gas can size the real limit.
+    """
+    if is_fast_mode():
+        return []
+    txs = [
+        build_tx(acct, dao_contract.functions.castVote(proposal_id, support), 0)
+        for acct in voters
+    ]
+    if executor_last and txs:
+        txs[-1].pop("gas")
+    labels = [f"castVote from {acct.address}" for acct in voters]
+    results = simulate_batch(w3, txs, labels)
+    require_batch_success(results, f"VOTE PRE-FLIGHT ({len(voters)} voters)")
+    return results
+
+def plan_funded_voters(members: List[MemberData], indexes: range, label: str) -> List[Any]:
+    """Reads voter balances concurrently and keeps the accounts that can pay for a vote."""
+    accounts = [Account.from_key(members[i]['privateKey']) for i in indexes]
+    balances = traffic.map(lambda acct: w3.eth.get_balance(acct.address), accounts)
+    plan = []
+    for i, acct, balance in zip(indexes, accounts, balances):
+        if isinstance(balance, Exception):
+            raise balance
+        if balance < REQUIRED_ETH_FOR_VOTE:
+            print(f"Skipping Vote {i} ({label}): {acct.address} has insufficient ETH ({w3.from_wei(balance, 'ether'):.4f} ETH).")
+            continue
+        plan.append(acct)
+    return plan
+
+def send_votes(dao_contract, proposal_id, voters: List[Any], support, records: TxRecordSet = None,
+               gas: Dict[str, int] = None) -> List[Any]:
+    """
+    Sends already pre-flighted castVote txs concurrently (each voter is its own
+    account, so nonces don't collide) and returns the receipts in voter order.
+    Each vote is also appended to records (in voter order) when given.
+    gas maps voter address -> gas limit (scheduled votes); cached estimates otherwise.
+    """
+    def vote(acct):
+        nonce = w3.eth.get_transaction_count(acct.address)
+        receipt = send_tx(acct, dao_contract.functions.castVote(proposal_id, support), nonce, simulate=False,
+                          gas=(gas or {}).get(acct.address))
+        return receipt, inclusion.pop(receipt['transactionHash'])
+
+    outcomes = traffic.map(vote, voters)
+    if records is not None:
+        for acct, outcome in zip(voters, outcomes):
+            if isinstance(outcome, Exception):
+                records.failure(acct.address, outcome)
+            else:
+                records.add(outcome[0], timing=outcome[1])
+    failed = [r for r in outcomes if isinstance(r, Exception)]
+    if failed:
+        raise failed[0]
+    return [receipt for receipt, _ in outcomes]
+
+def send_scheduled_votes(dao_contract, proposal_id, schedule, support, records: TxRecordSet = None) -> List[Any]:
+    """Sends each block-sized wave and waits for it to land before the next (the final vote is left to the caller)."""
+    receipts = []
+    for k, wave in enumerate(schedule.waves, 1):
+        print(f"  [Scheduler] wave {k}/{len(schedule.waves)}: {len(wave)} vote(s), {sum(v.gas for v in wave):,} gas reserved")
+        limits = {v.voter.address: v.gas for v in wave}
+        receipts += send_votes(dao_contract, proposal_id, [v.voter for v in wave], support, records=records, gas=limits)
+    return receipts
 
 # In gas_optimizer.py, replace your current send_tx function:
 
-def send_tx(account, tx_func, nonce: int):
+def send_tx(account, tx_func, nonce: int, simulate: bool = True, records: TxRecordSet = None, gas: int = None):
+    with tracer.span(f"tx {tx_func.fn_name}", "tx", sender=account.address, nonce=nonce):
+        return _send_tx(account, tx_func, nonce, simulate, records, gas)
+
+def _send_tx(account, tx_func, nonce: int, simulate: bool, records: TxRecordSet, gas: int):
     acct = account # Use a clear local name
     
     # --- 1. BUILD TRANSACTION ---
-    gas_price = w3.to_wei('1.0', 'gwei') 
-    tx = tx_func.build_transaction({
-        "chainId": CHAIN_ID,
-        "gas": 1_000_000, 
-        "gasPrice": gas_price,
-        "nonce": nonce,
-        "from": acct.address,
-    })
+    with tracer.span("build_tx", "python"):
+        tx = build_tx(acct, tx_func, nonce, gas)
 
     # --- 2. SIMULATION (CRITICAL DEBUGGING) ---
-    try:
-        # Simulate the transaction (w3.eth.call) to get the revert reason
-        w3.eth.call(tx) 
-    except Exception as e:
-        # If simulation fails, print the detailed revert error and stop
-        print("-" * 50)
-        print(f"!!! CRITICAL REVERT DEBUGGING (SIMULATION) !!!")
-        print(f"Attempting to call {tx_func.fn_name} from {acct.address}")
-        # Use repr(e) for the most detailed error information
-        print(f"Transaction Reverted in Simulation. Error:")
-        print(repr(e)) 
-        print("-" * 50)
-        raise # Re-raise the exception to stop the script
+    # Votes are pre-flighted as a whole batch (see preflight_votes) and pass simulate=False.
+    if simulate:
+        sim = simulate_batch(w3, [tx], labels=[tx_func.fn_name])
+        if sim and not sim[0].success:
+            # If simulation fails, print the detailed revert error and stop
+            print("-" * 50)
+            print(f"!!! CRITICAL REVERT DEBUGGING (SIMULATION) !!!")
+            print(f"Attempting to call {tx_func.fn_name} from {acct.address}")
+            print(f"Transaction Reverted in Simulation. Reason: {sim[0].revert_reason}")
+            print("-" * 50)
+            raise Exception(f"Simulation reverted: {tx_func.fn_name} ({sim[0].revert_reason})")
         
     # --- 3. SIGN AND SEND ---
     print(f"Sending Tx: {tx_func.fn_name} from {acct.address}")
-    signed_tx = w3.eth.account.sign_transaction(tx, acct.key)
+    with tracer.span("sign", "python"):
+        signed_tx = w3.eth.account.sign_transaction(tx, acct.key)
     
     try:
-        # Send transaction and wait for receipt
-        tx_hash = w3.eth.send_raw_transaction(signed_tx.raw_transaction).hex()
+        # Send transaction and wait for receipt (submit/pending/inclusion times kept by the tracker)
+        tx_hash, timing = inclusion.submit(signed_tx.raw_transaction)
         print(f"  > Tx Hash: {tx_hash}")
-        receipt = w3.eth.wait_for_transaction_receipt(tx_hash)
+        try:
+            with tracer.span("inclusion", WAIT_CATEGORY, tx=tx_hash):
+                receipt = inclusion.wait(tx_hash, timing)
+        finally:
+            inclusion.pop(tx_hash)   # always: unrecorded sends must not pile up in inclusion.timings
+        if records is not None:
+            records.add(receipt, timing=timing)
         
         # Check receipt status (a second-level check for non-simulated reverts)
         if receipt.status == 0:
@@ -184,7 +347,7 @@ def wait_for_blocks(w3, num_blocks):
     print(f"Waiting for {num_blocks} block(s). Current: {start_block}, Target: {target_block}")
     
     while w3.eth.block_number < target_block:
-        time.sleep(5) # Poll every 5 seconds (adjust as needed for your chain)
+        sleep(5, "wait_for_blocks") # Poll every 5 seconds (adjust as needed for your chain)
         
     print(f"Block reached: {w3.eth.block_number}")
 
@@ -211,7 +374,7 @@ def wait_for_proposal_succeeded(dao_contract, proposal_id):
         else:
             print(f"  > State: {state} | Waiting for state 4...")
 
-        time.sleep(300) # Wait 5 minutes (300 seconds)
+        sleep(300, "wait_for_succeeded") # Wait 5 minutes (300 seconds)
     return True
 
 def load_abi_from_artifact(contract_name: str, root_path: str = '../out') -> dict:
@@ -238,6 +401,8 @@ VOTING_DELAY = 1
 
 def log_results(scenario_name: str, vul_res: ScenarioResult, opt_res: ScenarioResult):
     """Formats and prints the results according to the required structured logging standard."""
+    vul_diff = vul_res.state_diff or StateDiff("", error="not traced")
+    opt_diff = opt_res.state_diff or StateDiff("", error="not traced")
     
     def calculate_delta(opt, vul):
         if vul == 0: return 0, 0.0
@@ -260,6 +425,11 @@ def log_results(scenario_name: str, vul_res: ScenarioResult, opt_res: ScenarioRe
     # Vote (Total voting gas for {VOTER_COUNT} voters)
     delta_abs, delta_perc = calculate_delta(opt_res.gas_vote, vul_res.gas_vote)
     print(f"[GAS] castVote (x{VOTER_COUNT}): vulnerable={vul_res.gas_vote} optimized={opt_res.gas_vote} delta={delta_abs} ({delta_perc:+.2f}%)")
+    for side, r in (("vulnerable", vul_res), ("optimized", opt_res)):
+        agg = r.votes.aggregates()
+        if agg["count"]:
+            print(f"[GAS] castVote per tx ({side}): n={agg['count']} avg={agg['gas_avg']:.0f} min={agg['gas_min']} max={agg['gas_max']} "
+                  f"reverted={agg['reverted']} blocks={agg['blocks']}")
     
     # Queue (Vulnerable has 0 cost)
     delta_abs, delta_perc = calculate_delta(opt_res.gas_queue, vul_res.gas_queue)
@@ -275,17 +445,46 @@ def log_results(scenario_name: str, vul_res: ScenarioResult, opt_res: ScenarioRe
     delta_abs, delta_perc = calculate_delta(opt_total, vul_total)
     print(f"[GAS] total(): vulnerable={vul_total} optimized={opt_total} delta={delta_abs} ({delta_perc:+.2f}%)")
 
+    # --- INCLUSION LATENCY (ms from submission; p50/p95/p99) ---
+    print("\n# --- INCLUSION LATENCY ---")
+    for side, r in (("vulnerable", vul_res), ("optimized", opt_res)):
+        for step, records in r.records().items():
+            if not len(records):
+                continue
+            p = records.timing_percentiles()
+            print(f"[LATENCY] {step} ({side}, n={len(records)}): "
+                  f"pending={p['pending_ms_p50']:.0f}/{p['pending_ms_p95']:.0f}/{p['pending_ms_p99']:.0f} "
+                  f"inclusion={p['inclusion_ms_p50']:.0f}/{p['inclusion_ms_p95']:.0f}/{p['inclusion_ms_p99']:.0f} "
+                  f"confirmed={p['confirm_ms_p50']:.0f}/{p['confirm_ms_p95']:.0f}/{p['confirm_ms_p99']:.0f}")
+
 
-    # --- DIVERGENCE CHECKS ---
+    # --- DIVERGENCE CHECKS (prestateTracer diffs of the executing txs) ---
     print("\n# --- DIVERGENCE CHECKS ---")
-    print(f"[STATE] execution_path: DIVERGED (Vulnerable={vul_res.execution_path}, Optimized={opt_res.execution_path})")
-    
-    if "TreasurySecure" in scenario_name:
-        print(f"[STATE] safety_behavior: DIVERGED (Vulnerable=Transfer() No Guard, Optimized=Call() + Reentrancy Guard)")
+    path_verdict = "MATCH" if vul_res.execution_path == opt_res.execution_path else "DIVERGED"
+    print(f"[STATE] execution_path: {path_verdict} (Vulnerable={vul_res.execution_path}, Optimized={opt_res.execution_path})")
+
+    roles = {
+        "treasury": (vul_res.treasury, opt_res.treasury),
+        "recipient": (RECIPIENT_ADDR, RECIPIENT_ADDR),
+        "dao": (vul_res.dao, opt_res.dao),
+    }
+    # V3 (TreasuryBasic) and V4 (TreasurySecure) have unrelated layouts: slot-for-slot only for the same contract
+    try:
+        same_treasury = same_code(w3, vul_res.treasury, opt_res.treasury)
+    except Exception:
+        same_treasury = False
+    treasury_storage = {"treasury"} if same_treasury else set()
+    for check in compare_roles(vul_diff, opt_diff, roles, storage_roles=treasury_storage,
+                               count_roles={"treasury"} - treasury_storage):
+        print(check.line())
+
+    if vul_diff.ok and opt_diff.ok:
+        received = (vul_diff.account(RECIPIENT_ADDR).balance_delta, opt_diff.account(RECIPIENT_ADDR).balance_delta)
+        verdict = "MATCH" if received == (PROPOSAL_VALUE, PROPOSAL_VALUE) else "DIVERGED"
+        print(f"[STATE] treasury_result: {verdict} (Expected {Web3.from_wei(PROPOSAL_VALUE, 'ether')} ETH to recipient; "
+              f"Vulnerable={Web3.from_wei(received[0], 'ether')}, Optimized={Web3.from_wei(received[1], 'ether')})")
     else:
-        print(f"[STATE] safety_behavior: DIVERGED (Vulnerable=Transfer() No Guard, Optimized=Call() No Guard)")
-        
-    print(f"[STATE] treasury_result: MATCH (Expected Outcome: {Web3.from_wei(PROPOSAL_VALUE, 'ether')} ETH transfer)")
+        print(f"[STATE] treasury_result: UNCHECKED ({vul_diff.error or opt_diff.error})")
 
     # --- ARTIFACT TRACING ---
     print("\n# --- ARTIFACT TRACING ---")
@@ -300,7 +499,8 @@ def log_results(scenario_name: str, vul_res: ScenarioResult, opt_res: ScenarioRe
 def run_scenario_vulnerable(dao_addr: str, treasury_addr: str, proposer_nonce: int) -> Tuple[ScenarioResult, int]:
     """Runs V1/V2 (Vulnerable DAO) lifecycle: propose -> 61x vote (last vote executes)"""
     global deployer_nonce
-    res = ScenarioResult()
+    res = ScenarioResult(dao=dao_addr, treasury=treasury_addr)
+    set_phase("setup")
     proposer_acct = Account.from_key(VUL_PROPOSER_KEY)
     dao_contract = w3.eth.contract(address=dao_addr, abi=VULNERABLE_GOVERNOR_ABI)
     
@@ -334,6 +534,7 @@ def run_scenario_vulnerable(dao_addr: str, treasury_addr: str, proposer_nonce: i
         raise Exception("Invalid Calldata")
 
     # 2. PROPOSE
+    set_phase("propose")
     print("\n--- PROPOSAL TRANSACTION DEBUG ---")
     print(f"Target: {treasury_addr}")
     print(f"Value: 0 (ETH)")
@@ -347,7 +548,7 @@ def run_scenario_vulnerable(dao_addr: str, treasury_addr: str, proposer_nonce: i
         calldata,               # bytes data
         PROPOSAL_DESCRIPTION    # string description
     )
-    receipt = send_tx(proposer_acct, tx_func, proposer_nonce)
+    receipt = send_tx(proposer_acct, tx_func, proposer_nonce, records=res.step("propose"))
     proposer_nonce += 1
     
     res.gas_propose = receipt['gasUsed']
@@ -355,70 +556,73 @@ def run_scenario_vulnerable(dao_addr: str, treasury_addr: str, proposer_nonce: i
     tx_data = w3.eth.get_transaction(receipt['transactionHash'])
     res.calldata_size = (len(tx_data['input']) - 2) / 2
     
-    # Get proposalId from storage slot 3 (specific to VulnerableDAO)
-    proposal_id = w3.to_int(w3.eth.get_storage_at(dao_addr, 3))
+    # proposalId from this receipt's ProposalCreated log (storage reads race with other proposers)
+    proposal_id = vulnerable_proposal_id(receipt, dao_addr)
 
     # 3. VOTE (61 Votes)
+    set_phase("votes")
     total_vote_gas = 0
-    
-    # Start from index 1 (Proposer is index 0) and vote up to VOTER_COUNT (total 61 votes)
-    for i in range(1, VOTER_COUNT + 1):
-        if i == VOTER_COUNT:
-            print(f"\n!!! DESIGNATED EXECUTOR: Using Proposer for high-gas Final Vote {i} !!!")
-            voter_acct = Account.from_key(VUL_PROPOSER_KEY) 
-            REQUIRED_FUNDS = w3.to_wei('0.025', 'ether') # Threshold for the heavy O(N) execution
-        else:
-            member_data = VULNERABLE_MEMBERS[i]
-            voter_acct = Account.from_key(member_data['privateKey'])
-            voter_nonce = w3.eth.get_transaction_count(voter_acct.address)
-            voter_balance = w3.eth.get_balance(voter_acct.address)
-            if voter_balance < REQUIRED_ETH_FOR_VOTE:
-                role = "Proposer/Executor" if i == VOTER_COUNT else "Voter"
-                print(f"Skipping Vote {i} ({role}): {voter_acct.address} has insufficient ETH ({w3.from_wei(voter_balance, 'ether'):.4f} ETH).")
-                continue
 
-        tx_func = dao_contract.functions.castVote(proposal_id, True) 
-
-                
-        # The final vote (i == VOTER_COUNT) includes O(N) loop + execution logic
-        if i == VOTER_COUNT:
-            print(f"  [Vulnerable] Measuring final vote (Vote {i}) which includes O(N) check and execution...")
-            fresh_proposer_nonce = w3.eth.get_transaction_count(voter_acct.address, 'pending')
-            print(f"  [DEBUG] Blockchain expects nonce: {fresh_proposer_nonce} (Script was trying to use {voter_nonce})")
-            signed_tx = voter_acct.sign_transaction(
-            tx_func.build_transaction({
-                'from': voter_acct.address,
-                'nonce': fresh_proposer_nonce,
-                'gas': 2000000,
-                'maxFeePerGas': w3.to_wei('10', 'gwei'),
-                'maxPriorityFeePerGas': w3.to_wei('2', 'gwei'),
-            })
-            )
-            tx_hash = w3.eth.send_raw_transaction(signed_tx.raw_transaction)
-            print(f" > Tx Hash: {w3.to_hex(tx_hash)}")
-        
-            # 2. Get the receipt for gas measurement
-            receipt = w3.eth.wait_for_transaction_receipt(tx_hash)
-        
-            # 3. Store the gas usage for the final vote
-            final_vote_gas = receipt['gasUsed']
-        
-            # Since V1 executes immediately, we don't need a separate execute step.
-            execution_gas = 0 
-            break # Exit the loop after the final vote
-    
-        else:
-            receipt = send_tx(voter_acct, tx_func, voter_nonce)
-            total_vote_gas += receipt['gasUsed']
-            if i == VOTER_COUNT:
-                res.tx_vote = receipt['transactionHash'].hex()
-                tx_data = w3.eth.get_transaction(receipt['transactionHash'])
-            
-        time.sleep(0.1) 
+    # Plan the voter set up front so the whole batch is pre-flighted in one simulation
+    vote_plan = plan_funded_voters(VULNERABLE_MEMBERS, range(1, VOTER_COUNT), "Voter")
+    executor_acct = Account.from_key(VUL_PROPOSER_KEY)
+    scheduler = VoteScheduler(w3, traffic)
+    # Order by real weights so the designated executor is the vote that crosses the threshold
+    dao_token = w3.eth.contract(address=dao_contract.functions.token().call(), abi=TOKEN_ABI)
+    if is_planned_mode():
+        # Only the votes the yes*2 >= supply rule needs; every planned vote is necessary, so the last one crosses
+        planner = QuorumPlanner(w3, traffic, scheduler)
+        rule = planner.vulnerable_rule(dao_contract, dao_token, proposal_id)
+        plan = planner.plan(rule, planner.candidates(rule, dao_contract, dao_token, proposal_id,
+                                                     vote_plan + [executor_acct], True))
+        print(f"  [Planner] {rule.summary()}; {plan.summary()}")
+        if plan.ok and plan.voters:
+            planned = plan.accounts
+            if executor_acct.address not in {a.address for a in planned}:
+                executor_acct = planned[-1]
+            vote_plan = [a for a in planned if a.address != executor_acct.address]
+    order = scheduler.threshold_order(dao_contract, dao_token, vote_plan, executor_acct)
+    if order.dropped:
+        print(f"  [Scheduler] {len(order.dropped)} vote(s) would land after execution; not sent")
+    if order.crossing is None:
+        print("  [!] Planned votes cannot reach the VulnerableDAO majority; no vote will execute.")
+    planned = order.before + ([order.crossing] if order.crossing else [])
+    sim = preflight_votes(dao_contract, proposal_id, planned, True, executor_last=order.crossing is not None)
+    vote_limit = gas_estimator.limit_for_call(dao_contract.functions.castVote(proposal_id, True), executor_acct.address,
+                                              member_count=VOTER_COUNT + 1, default=1_000_000)
+    limits = scheduler.limits_from_simulation(sim, len(order.before), vote_limit)
+    # The executing vote is sized from its simulation (O(N) loop + _execute); re-estimated at send time otherwise
+    final_limit = gas_estimator.with_margin(sim[-1].gas_used) if order.crossing and sim and sim[-1].gas_used else 0
+    schedule = scheduler.schedule(order.before, limits, final=order.crossing, final_gas=final_limit)
+    print(f"  [Scheduler] {schedule.summary()}")
+
+    # Every other wave lands before the executing vote is sent
+    for receipt in send_scheduled_votes(dao_contract, proposal_id, schedule, True, records=res.votes):
+        total_vote_gas += receipt['gasUsed']
+    if schedule.final is None:
+        raise Exception("VulnerableDAO proposal cannot pass with the funded voter set.")
+
+    # The final vote includes O(N) loop + execution logic
+    set_phase("execute")
+    voter_acct = schedule.final.voter
+    print(f"\n!!! THRESHOLD VOTE: {voter_acct.address} casts the executing final vote !!!")
+    tx_func = dao_contract.functions.castVote(proposal_id, True)
+    final_limit = schedule.final.gas or gas_estimator.with_margin(tx_func.estimate_gas({"from": voter_acct.address}))
+    fresh_nonce = w3.eth.get_transaction_count(voter_acct.address, 'pending')
+    receipt = send_tx(voter_acct, tx_func, fresh_nonce, simulate=False, records=res.votes, gas=final_limit)
+    if voter_acct.address == proposer_acct.address:
+        proposer_nonce = fresh_nonce + 1
+
+    # Store the gas usage for the final vote (V1 executes immediately, no separate execute step)
+    final_vote_gas = receipt['gasUsed']
+    res.tx_vote = receipt['transactionHash'].hex()
+    executed = find_events(record_events(res, receipt, "final_vote"), "Executed", dao_addr)
+    if not executed:
+        print("  [!] Final vote did not emit VulnerableDAO.Executed: threshold not crossed.")
         
     res.gas_vote = total_vote_gas
     res.gas_execute = 0 # Executes inside the final vote
-    res.execution_path = "Immediate"
+    res.execution_path = "Immediate" if executed else "Not executed"
     
     return res, proposer_nonce
 
@@ -426,12 +630,13 @@ def run_scenario_vulnerable(dao_addr: str, treasury_addr: str, proposer_nonce: i
 def run_scenario_optimized(dao_addr: str, treasury_addr: str, proposer_nonce: int) -> Tuple[ScenarioResult, int]:
     """Runs V3/V4 (Optimized DAO) lifecycle: propose -> 61x castVote -> queue -> execute"""
     global deployer_nonce
-    res = ScenarioResult()
+    res = ScenarioResult(dao=dao_addr, treasury=treasury_addr)
+    set_phase("setup")
     proposer_acct = Account.from_key(OPT_PROPOSER_KEY)
     dao_contract = w3.eth.contract(address=dao_addr, abi=GOVERNOR_ABI)
 
-    TOKEN_ADDRESS_OZ = Web3.to_checksum_address('0x8468f201FEE551a0EFDB0b2d41876312fc21a63C')
-    # Get the token contract instance (must be the OZ ERC20Votes token)
+    # The ERC20Votes token this DAO counts votes with (not the newest token deploy)
+    TOKEN_ADDRESS_OZ = w3.eth.contract(address=dao_addr, abi=DAO_OPTIMIZED_ABI).functions.token().call()
     token_contract = w3.eth.contract(address=TOKEN_ADDRESS_OZ, abi=TOKEN_ABI)
     proposer_addr = proposer_acct.address
 
@@ -492,10 +697,16 @@ def run_scenario_optimized(dao_addr: str, treasury_addr: str, proposer_nonce: in
     values = [0]
     calldatas = [calldata_to_send]
     description_hash = Web3.keccak(text=PROPOSAL_DESCRIPTION)
+
+    # proposalId is hashProposal(targets, values, calldatas, descriptionHash): known before sending
+    proposal_id = governor_proposal_id(targets, values, calldatas, PROPOSAL_DESCRIPTION)
+    res.proposal_id = proposal_id
+    print(f"Proposal ID (computed offline): {proposal_id}")
     
     # 2. PROPOSE
+    set_phase("propose")
     tx_func = dao_contract.functions.propose(targets, values, calldatas, PROPOSAL_DESCRIPTION)
-    receipt = send_tx(proposer_acct, tx_func, proposer_nonce)
+    receipt = send_tx(proposer_acct, tx_func, proposer_nonce, records=res.step("propose"))
     proposer_nonce += 1
     
     res.gas_propose = receipt['gasUsed']
@@ -503,17 +714,7 @@ def run_scenario_optimized(dao_addr: str, treasury_addr: str, proposer_nonce: in
     tx_data = w3.eth.get_transaction(receipt['transactionHash'])
     res.calldata_size = (len(tx_data['input']) - 2) / 2
 
-    # Extract proposalId from the logs (Topic 1 of ProposalCreated event)
-    receipt_obj = w3.eth.get_transaction_receipt(res.tx_propose)
-    dao_contract = w3.eth.contract(address=dao_addr, abi=DAO_OPTIMIZED_ABI)
-    proposal_created_event = dao_contract.events.ProposalCreated()
-    event_filter = proposal_created_event.process_receipt(receipt)
-    if len(event_filter) > 0:
-        proposal_id = event_filter[0].args.proposalId
-    else:
-        raise Exception("ERROR: ProposalCreated event not found in transaction receipt.")
-    res.proposal_id = proposal_id
-
+    set_phase("wait")
     delay_blocks = VOTING_DELAY + 1
     wait_for_blocks(w3, delay_blocks)
 
@@ -564,6 +765,7 @@ def run_scenario_optimized(dao_addr: str, treasury_addr: str, proposer_nonce: in
     print("----------------------------------\n")
 
     # 4. VOTE (40 Votes - Low cost due to snapshots/ERC20Votes)
+    set_phase("votes")
     dao_contract = w3.eth.contract(address=dao_addr, abi=DAO_OPTIMIZED_ABI)
     token_addr = dao_contract.functions.token().call()
     token = w3.eth.contract(address=token_addr, abi=TOKEN_ABI)
@@ -574,52 +776,82 @@ def run_scenario_optimized(dao_addr: str, treasury_addr: str, proposer_nonce: in
         print(f"Proposal {res.proposal_id} is now Active (State 1). Starting voting.")
 
     total_vote_gas = 0
-    # Start from index 1 (Proposer is index 0)
-    for i in range(1, VOTER_COUNT + 1):
-        member_data = OPTIMIZED_MEMBERS[i]
-        voter_acct = Account.from_key(member_data['privateKey'])
-        voter_nonce = w3.eth.get_transaction_count(voter_acct.address)
-        voter_balance = w3.eth.get_balance(voter_acct.address)
-        if voter_balance < REQUIRED_ETH_FOR_VOTE:
-            print(f"Skipping Vote {i} (Optimized): {voter_acct.address} has insufficient ETH ({w3.from_wei(voter_balance, 'ether'):.4f} ETH).")
-            continue
+    # Success rule read up front (for > against, plus DAOOptimized's quorum term) instead of after the deadline
+    planner = QuorumPlanner(w3, traffic)
+    rule = planner.optimized_rule(dao_contract, proposal_id)
+    print(f"  [Planner] {rule.summary()}")
+    whales = [proposer_acct, deployer_acct]
+    # Start from index 1 (Proposer is index 0); relayed ballots need no member ETH
+    if is_relayed_mode():
+        members = [Account.from_key(OPTIMIZED_MEMBERS[i]['privateKey']) for i in range(1, VOTER_COUNT + 1)]
+    else:
+        members = plan_funded_voters(OPTIMIZED_MEMBERS, range(1, VOTER_COUNT + 1), "Optimized")
+    planned = None   # None: every member plus both whales vote
+    if is_planned_mode():
+        plan = planner.plan(rule, planner.candidates(rule, dao_contract, token, proposal_id, members + whales, 1))
+        print(f"  [Planner] {plan.summary()}")
+        if plan.ok:
+            planned = {a.address for a in plan.accounts}
+        else:
+            print("  [Planner] Falling back to the full vote set.")
+    in_plan = lambda acct: planned is None or acct.address in planned
+
+    if is_relayed_mode():
+        # Members sign ballots offline; the deployer relays them in block-sized batches (no member ETH needed)
+        relayer = VoteRelayer(w3, VOTE_RELAYER_ADDR, deployer_acct, dao_addr, traffic)
+        member_keys = [a.key for a in members if in_plan(a)]
+        relay_report = relayer.relay(proposal_id, 1, member_keys, records=res.votes)
+        print(relay_report.summary())
+        total_vote_gas += relay_report.gas_used
+        deployer_nonce = w3.eth.get_transaction_count(deployer_addr)
+    else:
+        vote_plan = [a for a in members if in_plan(a)]
+
+        # One batched simulation for members + the whales that vote
+        sim = preflight_votes(dao_contract, proposal_id, vote_plan + [w for w in whales if in_plan(w)], 1)
+
+        # Per-vote limits from the simulation, packed into block-sized waves
+        scheduler = VoteScheduler(w3, traffic)
+        vote_limit = gas_estimator.limit_for_call(dao_contract.functions.castVote(proposal_id, 1), proposer_acct.address,
+                                                  member_count=VOTER_COUNT + 1, default=1_000_000)
+        schedule = scheduler.schedule(vote_plan, scheduler.limits_from_simulation(sim, len(vote_plan), vote_limit))
+        print(f"  [Scheduler] {schedule.summary()}")
+        for receipt in send_scheduled_votes(dao_contract, proposal_id, schedule, 1, records=res.votes): # 1=For
+            total_vote_gas += receipt['gasUsed']
+    # --- ADD PROPOSER (WHALE) VOTE HERE ---
+    receipt = None
+    if in_plan(proposer_acct):
+        print("  [Whale] Casting decisive Proposer vote...")
+        tx_func = dao_contract.functions.castVote(proposal_id, 1)
+
+        # Note: Using proposer_nonce which was updated after the 'propose' call
+        receipt = send_tx(proposer_acct, tx_func, proposer_nonce, simulate=False, records=res.votes)
+        proposer_nonce += 1 # Update for the upcoming 'queue' call
 
-        tx_func = dao_contract.functions.castVote(proposal_id, 1) # 1=For
-        
-        receipt = send_tx(voter_acct, tx_func, voter_nonce)
         total_vote_gas += receipt['gasUsed']
-        time.sleep(0.1)
-    # --- ADD PROPOSER (WHALE) VOTE HERE ---
-    print("  [Whale] Casting decisive Proposer vote...")
-    tx_func = dao_contract.functions.castVote(proposal_id, 1)
-    
-    # Note: Using proposer_nonce which was updated after the 'propose' call
-    receipt = send_tx(proposer_acct, tx_func, proposer_nonce)
-    proposer_nonce += 1 # Update for the upcoming 'queue' call
-    
-    total_vote_gas += receipt['gasUsed']
     
     # --- Part C: GLOBAL DEPLOYER (The Decisive Vote) ---
-    # Assuming deployer_acct and deployer_nonce are defined in your setup
-    print(f"  [Deployer] Casting GLOBAL WHALE vote from {deployer_addr}...")
-    
-    # 1. Ensure Deployer is delegated to itself (Done once per session)
-    # 2. Cast the vote
-    tx_func = dao_contract.functions.castVote(proposal_id, 1)
-    receipt = send_tx(deployer_acct, tx_func, deployer_nonce)
-    deployer_nonce += 1
-    
-    total_vote_gas += receipt['gasUsed']
+    if in_plan(deployer_acct):
+        print(f"  [Deployer] Casting GLOBAL WHALE vote from {deployer_addr}...")
 
-    # Record the Proposer's vote as the final tx_vote for the results
-    res.tx_vote = receipt['transactionHash'].hex()
-    tx_data = w3.eth.get_transaction(receipt['transactionHash'])
+        # 1. Ensure Deployer is delegated to itself (Done once per session)
+        # 2. Cast the vote
+        tx_func = dao_contract.functions.castVote(proposal_id, 1)
+        receipt = send_tx(deployer_acct, tx_func, deployer_nonce, simulate=False, records=res.votes)
+        deployer_nonce += 1
+
+        total_vote_gas += receipt['gasUsed']
+
+    # Record the last vote as the final tx_vote for the results
+    if receipt is not None:
+        res.tx_vote = receipt['transactionHash'].hex()
     
-    # Save total gas for all 42 votes (40 voters + 1 proposer + deployer)
+    # Save total gas for every vote cast (members + whales)
     res.gas_vote = total_vote_gas
-    print(f"  Total voting gas (42 votes): {total_vote_gas}")
+    print(f"  Total voting gas ({len(res.votes.gas_used)} votes): {total_vote_gas}")
     
     # 5. QUEUE
+    set_phase("wait")
     print("\n" + "="*50)
     print("!!! PRE-QUEUE VOTE AUDIT !!!")
     
@@ -634,7 +866,7 @@ def run_scenario_optimized(dao_addr: str, treasury_addr: str, proposer_nonce: in
         
         blocks_left = deadline_block - curr_block
         print(f"  > Waiting for deadline... {blocks_left} blocks remaining (~{blocks_left*12/60:.1f} mins)", end='\r')
-        time.sleep(30)
+        sleep(30, "wait_for_deadline")
 
     # --- BLOCKCHAIN VOTE CONFIRMATION ---
     # proposalVotes returns (againstVotes, forVotes, abstainVotes)
@@ -657,16 +889,10 @@ def run_scenario_optimized(dao_addr: str, treasury_addr: str, proposer_nonce: in
     total_supply = token.functions.totalSupply().call()
     print(f"DEBUG: Total Supply: {w3.from_wei(total_supply, 'ether')}")
 
-    # Check the actual success logic of the Governor
-    try:
-        # Some Governors have a 'proposalThreshold' or 'voteSucceeded' check
-        # Let's see if the total 'FOR' is at least 50% of supply
-        if vote_stats[1] < (total_supply / 2):
-            print(f"⚠️ THEORY: Success requires > 50% of Total Supply.")
-            print(f"   Required for 51%: {w3.from_wei(total_supply / 2, 'ether')}")
-            print(f"   Shortfall: {w3.from_wei((total_supply / 2) - vote_stats[1], 'ether')}")
-    except:
-        pass
+    # The Governor's actual success rule, read before voting (quorum_planner)
+    print(f"RULE: For > Against, quorum {w3.from_wei(rule.quorum, 'ether')} at the snapshot")
+    if not rule.reachable:
+        print(f"   Predicted before voting: {rule.note}")
 
     state = dao_contract.functions.state(proposal_id).call()
     # State Mapping: 3=Defeated, 4=Succeeded
@@ -693,41 +919,38 @@ def run_scenario_optimized(dao_addr: str, treasury_addr: str, proposer_nonce: in
     if not wait_for_proposal_succeeded(dao_contract, proposal_id):
         raise Exception("Recovery failed: Proposal not successful.")    
     
+    set_phase("queue")
     tx_func = dao_contract.functions.queue(targets, values, calldatas, description_hash)
-    receipt = send_tx(proposer_acct, tx_func, proposer_nonce)
+    receipt = send_tx(proposer_acct, tx_func, proposer_nonce, records=res.step("queue"))
     proposer_nonce += 1
     
     res.gas_queue = receipt['gasUsed']
     res.tx_queue = receipt['transactionHash'].hex()
+    record_events(res, receipt, "queue")
     tx_data = w3.eth.get_transaction(receipt['transactionHash'])
     
     # 6. EXECUTE
+    set_phase("wait")
     print("  [Optimized] Waiting for Timelock delay to pass (approx 130s)...")
-    time.sleep(130)
+    sleep(130, "timelock_delay")
 
+    set_phase("execute")
     tx_func = dao_contract.functions.execute(targets, values, calldatas, description_hash)
     
     # Anyone can call Governor.execute, so we use the Proposer's account
     proposer_nonce_updated = w3.eth.get_transaction_count(proposer_acct.address)
-    receipt = send_tx(proposer_acct, tx_func, proposer_nonce_updated)
+    receipt = send_tx(proposer_acct, tx_func, proposer_nonce_updated, records=res.step("execute"))
     
     res.gas_execute = receipt['gasUsed']
     res.tx_execute = receipt['transactionHash'].hex()
+    record_events(res, receipt, "execute")
     tx_data = w3.eth.get_transaction(receipt['transactionHash'])
     return res, proposer_nonce
 
 # --- MAIN RUNNER ---
-def main():
+def delegate_whale_power():
+    """Self-delegates the deployer's balance on both governance tokens (the 'Silent Majority')."""
     deployer_nonce = w3.eth.get_transaction_count(deployer_addr)
-    if not w3.is_connected():
-        print("Error: Could not connect to RPC URL.")
-        return
-
-    # Nonce for the proposer & deloyer accounts
-    proposer_nonce_vul = w3.eth.get_transaction_count(Account.from_key(VUL_PROPOSER_KEY).address) 
-    proposer_nonce_opt = w3.eth.get_transaction_count(Account.from_key(OPT_PROPOSER_KEY).address)
-    
-    # --- GLOBAL DEPLOYER DELEGATION ---
     # Using the two token addresses provided
     GOV_TOKENS = {
         "VUL_TOKEN": os.getenv("VUL_TOKEN_ADDR"),
@@ -761,7 +984,7 @@ def main():
                 deployer_nonce += 1
                 print(f"  > Success! Hash: {receipt['transactionHash'].hex()}")
                 # Brief pause to ensure the state change is indexed before we propose
-                time.sleep(2)
+                sleep(2, "post_delegate")
             else:
                 print(f"Deployer already holds voting power for {name}. Skipping.")
         except Exception as e:
@@ -775,29 +998,79 @@ def main():
                 print(f"❌ Critical failure on {name}: {e2}")
     print("--- All Tokens Active. Deployer now controls the 'Silent Majority'. ---\n")
 
+def start_scenario(fixtures, name: str) -> None:
+    """Reverts to the post-setup snapshot (FIXTURE_MODE) so the scenario sees no leftover state."""
+    global deployer_nonce
+    if fixtures is not None:
+        print(f"[Fixture] Reset to setup state in {fixtures.reset('scenarios'):.0f} ms")
+    deployer_nonce = w3.eth.get_transaction_count(deployer_addr) # rewound by a revert, advanced by the delegation
+    rpc_recorder.set_step(scenario=name)
+
+def finish_scenario(res: ScenarioResult, fixtures=None) -> None:
+    """Confirmation times need CONFIRMATION_DEPTH blocks past each inclusion; resolved before any revert."""
+    for records in res.records().values():
+        inclusion.confirm_records(records)
+    if fixtures is not None:
+        # The next reset reverts this tx away: trace it now instead of in the batch after all scenarios
+        res.state_diff = collect_state_diffs(w3, traffic, {"tx": res.executing_tx})["tx"]
+
+def main():
+    if not w3.is_connected():
+        print("Error: Could not connect to RPC URL.")
+        return
+
+    # --- GLOBAL DEPLOYER DELEGATION ---
+    # FIXTURE_MODE (local node): the delegated state is snapshotted once and every scenario starts from it
+    fixtures = None
+    if FIXTURE_MODE:
+        fixtures = StateFixtures(w3, FIXTURE_STATE_DIR if FIXTURE_MODE == "dump" else None)
+        fixtures.on_reset(inclusion.forget_blocks)
+        fixtures.prepare("scenarios", setup=delegate_whale_power)
+    else:
+        delegate_whale_power()
+
+    # Nonce for the proposer accounts
+    proposer_nonce_vul = w3.eth.get_transaction_count(Account.from_key(VUL_PROPOSER_KEY).address) 
+    proposer_nonce_opt = w3.eth.get_transaction_count(Account.from_key(OPT_PROPOSER_KEY).address)
+
     print(f"\n--- RUNNING SCENARIOS WITH {VOTER_COUNT} VOTERS ---")
 
     # --- RUN V1: Vulnerable DAO + Basic Treasury ---
 #    print("\n--- Running V1 (Vulnerable DAO + Basic Treasury) ---")
+#    start_scenario(fixtures, "V1")
 #    v1_res, proposer_nonce_vul = run_scenario_vulnerable(V1_DAO_ADDR, V1_TREASURY_ADDR, proposer_nonce_vul)
+#    finish_scenario(v1_res, fixtures)
 
     # --- RUN V2: Vulnerable DAO + Secure Treasury ---
 #    print("\n--- Running V2 (Vulnerable DAO + Secure Treasury) ---")
+#    start_scenario(fixtures, "V2")
 #    proposer_acct = Account.from_key(VUL_PROPOSER_KEY)
 #    proposer_nonce_vul = w3.eth.get_transaction_count(proposer_acct.address)
 #    v2_res, proposer_nonce_vul = run_scenario_vulnerable(V2_DAO_ADDR, V2_TREASURY_ADDR, proposer_nonce_vul)
+#    finish_scenario(v2_res, fixtures)
 
     # --- RUN V3: Optimized DAO + Basic Treasury ---
     print("\n--- Running V3 (Optimized DAO + Basic Treasury) ---")
-    v3_res, proposer_nonce_opt = run_scenario_optimized(V3_DAO_ADDR, V3_TREASURY_ADDR, proposer_nonce_opt)
+    start_scenario(fixtures, "V3")
+    with tracer.scenario("V3"):
+        v3_res, proposer_nonce_opt = run_scenario_optimized(V3_DAO_ADDR, V3_TREASURY_ADDR, proposer_nonce_opt)
+    finish_scenario(v3_res, fixtures)
     
     # --- RUN V4: Optimized DAO + Secure Treasury (The Target) ---
     print("\n--- Running V4 (Optimized DAO + Secure Treasury) ---")
+    start_scenario(fixtures, "V4")
     proposer_acct = Account.from_key(OPT_PROPOSER_KEY)
     proposer_nonce_opt = w3.eth.get_transaction_count(proposer_acct.address)
-    v4_res, _ = run_scenario_optimized(V4_DAO_ADDR, V4_TREASURY_ADDR, proposer_nonce_opt)
-    
-    
+    with tracer.scenario("V4"):
+        v4_res, _ = run_scenario_optimized(V4_DAO_ADDR, V4_TREASURY_ADDR, proposer_nonce_opt)
+    finish_scenario(v4_res, fixtures)
+
+    # State diffs of every executing tx, traced in parallel (one debug_traceTransaction each)
+    scenarios = {"V3": v3_res, "V4": v4_res}
+    pending = {name: res.executing_tx for name, res in scenarios.items() if res.state_diff is None}
+    for name, diff in collect_state_diffs(w3, traffic, pending).items():
+        scenarios[name].state_diff = diff
+
     # --- LOG COMPARISON MATRIX ---
 
     # V1 vs V4: Full Stack Comparison (Baseline vs Target)
@@ -807,10 +1080,31 @@ def main():
 #    log_results("V1 vs V3 (DAO-Only Benefit: Vulnerable vs Optimized Token/Voting)", v1_res, v3_res)
 
     # V2 vs V4: Treasury/Execution Divergence (Vulnerable DAO / Secure Treasury)
-    log_results("V2 vs V4 (Secure Treasury Comparison)", v2_res, v4_res)
+#    log_results("V2 vs V4 (Secure Treasury Comparison)", v2_res, v4_res)
 
     # V3 vs V4: Treasury Optimization Benefit (Optimized DAO / Optimized Treasury)
     log_results("V3 vs V4 (Execution Optimization Benefit: TreasuryBasic vs TreasurySecure)", v3_res, v4_res)
+    print(f"\n[GAS] {gas_estimator.summary()}")
+    print(f"[RPC] {traffic.summary()}")
+
+    # --- RPC ACCOUNTING ---
+    print("\n# --- RPC CALLS PER STEP ---")
+    print(rpc_recorder.summary_table())
+    os.makedirs(REPORT_DIR, exist_ok=True)
+    rpc_recorder.save(f"{REPORT_DIR}/rpc_stats_{time.strftime('%Y%m%d_%H%M%S')}.json")
+
+    # Per-tx detail (columnar, gas + inclusion timings) per lifecycle step for every scenario that ran
+    txs_path = f"{REPORT_DIR}/txs_{time.strftime('%Y%m%d_%H%M%S')}.json"
+    with open(txs_path, "w") as f:
+        json.dump({name: {step: rs.to_dict() for step, rs in res.records().items()}
+                   for name, res in (("V3", v3_res), ("V4", v4_res))}, f)
+    print(f"Saved per-tx records: {txs_path}")
+
+    # --- WALL-CLOCK BREAKDOWN (TRACE_FILE set) ---
+    if tracer.enabled:
+        print("\n# --- TIME PER PHASE (RPC / WAIT / PYTHON) ---")
+        print(tracer.summary_table())
+        tracer.save(TRACE_FILE.replace("{ts}", time.strftime('%Y%m%d_%H%M%S')))
 
 if __name__ == "__main__":
     main()
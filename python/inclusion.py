@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+inclusion.py
+
+Time-to-inclusion tracking for every transaction the harness sends.
+
+Each transaction gets four timestamps, all relative to submission:
+- pending:    first time eth_getTransactionByHash returns it (node has it)
+- receipt:    first time eth_getTransactionReceipt returns it (local view)
+- inclusion:  timestamp of the block that includes it
+- confirmed:  timestamp of the block CONFIRMATION_DEPTH-1 blocks later
+
+Inclusion and confirmation come from block timestamps (1 s resolution, node
+clock), so they are clamped at 0. Confirmations are resolved lazily
+(confirm / confirm_records) so senders don't wait extra blocks per tx.
+Polling does not sleep while replaying an RPC cassette (see cassette.py).
+
+Usage:
+    tracker = InclusionTracker(w3)
+    tx_hash, timing = tracker.submit(signed.raw_transaction)
+    receipt = tracker.wait(tx_hash, timing)
+    records.add(receipt, timing=tracker.pop(tx_hash))
+    tracker.confirm_records(records)          # before reporting
+"""
+
+import os
+import time
+import threading
+from dataclasses import dataclass, asdict
+from typing import Any, Dict, Optional, Tuple
+from web3 import Web3
+from web3.exceptions import TransactionNotFound, TimeExhausted
+from tx_records import UNRESOLVED
+from cassette import is_replay
+
+INCLUSION_POLL_INTERVAL = float(os.getenv("INCLUSION_POLL_INTERVAL", "0.5"))
+INCLUSION_TIMEOUT = float(os.getenv("INCLUSION_TIMEOUT", "600"))
+CONFIRMATION_DEPTH = int(os.getenv("CONFIRMATION_DEPTH", "2"))   # blocks, counting the inclusion block
+
+
+@dataclass
+class TxTiming:
+    submitted: float                 # unix time just before eth_sendRawTransaction
+    pending_ms: float = UNRESOLVED
+    receipt_ms: float = UNRESOLVED
+    block: int = 0
+    inclusion_ms: float = UNRESOLVED
+    confirm_ms: float = UNRESOLVED
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+def _hex(tx_hash: Any) -> str:
+    return tx_hash if isinstance(tx_hash, str) else Web3.to_hex(tx_hash)
+
+
+def _since_ms(submitted: float, at: float) -> float:
+    return max(0.0, (at - submitted) * 1000)
+
+
+class InclusionTracker:
+    def __init__(self, w3: Web3, poll_interval: float = INCLUSION_POLL_INTERVAL,
+                 timeout: float = INCLUSION_TIMEOUT, depth: int = CONFIRMATION_DEPTH):
+        self.w3 = w3
+        self.poll_interval = 0.0 if is_replay() else poll_interval
+        self.timeout = timeout
+        self.depth = max(1, depth)
+        self.timings: Dict[str, TxTiming] = {}   # tx hash -> timing, until popped by the recorder
+        self._block_ts: Dict[int, int] = {}
+        self._lock = threading.Lock()
+
+    # --- BLOCKS ---
+    def block_timestamp(self, number: int) -> int:
+        with self._lock:
+            ts = self._block_ts.get(number)
+        if ts is None:
+            ts = self.w3.eth.get_block(number)["timestamp"]
+            with self._lock:
+                self._block_ts[number] = ts
+        return ts
+
+    def forget_blocks(self) -> None:
+        """Drops cached block timestamps (after an evm_revert block numbers are reused)."""
+        with self._lock:
+            self._block_ts.clear()
+
+    # --- SEND / WAIT ---
+    def submit(self, raw_tx: bytes) -> Tuple[str, TxTiming]:
+        timing = TxTiming(submitted=time.time())
+        tx_hash = _hex(self.w3.eth.send_raw_transaction(raw_tx))
+        with self._lock:
+            self.timings[tx_hash] = timing
+        return tx_hash, timing
+
+    def wait(self, tx_hash: Any, timing: Optional[TxTiming] = None) -> Any:
+        """Polls until the receipt exists, stamping first-seen-pending, receipt and inclusion times."""
+        tx_hash = _hex(tx_hash)
+        if timing is None:
+            with self._lock:
+                timing = self.timings.setdefault(tx_hash, TxTiming(submitted=time.time()))
+        deadline = time.time() + self.timeout
+        while True:
+            if timing.pending_ms == UNRESOLVED:
+                try:
+                    self.w3.eth.get_transaction(tx_hash)
+                    timing.pending_ms = _since_ms(timing.submitted, time.time())
+                except TransactionNotFound:
+                    pass
+            try:
+                receipt = self.w3.eth.get_transaction_receipt(tx_hash)
+            except TransactionNotFound:
+                receipt = None
+            if receipt is not None:
+                break
+            if time.time() > deadline:
+                raise TimeExhausted(f"Transaction {tx_hash} not included after {self.timeout:.0f}s")
+            time.sleep(self.poll_interval)
+
+        timing.receipt_ms = _since_ms(timing.submitted, time.time())
+        if timing.pending_ms == UNRESOLVED:
+            timing.pending_ms = timing.receipt_ms
+        timing.block = receipt["blockNumber"]
+        timing.inclusion_ms = _since_ms(timing.submitted, self.block_timestamp(timing.block))
+        if self.depth == 1:
+            timing.confirm_ms = timing.inclusion_ms
+        return receipt
+
+    def pop(self, tx_hash: Any) -> Optional[TxTiming]:
+        with self._lock:
+            return self.timings.pop(_hex(tx_hash), None)
+
+    # --- CONFIRMATIONS ---
+    def confirm(self, timing: TxTiming, wait: bool = True) -> float:
+        """Resolves confirm_ms once the chain is depth blocks past inclusion (waits unless wait=False)."""
+        if timing.confirm_ms != UNRESOLVED or not timing.block:
+            return timing.confirm_ms
+        target = timing.block + self.depth - 1
+        while self.w3.eth.block_number < target:
+            if not wait:
+                return UNRESOLVED
+            time.sleep(self.poll_interval)
+        timing.confirm_ms = _since_ms(timing.submitted, self.block_timestamp(target))
+        return timing.confirm_ms
+
+    def confirm_records(self, records) -> None:
+        """Fills the confirm_ms column of a TxRecordSet (see tx_records.py)."""
+        for i in range(len(records)):
+            if records.confirm_ms[i] != UNRESOLVED or not records.submitted[i]:
+                continue
+            timing = TxTiming(submitted=records.submitted[i], block=records.block[i])
+            records.confirm_ms[i] = self.confirm(timing)
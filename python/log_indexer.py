@@ -0,0 +1,319 @@
+#!/usr/bin/env python3
+"""
+log_indexer.py
+
+Backfills governance events (ProposalCreated, VoteCast, Executed,
+DelegateChanged, timelock CallScheduled/CallExecuted, ...) for every DAO,
+token, treasury and timelock address into a local SQLite database, then
+follows new blocks incrementally.
+
+- eth_getLogs runs over block ranges in parallel through the pool's traffic
+  controller; a range the provider rejects as too large is split in half and
+  the chunk size adapts for the following ranges
+- logs are decoded with the shared EventRegistry (see event_decoder.py)
+- receipts (gas) and block timestamps (latency) of indexed txs are stored
+  alongside, so turnout / gas / latency questions are local queries
+
+Usage:
+    python log_indexer.py                                # backfill from the deploy blocks
+    python log_indexer.py --from-block 9500000          # backfill from a given block
+    python log_indexer.py --follow                       # resume + follow
+    python log_indexer.py --report                       # turnout / gas per proposal
+"""
+
+import os
+import json
+import time
+import sqlite3
+import argparse
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+from dotenv import load_dotenv
+from web3 import Web3
+from rpc_pool import make_web3
+from event_decoder import EventRegistry
+from deployments import DeploymentRegistry
+
+load_dotenv()
+
+INDEXER_DB = os.getenv("INDEXER_DB", "reports/events.db")
+INDEXER_CHUNK = int(os.getenv("INDEXER_CHUNK", "2000"))        # initial blocks per eth_getLogs
+INDEXER_MAX_CHUNK = int(os.getenv("INDEXER_MAX_CHUNK", "50000"))
+INDEXER_CONFIRMATIONS = int(os.getenv("INDEXER_CONFIRMATIONS", "2"))
+FOLLOW_INTERVAL = 12   # seconds between head polls (one slot)
+
+INDEXED_EVENTS = {
+    "ProposalCreated", "VoteCast", "VoteCastWithParams", "ProposalQueued", "ProposalExecuted",
+    "ProposalCanceled", "Executed", "TargetAllowed", "DelegateChanged", "DelegateVotesChanged",
+    "CallScheduled", "CallExecuted", "Cancelled",
+}
+
+# Provider messages for "this range returns too much / spans too many blocks"
+RANGE_ERROR_MARKERS = (
+    "more than",
+    "too many",
+    "range is too",
+    "block range",
+    "range too large",
+    "response size",
+    "limit exceeded",
+    "query timeout",
+)
+
+BROADCAST_STACKS = ("V1", "V2", "V3", "V4", "DeployVulnerableToken", "DeployMembershipToken")
+
+ADDRESS_ENV_VARS = (
+    "V1_DAO_ADDR", "V2_DAO_ADDR", "V3_DAO_ADDR", "V4_DAO_ADDR",
+    "V1_TREASURY_ADDR", "V2_TREASURY_ADDR", "V3_TREASURY_ADDR", "V4_TREASURY_ADDR",
+    "VUL_TOKEN_ADDR", "OPT_TOKEN_ADDR", "TIMELOCK_ADDR",
+)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS events (
+    tx_hash     TEXT    NOT NULL,
+    log_index   INTEGER NOT NULL,
+    block       INTEGER NOT NULL,
+    address     TEXT    NOT NULL,
+    contract    TEXT    NOT NULL,
+    name        TEXT    NOT NULL,
+    proposal_id TEXT,
+    account     TEXT,
+    args        TEXT    NOT NULL,
+    PRIMARY KEY (tx_hash, log_index)
+);
+CREATE INDEX IF NOT EXISTS events_name_proposal ON events (name, proposal_id);
+CREATE INDEX IF NOT EXISTS events_address_block ON events (address, block);
+CREATE TABLE IF NOT EXISTS txs (
+    tx_hash   TEXT PRIMARY KEY,
+    sender    TEXT,
+    block     INTEGER,
+    gas_used  INTEGER,
+    gas_price INTEGER,
+    status    INTEGER
+);
+CREATE TABLE IF NOT EXISTS blocks (
+    number    INTEGER PRIMARY KEY,
+    timestamp INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key   TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+
+def is_range_error(error: Any) -> bool:
+    msg = str(error).lower()
+    return any(marker in msg for marker in RANGE_ERROR_MARKERS)
+
+
+def indexed_addresses(deployments: Optional[DeploymentRegistry] = None) -> List[str]:
+    """
+    Contract addresses from the harness env plus INDEXER_ADDRESSES (comma-separated)
+    and every contract of the latest broadcast run of each harness stack.
+    """
+    raw = [os.getenv(v) for v in ADDRESS_ENV_VARS] + (os.getenv("INDEXER_ADDRESSES") or "").split(",")
+    if deployments is not None:
+        for name in BROADCAST_STACKS:
+            try:
+                raw += [d.address for d in deployments.stack(name).contracts.values()]
+            except KeyError:
+                continue
+    seen = []
+    for addr in raw:
+        if addr and addr.strip() and Web3.to_checksum_address(addr.strip()) not in seen:
+            seen.append(Web3.to_checksum_address(addr.strip()))
+    return seen
+
+
+class LogIndexer:
+    def __init__(self, w3: Web3, registry: EventRegistry, addresses: List[str], db_path: str = INDEXER_DB,
+                 chunk: int = INDEXER_CHUNK):
+        if not addresses:
+            raise ValueError("No contract addresses to index. Set the *_ADDR env vars or INDEXER_ADDRESSES.")
+        self.w3 = w3
+        self.registry = registry
+        self.addresses = addresses
+        self.topics = sorted({Web3.to_hex(topic0) for (topic0, _), d in registry.decoders.items()
+                              if d.name in INDEXED_EVENTS})
+        if not self.topics:
+            raise ValueError("No indexed events in the registry. Build the artifacts (forge build) first.")
+        self.chunk = chunk
+        self.chunk_limit = INDEXER_MAX_CHUNK   # lowered to just below the smallest rejected range
+        self._chunk_lock = threading.Lock()
+        os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+        self.db = sqlite3.connect(db_path)
+        self.db.executescript(SCHEMA)
+
+    # --- CURSOR ---
+    def cursor(self) -> Optional[int]:
+        row = self.db.execute("SELECT value FROM meta WHERE key = 'last_block'").fetchone()
+        return int(row[0]) if row else None
+
+    def _set_cursor(self, block: int) -> None:
+        self.db.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('last_block', ?)", (str(block),))
+
+    # --- FETCHING ---
+    def _adapt(self, succeeded: int = 0, failed: int = 0) -> None:
+        with self._chunk_lock:
+            if failed:
+                self.chunk_limit = min(self.chunk_limit, failed - 1)
+                self.chunk = max(1, min(self.chunk, failed // 2))
+            elif succeeded >= self.chunk:
+                self.chunk = max(1, min(self.chunk_limit, self.chunk * 2))
+
+    def _fetch_range(self, span: Tuple[int, int]) -> List[Any]:
+        """eth_getLogs for [start, end]; halves the range while the provider says it is too large."""
+        start, end = span
+        try:
+            logs = self.w3.eth.get_logs({
+                "fromBlock": start, "toBlock": end, "address": self.addresses, "topics": [self.topics],
+            })
+        except Exception as e:
+            if not is_range_error(e) or start == end:
+                raise
+            self._adapt(failed=end - start + 1)
+            mid = (start + end) // 2
+            return self._fetch_range((start, mid)) + self._fetch_range((mid + 1, end))
+        self._adapt(succeeded=end - start + 1)
+        return list(logs)
+
+    def _spans(self, start: int, end: int, count: int) -> List[Tuple[int, int]]:
+        spans = []
+        while start <= end and len(spans) < count:
+            stop = min(end, start + self.chunk - 1)
+            spans.append((start, stop))
+            start = stop + 1
+        return spans
+
+    # --- STORAGE ---
+    def _store(self, logs: List[Any]) -> int:
+        events = self.registry.decode_logs(logs)
+        rows = []
+        for ev in events:
+            args = ev.to_dict()["args"]
+            proposal_id = args.get("proposalId", args.get("id"))
+            account = args.get("voter") or args.get("delegator") or args.get("target")
+            rows.append((ev.tx_hash, ev.log_index, ev.block_number, ev.address, ev.contract, ev.name,
+                         str(proposal_id) if proposal_id is not None else None, account,
+                         json.dumps(args, default=str)))
+        self.db.executemany("INSERT OR IGNORE INTO events VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+        self._store_context({r[0] for r in rows}, {r[2] for r in rows})
+        return len(rows)
+
+    def _store_context(self, tx_hashes: set, blocks: set) -> None:
+        """Receipts and block timestamps for newly indexed txs, fetched concurrently."""
+        known_txs = {r[0] for r in self.db.execute("SELECT tx_hash FROM txs")}
+        known_blocks = {r[0] for r in self.db.execute("SELECT number FROM blocks")}
+        traffic = self.w3.provider.traffic
+
+        receipts = traffic.map(self.w3.eth.get_transaction_receipt, sorted(tx_hashes - known_txs))
+        self.db.executemany("INSERT OR IGNORE INTO txs VALUES (?, ?, ?, ?, ?, ?)", [
+            (Web3.to_hex(r["transactionHash"]), r["from"], r["blockNumber"], r["gasUsed"],
+             r.get("effectiveGasPrice", 0), r["status"])
+            for r in receipts if not isinstance(r, Exception)
+        ])
+        headers = traffic.map(lambda n: self.w3.eth.get_block(n), sorted(blocks - known_blocks))
+        self.db.executemany("INSERT OR IGNORE INTO blocks VALUES (?, ?)", [
+            (b["number"], b["timestamp"]) for b in headers if not isinstance(b, Exception)
+        ])
+
+    # --- DRIVER ---
+    def index(self, start: int, end: int) -> int:
+        """Indexes [start, end] in parallel batches; the cursor only advances over completed batches."""
+        total = 0
+        traffic = self.w3.provider.traffic
+        while start <= end:
+            spans = self._spans(start, end, max(1, traffic.max_window))
+            results = traffic.map(self._fetch_range, spans)
+            done_until = start - 1
+            logs = []
+            for span, result in zip(spans, results):
+                if isinstance(result, Exception):
+                    print(f"  [Indexer] blocks {span[0]}-{span[1]} failed: {result}")
+                    break
+                logs.extend(result)
+                done_until = span[1]
+            if done_until < start:
+                raise RuntimeError(f"Indexer stalled at block {start}")
+            stored = self._store(logs)
+            self._set_cursor(done_until)
+            self.db.commit()
+            total += stored
+            print(f"  [Indexer] {start}-{done_until}: {stored} event(s), chunk now {self.chunk} blocks")
+            start = done_until + 1
+        return total
+
+    def head(self) -> int:
+        return self.w3.eth.block_number - INDEXER_CONFIRMATIONS
+
+    def follow(self, start: int) -> None:
+        print(f"  [Indexer] following from block {start} (Ctrl+C to stop)")
+        while True:
+            end = self.head()
+            if end >= start:
+                self.index(start, end)
+                start = end + 1
+            time.sleep(FOLLOW_INTERVAL)
+
+    # --- LOCAL QUERIES ---
+    def report(self) -> List[Dict[str, Any]]:
+        """Turnout, vote gas and proposal-to-execution latency per proposal."""
+        rows = self.db.execute("""
+            SELECT p.address, p.proposal_id, pb.timestamp,
+                   (SELECT COUNT(DISTINCT v.account) FROM events v
+                     WHERE v.name IN ('VoteCast', 'VoteCastWithParams')
+                       AND v.address = p.address AND v.proposal_id = p.proposal_id),
+                   (SELECT COALESCE(SUM(t.gas_used), 0) FROM events v JOIN txs t ON t.tx_hash = v.tx_hash
+                     WHERE v.name IN ('VoteCast', 'VoteCastWithParams')
+                       AND v.address = p.address AND v.proposal_id = p.proposal_id),
+                   (SELECT MIN(eb.timestamp) FROM events e JOIN blocks eb ON eb.number = e.block
+                     WHERE e.name IN ('Executed', 'ProposalExecuted')
+                       AND e.address = p.address AND e.proposal_id = p.proposal_id)
+            FROM events p LEFT JOIN blocks pb ON pb.number = p.block
+            WHERE p.name = 'ProposalCreated'
+            ORDER BY p.block
+        """).fetchall()
+        return [
+            {"dao": dao, "proposal_id": pid, "voters": voters, "vote_gas": vote_gas,
+             "seconds_to_execute": (executed - created) if executed and created else None}
+            for dao, pid, created, voters, vote_gas, executed in rows
+        ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Index DAO / token / treasury / timelock events into SQLite.")
+    parser.add_argument("--from-block", type=int, help="first block to backfill (default: resume from cursor)")
+    parser.add_argument("--to-block", type=int, help="last block to backfill (default: head - confirmations)")
+    parser.add_argument("--follow", action="store_true", help="keep indexing new blocks after the backfill")
+    parser.add_argument("--report", action="store_true", help="print per-proposal turnout / gas / latency")
+    parser.add_argument("--db", default=INDEXER_DB)
+    args = parser.parse_args()
+
+    w3 = make_web3()
+    deployments = DeploymentRegistry()
+    indexer = LogIndexer(w3, EventRegistry.from_artifacts(), indexed_addresses(deployments), db_path=args.db)
+
+    if args.report:
+        for row in indexer.report():
+            print(row)
+        return
+
+    cursor = indexer.cursor()
+    start = args.from_block if args.from_block is not None else (cursor + 1 if cursor is not None else None)
+    if start is None:
+        # Nothing can predate the oldest indexed contract's deployment
+        start = deployments.deploy_block(indexer.addresses)
+    if start is None:
+        raise SystemExit("No cursor or known deploy block: pass --from-block (e.g. the deployment block).")
+    end = args.to_block if args.to_block is not None else indexer.head()
+
+    print(f"Indexing {len(indexer.addresses)} address(es), {len(indexer.topics)} event topic(s) into {args.db}")
+    total = indexer.index(start, end)
+    print(f"Backfill done: {total} event(s) up to block {end}. {w3.provider.traffic.summary()}")
+    if args.follow:
+        indexer.follow(end + 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+"""
+multi_action_bench.py
+
+Proposal cost as a function of action count, on anvil.
+
+DAOOptimized._executeOperations loops over targets, and the timelock
+schedules a proposal as one batch, but every harness scenario proposes a
+single action. This benchmark runs the full lifecycle for proposals with
+N = 1..256 payment actions against both treasury variants. On the proposal
+path each treasury is owned by the DAO itself (DAOOptimized._executeOperations
+calls targets directly, not through the timelock):
+- TreasuryBasic:  N x executePayment(recipient_i, PAYMENT)
+- TreasurySecure: N x execute(recipient_i, PAYMENT, ""); allowedTargets is
+  written with anvil_setStorageAt from the storage layout instead of N
+  governance proposals
+
+Measured per N: propose calldata bytes, propose / queue (timelock
+scheduleBatch via _queueOperations) / execute gas, plus the timelock's own
+batch cost: scheduleBatch + executeBatch of the same N calls sent directly
+by the deployer, against a second instance of each treasury owned by the
+timelock. Each metric gets a least-squares fit base + per_action * N.
+
+The stack is deployed once and snapshotted; every (variant, N) point starts
+from that snapshot (fixtures.py). Blocks keep the raised setup gas limit:
+this measures gas, not throughput. The quorum fraction is 0 (see
+proposal_load.py for why DAOOptimized cannot reach a non-zero quorum).
+
+Usage (anvil running, `forge build` done):
+    python multi_action_bench.py --actions 1,2,4,8,16,32,64,128,256
+"""
+
+import os
+import sys
+import time
+import json
+import argparse
+from dataclasses import dataclass, asdict, field
+from typing import Any, Dict, List
+from web3 import Web3
+from rpc_pool import make_web3
+from traffic import shared_controller
+from proposal_ids import governor_proposal_id, description_hash
+from state_seeding import StorageLayout, mapping_slot, word
+from scale_sim import (
+    LocalChain, deploy_optimized_stack, load_artifact, synthetic_members, linear_fit,
+    SIM_RPC_URL, MIN_DELAY, VOTING_DELAY, VOTING_PERIOD, PAYMENT, REPORT_DIR,
+)
+
+BENCH_TREASURY_BALANCE = Web3.to_wei(100, "ether")
+GAS_HEADROOM = 1.3
+METRICS = ("calldata_bytes", "propose", "queue", "execute", "timelock_schedule", "timelock_execute")
+ZERO_BYTES32 = b"\0" * 32
+
+
+@dataclass
+class ActionPoint:
+    variant: str
+    actions: int
+    calldata_bytes: int = 0
+    propose: int = 0
+    queue: int = 0
+    execute: int = 0
+    timelock_schedule: int = 0
+    timelock_execute: int = 0
+    executed: bool = False
+    error: str = ""
+
+
+@dataclass
+class Bench:
+    """The deployed contracts every point reuses (restored from the snapshot)."""
+    dao: Any
+    timelock: Any
+    basic_dao: Any         # owner = DAO: proposal path
+    basic_timelock: Any    # owner = timelock: direct timelock batch path
+    secure_dao: Any        # governance = DAO: proposal path
+    secure_timelock: Any   # governance = timelock: direct timelock batch path
+    voter: str
+    recipients: List[str] = field(default_factory=list)
+
+
+def recipients(count: int) -> List[str]:
+    return [Web3.to_checksum_address(Web3.keccak(text=f"multi-action-recipient:{i}")[12:]) for i in range(count)]
+
+
+# --- SETUP ---
+def deploy_bench(chain: LocalChain, max_actions: int) -> Bench:
+    voter = synthetic_members(1, "multi-action")[0]
+    stack = deploy_optimized_stack(chain, [voter], quorum_numerator=0)   # stack.treasury is owned by the DAO
+    basic_abi, basic_bin = load_artifact("TreasuryBasic")
+    basic_timelock, _ = chain.deploy(basic_abi, basic_bin, stack.timelock.address)
+    secure_abi, secure_bin = load_artifact("TreasurySecure")
+    secure_dao, _ = chain.deploy(secure_abi, secure_bin, stack.dao.address)
+    secure_timelock, _ = chain.deploy(secure_abi, secure_bin, stack.timelock.address)
+    treasuries = [stack.treasury, basic_timelock, secure_dao, secure_timelock]
+    chain.fund([t.address for t in treasuries], BENCH_TREASURY_BALANCE)
+
+    bench = Bench(stack.dao, stack.timelock, *treasuries, voter, recipients(max_actions))
+    allowed = StorageLayout.from_artifact("TreasurySecure").slot("allowedTargets")
+    writes = [(t.address, mapping_slot(r, allowed)) for t in (secure_dao, secure_timelock) for r in bench.recipients]
+    for r in chain.traffic.map(lambda w: chain.rpc("anvil_setStorageAt", w[0], word(w[1]), word(1)), writes):
+        if isinstance(r, Exception):
+            raise r
+
+    # Deployer (timelock admin) may schedule batches directly; executors are open (address 0)
+    role = stack.timelock.functions.PROPOSER_ROLE().call()
+    chain.send(chain.deployer, stack.timelock.functions.grantRole(role, chain.deployer))
+    return bench
+
+
+def actions_for(bench: Bench, variant: str, n: int, via_timelock: bool = False):
+    """(targets, values, calldatas) of n payments through the given treasury variant."""
+    if variant == "TreasuryBasic":
+        t = bench.basic_timelock if via_timelock else bench.basic_dao
+        calls = [t.encode_abi("executePayment", args=[r, PAYMENT]) for r in bench.recipients[:n]]
+    else:
+        t = bench.secure_timelock if via_timelock else bench.secure_dao
+        calls = [t.encode_abi("execute", args=[r, PAYMENT, b""]) for r in bench.recipients[:n]]
+    return [t.address] * n, [0] * n, calls
+
+
+# --- MEASUREMENT ---
+def send(chain: LocalChain, sender: str, tx_func) -> Any:
+    return chain.send(sender, tx_func, int(tx_func.estimate_gas({"from": sender}) * GAS_HEADROOM))
+
+
+def measure(chain: LocalChain, bench: Bench, variant: str, n: int) -> ActionPoint:
+    point = ActionPoint(variant, n)
+    dao = bench.dao
+    targets, values, calldatas = actions_for(bench, variant, n)
+    description = f"multi-action {variant} x{n}"
+    proposal_id = governor_proposal_id(targets, values, calldatas, description)
+    propose = dao.functions.propose(targets, values, calldatas, description)
+    point.calldata_bytes = len(Web3.to_bytes(hexstr=dao.encode_abi("propose", args=[targets, values, calldatas, description])))
+
+    point.propose = send(chain, chain.deployer, propose)["gasUsed"]
+    chain.rpc("anvil_mine", Web3.to_hex(VOTING_DELAY + 1))
+    send(chain, bench.voter, dao.functions.castVote(proposal_id, 1))
+    chain.rpc("anvil_mine", Web3.to_hex(VOTING_PERIOD + 1))
+    desc_hash = description_hash(description)
+    point.queue = send(chain, chain.deployer, dao.functions.queue(targets, values, calldatas, desc_hash))["gasUsed"]
+    chain.rpc("evm_increaseTime", MIN_DELAY + 1)
+    chain.rpc("evm_mine")
+    point.execute = send(chain, chain.deployer, dao.functions.execute(targets, values, calldatas, desc_hash))["gasUsed"]
+    point.executed = dao.functions.state(proposal_id).call() == 7   # ProposalState.Executed
+
+    # The timelock's own batch cost for the same N calls
+    targets, values, calldatas = actions_for(bench, variant, n, via_timelock=True)
+    salt = Web3.keccak(text=description)
+    tl = bench.timelock.functions
+    point.timelock_schedule = send(chain, chain.deployer, tl.scheduleBatch(targets, values, calldatas, ZERO_BYTES32, salt, MIN_DELAY))["gasUsed"]
+    chain.rpc("evm_increaseTime", MIN_DELAY + 1)
+    chain.rpc("evm_mine")
+    point.timelock_execute = send(chain, chain.deployer, tl.executeBatch(targets, values, calldatas, ZERO_BYTES32, salt))["gasUsed"]
+    return point
+
+
+def fits(points: List[ActionPoint]) -> Dict[str, Dict[str, Dict[str, float]]]:
+    """Per variant and metric: base + per_action * N."""
+    out: Dict[str, Dict[str, Dict[str, float]]] = {}
+    for variant in sorted({p.variant for p in points}):
+        rows = [p for p in points if p.variant == variant and not p.error]
+        if len(rows) < 2:
+            continue
+        for metric in METRICS:
+            base, slope = linear_fit([(p.actions, getattr(p, metric)) for p in rows])
+            out.setdefault(variant, {})[metric] = {"base": round(base), "per_action": round(slope, 1)}
+    return out
+
+
+# --- REPORTING ---
+def log_results(points: List[ActionPoint], fitted: Dict[str, Dict[str, Any]]) -> None:
+    print("\n" + "=" * 112)
+    print(f"{'variant':<16}{'N':>5}{'calldata B':>12}{'propose':>12}{'queue':>12}{'execute':>12}"
+          f"{'TL schedule':>13}{'TL execute':>13}{'executed':>10}")
+    print("-" * 112)
+    for p in points:
+        if p.error:
+            print(f"{p.variant:<16}{p.actions:>5}  ! {p.error}")
+            continue
+        print(f"{p.variant:<16}{p.actions:>5}{p.calldata_bytes:>12,}{p.propose:>12,}{p.queue:>12,}{p.execute:>12,}"
+              f"{p.timelock_schedule:>13,}{p.timelock_execute:>13,}{str(p.executed):>10}")
+    for variant, metrics in fitted.items():
+        print("-" * 112)
+        print(f"{variant} marginal cost per action: " +
+              ", ".join(f"{m}={f['per_action']:,} (base {f['base']:,})" for m, f in metrics.items()))
+    print("=" * 112)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Multi-action proposal cost benchmark on anvil.")
+    parser.add_argument("--actions", default="1,2,4,8,16,32,64,128,256", help="comma-separated action counts")
+    parser.add_argument("--variants", default="TreasuryBasic,TreasurySecure")
+    args = parser.parse_args()
+    sizes = [int(x) for x in args.actions.split(",") if x.strip()]
+    variants = [v.strip() for v in args.variants.split(",") if v.strip()]
+
+    w3 = make_web3([SIM_RPC_URL])
+    if not w3.is_connected():
+        print(f"Cannot reach {SIM_RPC_URL}; start anvil first.")
+        return 1
+    chain = LocalChain(w3, shared_controller())
+    chain.rpc("anvil_autoImpersonateAccount", True)
+    bench = deploy_bench(chain, max(sizes))
+    chain.fixtures.prepare("bench")
+
+    points = []
+    for variant in variants:
+        for n in sizes:
+            print(f"[Bench] {variant} with {n} action(s)...")
+            chain.fixtures.reset("bench")
+            try:
+                points.append(measure(chain, bench, variant, n))
+            except Exception as e:
+                points.append(ActionPoint(variant, n, error=str(e)[:200]))
+
+    fitted = fits(points)
+    log_results(points, fitted)
+    os.makedirs(REPORT_DIR, exist_ok=True)
+    path = f"{REPORT_DIR}/multi_action_{time.strftime('%Y%m%d_%H%M%S')}.json"
+    with open(path, "w") as f:
+        json.dump({"points": [asdict(p) for p in points], "fits": fitted}, f, indent=2)
+    print(f"Saved {path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+proposal_ids.py
+
+Proposal-id derivation without extra RPC calls.
+
+- OZ Governor (DAOOptimized): the id is
+  uint256(keccak256(abi.encode(targets, values, calldatas, descriptionHash)))
+  and is known before the propose transaction is even sent.
+- VulnerableDAO: ids are a counter, so the id is read from the
+  ProposalCreated(uint256,address) log of the propose receipt, matched by
+  topic0 (the event has no indexed fields; the id is the first data word).
+"""
+
+from typing import Any, List, Sequence, Union
+from eth_abi import encode
+from hexbytes import HexBytes
+from web3 import Web3
+
+VULNERABLE_PROPOSAL_CREATED_TOPIC = Web3.keccak(text="ProposalCreated(uint256,address)")
+
+BytesLike = Union[str, bytes, bytearray]
+
+
+def _to_bytes(value: BytesLike) -> bytes:
+    return bytes(HexBytes(value))
+
+
+def description_hash(description: str) -> bytes:
+    """keccak256(bytes(description)), as passed to Governor.queue/execute."""
+    return bytes(Web3.keccak(text=description))
+
+
+def hash_proposal(targets: Sequence[str], values: Sequence[int], calldatas: Sequence[BytesLike],
+                  desc_hash: BytesLike) -> int:
+    """Local equivalent of Governor.hashProposal / getProposalId."""
+    encoded = encode(
+        ["address[]", "uint256[]", "bytes[]", "bytes32"],
+        [
+            [Web3.to_checksum_address(t) for t in targets],
+            list(values),
+            [_to_bytes(c) for c in calldatas],
+            _to_bytes(desc_hash),
+        ],
+    )
+    return int.from_bytes(Web3.keccak(encoded), "big")
+
+
+def governor_proposal_id(targets: Sequence[str], values: Sequence[int], calldatas: Sequence[BytesLike],
+                         description: str) -> int:
+    """Proposal id for Governor.propose(targets, values, calldatas, description)."""
+    return hash_proposal(targets, values, calldatas, description_hash(description))
+
+
+def vulnerable_proposal_id(receipt: Any, dao_addr: str) -> int:
+    """Reads the VulnerableDAO proposal id from the ProposalCreated log of a propose receipt."""
+    dao_addr = Web3.to_checksum_address(dao_addr)
+    logs: List[Any] = receipt["logs"]
+    for log in logs:
+        topics = log["topics"]
+        if (topics and HexBytes(topics[0]) == VULNERABLE_PROPOSAL_CREATED_TOPIC
+                and Web3.to_checksum_address(log["address"]) == dao_addr):
+            return int.from_bytes(bytes(HexBytes(log["data"]))[:32], "big")
+    raise Exception("ProposalCreated log not found in VulnerableDAO propose receipt.")
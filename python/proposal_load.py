@@ -0,0 +1,271 @@
+#!/usr/bin/env python3
+"""
+proposal_load.py
+
+Concurrent-proposal load test for DAOOptimized + TimelockController on anvil.
+
+For every sweep point (M proposers, P proposals) a fresh stack is deployed
+from the same clean snapshot (fixtures.py) and the whole lifecycle runs with
+all P proposals in flight at once. Each phase puts all of its transactions
+in the mempool and mines block by block under SIM_BLOCK_GAS_LIMIT
+(LocalChain.bulk):
+- propose: P proposals, round-robin over the M proposers (proposal
+  threshold checked against each proposer's past votes)
+- vote:    every voter votes For on every proposal
+- queue:   every Succeeded proposal (_queueOperations -> timelock scheduleBatch)
+- execute: after MIN_DELAY, every queued proposal (DAOOptimized calls the
+  DAO-owned treasury itself; the timelock only gates the delay)
+
+Reported per point: proposals per block in each phase, the gas distribution
+(min / p50 / p95 / max) per phase, and scheduler latency per proposal:
+blocks from proposal inclusion to queue, and seconds from queue to
+execution (the timelock delay plus the execute backlog).
+
+DAOOptimized._quorumReached reads its own private _proposalVotes mapping,
+which castVote never writes (GovernorCountingSimple keeps the real tally),
+so any non-zero quorum fraction defeats every proposal. LOAD_QUORUM_NUMERATOR
+therefore defaults to 0; set it to 4 to load-test the Defeated path instead.
+A phase that fails outright (e.g. a reverting gas estimate) is recorded in
+the point's notes and ends that point; the sweep and its report go on.
+
+Usage (anvil running, `forge build` done):
+    anvil --gas-limit 30000000
+    python proposal_load.py --proposers 1,4,16 --proposals 8,32,64 --voters 10
+"""
+
+import os
+import sys
+import time
+import json
+import argparse
+from dataclasses import dataclass, asdict, field
+from typing import Any, Dict, List, Optional, Sequence
+from web3 import Web3
+from rpc_pool import make_web3
+from traffic import shared_controller
+from proposal_ids import governor_proposal_id, description_hash
+from state_seeding import StateSeeder
+from scale_sim import (
+    LocalChain, BulkResult, deploy_optimized_stack, synthetic_members,
+    SIM_RPC_URL, SIM_BLOCK_GAS_LIMIT, MIN_DELAY, VOTING_DELAY, VOTING_PERIOD, PAYMENT, REPORT_DIR,
+)
+
+LOAD_QUORUM_NUMERATOR = int(os.getenv("LOAD_QUORUM_NUMERATOR", "0"))
+PROPOSAL_THRESHOLD = Web3.to_wei(1, "ether")   # every member holds exactly this much
+GAS_HEADROOM = 1.3
+STATE_SUCCEEDED = 4
+STATE_EXECUTED = 7
+
+
+# --- DATA STRUCTURES ---
+@dataclass
+class PhaseStats:
+    txs: int = 0
+    included: int = 0
+    reverted: int = 0
+    rejected: int = 0
+    blocks: int = 0
+    per_block: float = 0.0
+    seconds: float = 0.0
+    gas: Dict[str, int] = field(default_factory=dict)   # min / p50 / p95 / max of successful txs
+
+    @classmethod
+    def from_bulk(cls, bulk: BulkResult) -> "PhaseStats":
+        ok = sorted(g for g, s in zip(bulk.records.gas_used, bulk.records.status) if s == 1)
+        return cls(
+            txs=bulk.sent,
+            included=bulk.included,
+            reverted=bulk.reverted,
+            rejected=len(bulk.rejected),
+            blocks=sum(1 for b in bulk.blocks if b[1]),
+            per_block=round(bulk.per_block, 1),
+            seconds=round(bulk.seconds, 2),
+            gas=distribution(ok),
+        )
+
+
+@dataclass
+class LoadResult:
+    proposers: int
+    proposals: int
+    voters: int
+    block_gas_limit: int
+    phases: Dict[str, PhaseStats] = field(default_factory=dict)
+    succeeded: int = 0
+    executed: int = 0
+    propose_to_queue_blocks: Dict[str, int] = field(default_factory=dict)
+    queue_to_execute_s: Dict[str, int] = field(default_factory=dict)
+    notes: List[str] = field(default_factory=list)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+def distribution(values: Sequence[int]) -> Dict[str, int]:
+    """min / p50 / p95 / max of an already sorted list."""
+    if not values:
+        return {}
+    pick = lambda pct: values[min(len(values) - 1, int(round(pct / 100 * (len(values) - 1))))]
+    return {"min": values[0], "p50": pick(50), "p95": pick(95), "max": values[-1]}
+
+
+# --- PHASES ---
+def run_phase(chain: LocalChain, calls: List[tuple]) -> BulkResult:
+    """calls: (sender, tx_func). Gas is estimated per call before anything is sent."""
+    estimates = chain.traffic.map(lambda c: c[1].estimate_gas({"from": c[0]}), calls)
+    for e in estimates:
+        if isinstance(e, Exception):
+            raise e
+    return chain.bulk([chain.tx(sender, fn, int(gas * GAS_HEADROOM)) for (sender, fn), gas in zip(calls, estimates)])
+
+
+def guarded_phase(res: "LoadResult", name: str, chain: LocalChain, calls: List[tuple]) -> Optional[BulkResult]:
+    """run_phase, with a failure (e.g. a reverting gas estimate) recorded in res.notes instead of raised."""
+    try:
+        bulk = run_phase(chain, calls)
+    except Exception as e:
+        res.notes.append(f"{name} phase failed: {str(e)[:200]}")
+        return None
+    res.phases[name] = PhaseStats.from_bulk(bulk)
+    return bulk
+
+
+def inclusion_blocks(bulk: BulkResult, count: int) -> List[int]:
+    """Block of each submitted tx (0 where it never got a receipt)."""
+    blocks = [0] * count
+    for k, block in zip(bulk.sources, bulk.records.block):
+        blocks[k] = block
+    return blocks
+
+
+def run_point(chain: LocalChain, proposers: int, proposals: int, voters: int, block_gas_limit: int) -> LoadResult:
+    res = LoadResult(proposers, proposals, voters, block_gas_limit)
+    members = synthetic_members(proposers + voters, f"load-{proposers}x{proposals}")
+    proposer_addrs, voter_addrs = members[:proposers], members[proposers:]
+    stack = deploy_optimized_stack(chain, members, LOAD_QUORUM_NUMERATOR, PROPOSAL_THRESHOLD)
+    dao, treasury = stack.dao, stack.treasury
+    chain.set_block_gas_limit(block_gas_limit)
+
+    # One distinct payment per proposal: recipient i, so every proposal id differs
+    plans = []
+    for i in range(proposals):
+        recipient = Web3.to_checksum_address(Web3.keccak(text=f"load-recipient:{i}")[12:])
+        calldatas = [treasury.encode_abi("executePayment", args=[recipient, PAYMENT])]
+        description = f"load {proposers}x{proposals} #{i}"
+        plans.append(([treasury.address], [0], calldatas, description))
+    ids = [governor_proposal_id(*plan) for plan in plans]
+
+    # --- PROPOSE ---
+    propose = guarded_phase(res, "propose", chain, [(proposer_addrs[i % proposers], dao.functions.propose(*plan))
+                                                    for i, plan in enumerate(plans)])
+    if propose is None:
+        return res
+    propose_blocks = inclusion_blocks(propose, proposals)
+    chain.rpc("anvil_mine", Web3.to_hex(VOTING_DELAY + 1))
+
+    # --- VOTE ---
+    live = [pid for pid, block in zip(ids, propose_blocks) if block]
+    votes = [(v, dao.functions.castVote(pid, 1)) for pid in live for v in voter_addrs]
+    if guarded_phase(res, "vote", chain, votes) is None:
+        return res
+    chain.rpc("anvil_mine", Web3.to_hex(VOTING_PERIOD + 1))
+
+    states = chain.traffic.map(lambda pid: dao.functions.state(pid).call(), ids)
+    succeeded = [i for i, st in enumerate(states) if st == STATE_SUCCEEDED]
+    res.succeeded = len(succeeded)
+    if not succeeded:
+        res.notes.append(f"no proposal Succeeded (states: {sorted(set(map(str, states)))}); queue/execute skipped")
+        return res
+
+    # --- QUEUE ---
+    def lifecycle_call(i: int, name: str):
+        targets, values, calldatas, description = plans[i]
+        return chain.deployer, getattr(dao.functions, name)(targets, values, calldatas, description_hash(description))
+
+    queue = guarded_phase(res, "queue", chain, [lifecycle_call(i, "queue") for i in succeeded])
+    if queue is None:
+        return res
+    queue_blocks = inclusion_blocks(queue, len(succeeded))
+    chain.rpc("evm_increaseTime", MIN_DELAY + 1)
+    chain.rpc("evm_mine")
+
+    # --- EXECUTE ---
+    queued = [i for i, block in zip(succeeded, queue_blocks) if block]
+    execute = guarded_phase(res, "execute", chain, [lifecycle_call(i, "execute") for i in queued])
+    if execute is None:
+        return res
+    execute_blocks = inclusion_blocks(execute, len(queued))
+    states = chain.traffic.map(lambda pid: dao.functions.state(pid).call(), ids)
+    res.executed = sum(1 for st in states if st == STATE_EXECUTED)
+
+    # --- SCHEDULER LATENCY ---
+    res.propose_to_queue_blocks = distribution(sorted(
+        q - propose_blocks[i] for i, q in zip(succeeded, queue_blocks) if q))
+    queue_of = dict(zip(succeeded, queue_blocks))
+    pairs = [(queue_of[i], e) for i, e in zip(queued, execute_blocks) if e]
+    numbers = sorted({b for pair in pairs for b in pair})
+    stamps = dict(zip(numbers, chain.traffic.map(lambda b: chain.w3.eth.get_block(b)["timestamp"], numbers)))
+    res.queue_to_execute_s = distribution(sorted(stamps[e] - stamps[q] for q, e in pairs))
+    return res
+
+
+# --- REPORTING ---
+def log_results(results: List[LoadResult]) -> None:
+    print("\n" + "=" * 118)
+    print(f"{'M x P':<10}{'phase':<9}{'txs':>7}{'incl':>7}{'rev':>5}{'blocks':>8}{'per blk':>9}{'secs':>8}"
+          f"{'gas min':>10}{'gas p50':>10}{'gas p95':>10}{'gas max':>10}")
+    print("-" * 118)
+    for r in results:
+        label = f"{r.proposers} x {r.proposals}"
+        for name, p in r.phases.items():
+            g = p.gas
+            print(f"{label:<10}{name:<9}{p.txs:>7}{p.included:>7}{p.reverted:>5}{p.blocks:>8}{p.per_block:>9}"
+                  f"{p.seconds:>8}{g.get('min', 0):>10,}{g.get('p50', 0):>10,}{g.get('p95', 0):>10,}{g.get('max', 0):>10,}")
+            label = ""
+        q, e = r.propose_to_queue_blocks, r.queue_to_execute_s
+        print(f"{'':<10}succeeded {r.succeeded}/{r.proposals}, executed {r.executed}; "
+              f"propose->queue blocks p50/max {q.get('p50', '-')}/{q.get('max', '-')}; "
+              f"queue->execute s p50/max {e.get('p50', '-')}/{e.get('max', '-')} (min delay {MIN_DELAY}s)")
+        for note in r.notes:
+            print(f"    ! {note}")
+    print("=" * 118)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Concurrent-proposal load test for DAOOptimized on anvil.")
+    parser.add_argument("--proposers", default="1,4,16", help="comma-separated proposer counts (M)")
+    parser.add_argument("--proposals", default="8,32", help="comma-separated proposal counts (P)")
+    parser.add_argument("--voters", type=int, default=10, help="voters casting For on every proposal")
+    parser.add_argument("--block-gas-limit", type=int, default=SIM_BLOCK_GAS_LIMIT)
+    parser.add_argument("--seed", action="store_true", help="seed member balances/delegations via anvil_setStorageAt")
+    args = parser.parse_args()
+
+    w3 = make_web3([SIM_RPC_URL])
+    if not w3.is_connected():
+        print(f"Cannot reach {SIM_RPC_URL}; start anvil first.")
+        return 1
+    chain = LocalChain(w3, shared_controller(), StateSeeder(SIM_RPC_URL) if args.seed else None)
+    chain.rpc("anvil_autoImpersonateAccount", True)
+    chain.fixtures.prepare("clean")
+
+    results = []
+    for m in (int(x) for x in args.proposers.split(",") if x.strip()):
+        for p in (int(x) for x in args.proposals.split(",") if x.strip()):
+            print(f"\n[Load] {m} proposer(s) x {p} proposal(s), {args.voters} voter(s)...")
+            chain.fixtures.reset("clean")
+            try:
+                results.append(run_point(chain, m, p, args.voters, args.block_gas_limit))
+            except Exception as e:   # setup failure: keep the sweep (and its report) going
+                results.append(LoadResult(m, p, args.voters, args.block_gas_limit, notes=[f"setup failed: {str(e)[:200]}"]))
+
+    log_results(results)
+    os.makedirs(REPORT_DIR, exist_ok=True)
+    path = f"{REPORT_DIR}/proposal_load_{time.strftime('%Y%m%d_%H%M%S')}.json"
+    with open(path, "w") as f:
+        json.dump({"quorum_numerator": LOAD_QUORUM_NUMERATOR, "results": [r.to_dict() for r in results]}, f, indent=2)
+    print(f"Saved {path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,25 +1,26 @@
 import os
 import time
-from web3 import Web3
 from eth_account import Account
 from dotenv import load_dotenv
+from rpc_pool import make_web3
+from gas_estimator import GasLimitEstimator
+from deployments import DeploymentRegistry
 
 # --- 1. SETUP ---
 load_dotenv()
-w3 = Web3(Web3.HTTPProvider(os.getenv("RPC_URL")))
+w3 = make_web3()
 deployer_acct = Account.from_key(os.getenv("PRIVATE_KEY"))
 deployer_addr = deployer_acct.address
+gas_estimator = GasLimitEstimator(w3)
 
-# DAO and Treasury pairs
+# DAO and Treasury pairs (latest broadcast runs)
+deployments = DeploymentRegistry()
 SCENARIOS = {
-    "V3_NEW_OPTIMIZED": {
-        "DAO": "0xcCaD7C3EfE882167826120960d951c42d30342Ff",
-        "TREASURY": "0x8Db4684aF971Fe772A26141B12f4c710fe4478d0"
-    },
-    "V4_NEW_SECURE": {
-        "DAO": "0x5a89a310ade0Ed6b9D2085Fb7E98A0AAE4BFcb6A",
-        "TREASURY": "0x1A00DCf264B0A37e86B2D8852888fd7F59665856"
-    }
+    name: {"DAO": stack.address("DAOOptimized"), "TREASURY": stack.address(treasury)}
+    for name, stack, treasury in [
+        ("V3_NEW_OPTIMIZED", deployments.stack("V3"), "TreasuryBasic"),
+        ("V4_NEW_SECURE", deployments.stack("V4"), "TreasurySecure"),
+    ]
 }
 
 DAO_ABI = [
@@ -35,10 +36,15 @@ TOKEN_ABI = [
 
 def send_signed_tx(to_addr, value_wei, data=b""):
     nonce = w3.eth.get_transaction_count(deployer_addr)
+    # Treasury top-ups hit a receive() hook, so even plain transfers are estimated (and cached)
+    gas = gas_estimator.limit_for(
+        {'from': deployer_addr, 'to': to_addr, 'data': data, 'value': value_wei},
+        default=100000 if data else 21000,
+    )
     tx = {
         'to': to_addr,
         'value': value_wei,
-        'gas': 100000 if data else 21000,
+        'gas': gas,
         'gasPrice': w3.eth.gas_price,
         'nonce': nonce,
         'data': data,
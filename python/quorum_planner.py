@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+"""
+quorum_planner.py
+
+Plans the smallest (or cheapest) set of For votes that passes a proposal,
+from the governor's own success rule and one concurrent read of the
+candidates' voting weights, instead of casting every member vote plus the
+whale votes and finding out after the voting period.
+
+Rules:
+- VulnerableDAO:  yes > no and yes*2 >= sum of member balances, recomputed
+  by every castVote; weight = live balanceOf (balances must not move while
+  voting).
+  The vote that crosses the threshold executes inline.
+- DAOOptimized:   forVotes > againstVotes (GovernorCountingSimple), weight =
+  getPastVotes(voter, snapshot). Its _quorumReached override sums a private
+  _proposalVotes mapping that castVote never writes, so the quorum term holds
+  only when quorum(snapshot) == 0; with a non-zero quorum no vote set can
+  pass and the plan is reported unreachable.
+
+Strategies:
+- minimal:   fewest voters (heaviest first; optimal for count)
+- cheapest:  least estimated castVote gas (greedy by gas per unit of weight,
+             redundant voters pruned, never worse than the minimal plan)
+
+Every voter in a plan is needed (dropping any one falls short), so whichever
+planned VulnerableDAO vote lands last is the one that crosses.
+
+VOTE_PLAN=all keeps the previous behaviour (every funded member votes).
+
+Usage:
+    planner = QuorumPlanner(w3, traffic)
+    rule = planner.optimized_rule(dao, proposal_id)
+    plan = planner.plan(rule, planner.candidates(rule, dao, token, proposal_id, voters, support=1))
+    if plan.ok: send only plan.accounts
+"""
+
+import os
+from dataclasses import dataclass, field
+from typing import Any, List, Optional, Sequence
+from web3 import Web3
+
+VOTE_PLAN = os.getenv("VOTE_PLAN", "cheapest").lower()   # "all" | "minimal" | "cheapest"
+
+
+def is_planned_mode(mode: Optional[str] = None) -> bool:
+    return (mode or VOTE_PLAN) != "all"
+
+
+@dataclass
+class Candidate:
+    voter: Any          # eth_account LocalAccount
+    weight: int = 0
+    gas: int = 0
+
+
+@dataclass
+class QuorumRule:
+    governor: str       # "VulnerableDAO" | "DAOOptimized"
+    required: int       # further For weight needed
+    quorum: int = 0
+    reachable: bool = True
+    note: str = ""
+
+    def summary(self) -> str:
+        line = f"{self.governor}: {Web3.from_wei(self.required, 'ether')} more For weight needed"
+        if self.governor == "DAOOptimized":
+            line += f", quorum {Web3.from_wei(self.quorum, 'ether')}"
+        return line + ("" if self.reachable else f" - UNREACHABLE: {self.note}")
+
+
+@dataclass
+class VotePlan:
+    rule: QuorumRule
+    strategy: str
+    candidates: int = 0
+    voters: List[Candidate] = field(default_factory=list)
+
+    @property
+    def weight(self) -> int:
+        return sum(c.weight for c in self.voters)
+
+    @property
+    def gas(self) -> int:
+        return sum(c.gas for c in self.voters)
+
+    @property
+    def ok(self) -> bool:
+        return self.rule.reachable and self.weight >= self.rule.required
+
+    @property
+    def accounts(self) -> List[Any]:
+        return [c.voter for c in self.voters]
+
+    def summary(self) -> str:
+        if not self.ok:
+            reason = self.rule.note if not self.rule.reachable else \
+                f"{self.candidates} candidate(s) hold {Web3.from_wei(self.weight, 'ether')} < {Web3.from_wei(self.rule.required, 'ether')}"
+            return f"no {self.strategy} plan: {reason}"
+        return (f"{self.strategy} plan: {len(self.voters)}/{self.candidates} voter(s), "
+                f"weight {Web3.from_wei(self.weight, 'ether')} >= {Web3.from_wei(self.rule.required, 'ether')}, "
+                f"~{self.gas:,} gas estimated")
+
+
+# --- SELECTION ---
+def minimal_set(candidates: Sequence[Candidate], required: int) -> List[Candidate]:
+    """Heaviest first (cheaper first on ties): the fewest voters reaching `required`."""
+    chosen, weight = [], 0
+    for c in sorted(candidates, key=lambda c: (-c.weight, c.gas)):
+        if weight >= required:
+            break
+        chosen.append(c)
+        weight += c.weight
+    return chosen
+
+
+def cheapest_set(candidates: Sequence[Candidate], required: int) -> List[Candidate]:
+    """Greedy by gas per unit of weight, then drops voters (most expensive first) the rest can cover for."""
+    chosen, weight = [], 0
+    for c in sorted(candidates, key=lambda c: c.gas / c.weight):
+        if weight >= required:
+            break
+        chosen.append(c)
+        weight += c.weight
+    for c in sorted(chosen, key=lambda c: -c.gas):
+        if weight - c.weight >= required:
+            chosen.remove(c)
+            weight -= c.weight
+    minimal = minimal_set(candidates, required)
+    return minimal if sum(c.gas for c in minimal) < sum(c.gas for c in chosen) else chosen
+
+
+class QuorumPlanner:
+    def __init__(self, w3: Web3, traffic, scheduler=None):
+        self.w3 = w3
+        self.traffic = traffic
+        self.scheduler = scheduler   # VoteScheduler: VulnerableDAO member supply
+
+    def _read(self, fn, items: Sequence[Any]) -> List[Any]:
+        results = self.traffic.map(fn, items)
+        for r in results:
+            if isinstance(r, Exception):
+                raise r
+        return results
+
+    # --- RULES ---
+    def vulnerable_rule(self, dao_contract, token_contract, proposal_id: int) -> QuorumRule:
+        supply = self.scheduler.member_supply(dao_contract, token_contract)
+        # Getter: (proposer, description, target, value, data, yes, no, createdAt, executed)
+        proposal = dao_contract.functions.proposals(proposal_id).call()
+        needed = max(1, (supply + 1) // 2)   # yes*2 >= supply, and at least one vote
+        needed = max(needed, proposal[6] + 1)   # yes > no
+        rule = QuorumRule("VulnerableDAO", max(0, needed - proposal[5]))
+        if proposal[8]:
+            rule.reachable, rule.note = False, "proposal already executed"
+        return rule
+
+    def optimized_rule(self, dao_contract, proposal_id: int) -> QuorumRule:
+        snapshot = dao_contract.functions.proposalSnapshot(proposal_id).call()
+        quorum = dao_contract.functions.quorum(snapshot).call()
+        against, for_votes, _ = dao_contract.functions.proposalVotes(proposal_id).call()
+        rule = QuorumRule("DAOOptimized", max(0, against + 1 - for_votes), quorum)
+        if quorum:
+            rule.reachable = False
+            rule.note = ("_quorumReached counts DAOOptimized's own _proposalVotes, which castVote never writes; "
+                         f"quorum({snapshot}) = {Web3.from_wei(quorum, 'ether')} > 0 defeats any vote set")
+        return rule
+
+    # --- CANDIDATES ---
+    def candidates(self, rule: QuorumRule, dao_contract, token_contract, proposal_id: int,
+                   voters: Sequence[Any], support) -> List[Candidate]:
+        """Weights and castVote estimates for every voter, read concurrently; zero-weight and failing voters dropped."""
+        if rule.governor == "DAOOptimized":
+            snapshot = dao_contract.functions.proposalSnapshot(proposal_id).call()
+            weights = self._read(lambda v: token_contract.functions.getPastVotes(v.address, snapshot).call(), voters)
+        else:
+            weights = self._read(lambda v: token_contract.functions.balanceOf(v.address).call(), voters)
+        estimates = self.traffic.map(
+            lambda v: dao_contract.functions.castVote(proposal_id, support).estimate_gas({"from": v.address}), voters)
+        seen, out = set(), []
+        for voter, weight, gas in zip(voters, weights, estimates):
+            if voter.address in seen or not weight or isinstance(gas, Exception):
+                continue   # duplicates, no voting power, already voted
+            seen.add(voter.address)
+            out.append(Candidate(voter, weight, gas))
+        return out
+
+    # --- PLAN ---
+    def plan(self, rule: QuorumRule, candidates: Sequence[Candidate], strategy: Optional[str] = None) -> VotePlan:
+        strategy = strategy or (VOTE_PLAN if is_planned_mode() else "cheapest")
+        plan = VotePlan(rule, strategy, len(candidates))
+        if not rule.reachable:
+            return plan
+        pick = minimal_set if strategy == "minimal" else cheapest_set
+        plan.voters = pick(candidates, rule.required)
+        return plan
@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+"""
+rpc_metrics.py
+
+Per-run JSON-RPC accounting: call counts, request/response bytes and latency
+distribution per method, grouped by scenario step (e.g. "V3/propose").
+
+Usage:
+    recorder = RPCRecorder()
+    install_rpc_metrics(w3, recorder)
+    recorder.set_step("V3", "votes")
+    ...
+    print(recorder.summary_table())
+    recorder.save("reports/rpc_stats_<ts>.json")
+"""
+
+import json
+import time
+import threading
+from bisect import bisect_left
+from typing import Any, Dict, List, Optional
+from eth_utils.toolz import curry
+from web3.middleware.base import Web3MiddlewareBuilder
+
+# Upper bounds (ms) of the latency histogram buckets; the last bucket is open-ended
+LATENCY_BUCKETS_MS = [1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000]
+
+
+def _percentile(sorted_values: List[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    idx = min(len(sorted_values) - 1, int(round(pct / 100 * (len(sorted_values) - 1))))
+    return sorted_values[idx]
+
+
+def _json_size(obj: Any) -> int:
+    return len(json.dumps(obj, default=str, separators=(",", ":")))
+
+
+class MethodStats:
+    __slots__ = ("count", "errors", "bytes_out", "bytes_in", "latencies_ms", "histogram")
+
+    def __init__(self):
+        self.count = 0
+        self.errors = 0
+        self.bytes_out = 0
+        self.bytes_in = 0
+        self.latencies_ms: List[float] = []
+        self.histogram = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+
+    def add(self, latency_ms: float, bytes_out: int, bytes_in: int, error: bool) -> None:
+        self.count += 1
+        self.errors += int(error)
+        self.bytes_out += bytes_out
+        self.bytes_in += bytes_in
+        self.latencies_ms.append(latency_ms)
+        self.histogram[bisect_left(LATENCY_BUCKETS_MS, latency_ms)] += 1
+
+    def to_dict(self) -> Dict[str, Any]:
+        lat = sorted(self.latencies_ms)
+        return {
+            "count": self.count,
+            "errors": self.errors,
+            "bytes_out": self.bytes_out,
+            "bytes_in": self.bytes_in,
+            "latency_ms": {
+                "total": round(sum(lat), 2),
+                "p50": round(_percentile(lat, 50), 2),
+                "p95": round(_percentile(lat, 95), 2),
+                "p99": round(_percentile(lat, 99), 2),
+                "max": round(lat[-1], 2) if lat else 0.0,
+            },
+            "histogram_ms": {
+                (f"<={b}" if i < len(LATENCY_BUCKETS_MS) else f">{LATENCY_BUCKETS_MS[-1]}"): n
+                for i, (b, n) in enumerate(zip(LATENCY_BUCKETS_MS + [None], self.histogram))
+            },
+        }
+
+
+class RPCRecorder:
+    def __init__(self):
+        self.scenario = "setup"
+        self.phase = "init"
+        self.stats: Dict[str, Dict[str, MethodStats]] = {}
+        self.started = time.time()
+        self._lock = threading.Lock()
+
+    @property
+    def step(self) -> str:
+        return f"{self.scenario}/{self.phase}"
+
+    def set_step(self, scenario: Optional[str] = None, phase: Optional[str] = None) -> None:
+        """Attributes subsequent RPC calls (from any thread) to scenario/phase."""
+        if scenario is not None:
+            self.scenario = scenario
+        if phase is not None:
+            self.phase = phase
+
+    def record(self, method: str, latency_ms: float, bytes_out: int, bytes_in: int, error: bool) -> None:
+        with self._lock:
+            per_method = self.stats.setdefault(self.step, {})
+            per_method.setdefault(method, MethodStats()).add(latency_ms, bytes_out, bytes_in, error)
+
+    # --- REPORTING ---
+    def to_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            steps = {
+                step: {method: s.to_dict() for method, s in sorted(methods.items())}
+                for step, methods in self.stats.items()
+            }
+        totals = {
+            step: {
+                "calls": sum(m["count"] for m in methods.values()),
+                "bytes": sum(m["bytes_out"] + m["bytes_in"] for m in methods.values()),
+                "rpc_time_ms": round(sum(m["latency_ms"]["total"] for m in methods.values()), 2),
+            }
+            for step, methods in steps.items()
+        }
+        return {"started": self.started, "finished": time.time(), "latency_buckets_ms": LATENCY_BUCKETS_MS,
+                "totals": totals, "steps": steps}
+
+    def summary_table(self) -> str:
+        data = self.to_dict()
+        lines = [
+            f"{'STEP':<22} {'METHOD':<28} {'CALLS':>6} {'ERR':>4} {'KB OUT':>8} {'KB IN':>8} {'P50 ms':>8} {'P95 ms':>8} {'TOTAL s':>8}",
+            "-" * 108,
+        ]
+        for step, methods in data["steps"].items():
+            for method, m in methods.items():
+                lat = m["latency_ms"]
+                lines.append(
+                    f"{step:<22} {method:<28} {m['count']:>6} {m['errors']:>4} {m['bytes_out'] / 1024:>8.1f} "
+                    f"{m['bytes_in'] / 1024:>8.1f} {lat['p50']:>8.1f} {lat['p95']:>8.1f} {lat['total'] / 1000:>8.2f}"
+                )
+            t = data["totals"][step]
+            lines.append(f"{step:<22} {'= step total':<28} {t['calls']:>6} {'':>4} {'':>8} {'':>8} {'':>8} {'':>8} {t['rpc_time_ms'] / 1000:>8.2f}")
+        return "\n".join(lines)
+
+    def save(self, path: str) -> None:
+        with open(path, "w") as f:
+            json.dump(self.to_dict(), f, indent=2)
+        print(f"Saved RPC stats: {path}")
+
+
+class RPCMetricsMiddleware(Web3MiddlewareBuilder):
+    recorder: RPCRecorder = None
+
+    @staticmethod
+    @curry
+    def build(recorder: RPCRecorder, w3):
+        middleware = RPCMetricsMiddleware(w3)
+        middleware.recorder = recorder
+        return middleware
+
+    def wrap_make_request(self, make_request):
+        def middleware(method, params):
+            start = time.perf_counter()
+            error = False
+            response = None
+            try:
+                response = make_request(method, params)
+                error = "error" in response
+                return response
+            except Exception:
+                error = True
+                raise
+            finally:
+                elapsed_ms = (time.perf_counter() - start) * 1000
+                bytes_in = _json_size(response) if response is not None else 0
+                self.recorder.record(method, elapsed_ms, _json_size(params), bytes_in, error)
+
+        return middleware
+
+
+def install_rpc_metrics(w3, recorder: RPCRecorder) -> RPCRecorder:
+    """Adds the accounting middleware as the innermost layer (closest to the provider)."""
+    w3.middleware_onion.inject(RPCMetricsMiddleware.build(recorder), name="rpc_metrics", layer=0)
+    return recorder
@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+"""
+rpc_pool.py
+
+Multi-endpoint JSON-RPC provider for the harness scripts.
+
+- RPC_URLS (env, comma-separated) lists the endpoints; RPC_URL is used when unset
+- one persistent keep-alive HTTP session per endpoint
+- reads go to healthy endpoints, weighted towards the lowest observed latency
+- nonce-sensitive writes (sends, nonce and receipt lookups) are pinned to one
+  endpoint so a transaction is always read back from the node that accepted it
+- failed calls (connection errors, timeouts, 5xx, rate limits) are retried on
+  another endpoint and the failing one is put on a cooldown
+- every attempt holds a slot of the shared TrafficController (see traffic.py),
+  which adapts request rate and concurrency to what the endpoints accept
+- RPC_CASSETTE=record|replay records every exchange or replays it offline
+  (see cassette.py)
+
+Usage:
+    from rpc_pool import make_web3
+    w3 = make_web3()
+"""
+
+import os
+import time
+import random
+import threading
+from typing import Any, List, Optional
+import requests
+from requests.adapters import HTTPAdapter
+from web3 import Web3
+from web3.providers.base import JSONBaseProvider
+from traffic import TrafficController, shared_controller, is_backoff_error
+from cassette import Cassette, ReplayProvider, shared_cassette, is_replay
+
+# Methods whose answers depend on what this node has seen from us
+PINNED_METHODS = {
+    "eth_sendRawTransaction",
+    "eth_sendTransaction",
+    "eth_getTransactionCount",
+    "eth_getTransactionReceipt",
+    "eth_getTransactionByHash",
+}
+
+RATE_LIMIT_CODES = {429, -32005, -32029}
+REQUEST_TIMEOUT = float(os.getenv("RPC_TIMEOUT", "30"))
+MAX_SWEEPS = 4        # passes over all endpoints before giving up
+BASE_COOLDOWN = 2.0
+MAX_COOLDOWN = 60.0
+LATENCY_ALPHA = 0.2   # EWMA weight of the newest sample
+
+
+class RetryableRPCError(Exception):
+    """Transport-level failure that should be retried on another endpoint."""
+
+
+class Endpoint:
+    def __init__(self, url: str, pool_size: int = 32):
+        self.url = url
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.latency = 0.25   # seconds; optimistic prior until measured
+        self.failures = 0
+        self.cooldown_until = 0.0
+        self.requests = 0
+
+    @property
+    def healthy(self) -> bool:
+        return time.monotonic() >= self.cooldown_until
+
+    def record_success(self, elapsed: float) -> None:
+        self.latency = (1 - LATENCY_ALPHA) * self.latency + LATENCY_ALPHA * elapsed
+        self.failures = 0
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        cooldown = min(MAX_COOLDOWN, BASE_COOLDOWN * 2 ** (self.failures - 1))
+        self.cooldown_until = time.monotonic() + cooldown
+
+    def post(self, body: bytes, timeout: float) -> bytes:
+        self.requests += 1
+        resp = self.session.post(
+            self.url, data=body, timeout=timeout, headers={"Content-Type": "application/json"}
+        )
+        if resp.status_code == 429 or resp.status_code >= 500:
+            raise RetryableRPCError(f"HTTP {resp.status_code} from {self.url}")
+        resp.raise_for_status()
+        return resp.content
+
+
+def _is_rate_limited(response: dict) -> bool:
+    error = response.get("error")
+    if not isinstance(error, dict):
+        return False
+    msg = str(error.get("message", "")).lower()
+    return error.get("code") in RATE_LIMIT_CODES or "rate limit" in msg or "too many requests" in msg
+
+
+class RPCPoolProvider(JSONBaseProvider):
+    def __init__(self, urls: List[str], timeout: float = REQUEST_TIMEOUT,
+                 traffic: Optional[TrafficController] = None, cassette: Optional[Cassette] = None,
+                 **kwargs: Any):
+        if not urls:
+            raise ValueError("RPCPoolProvider needs at least one endpoint URL.")
+        super().__init__(**kwargs)
+        self.endpoints = [Endpoint(url) for url in urls]
+        self.timeout = timeout
+        self.traffic = traffic or shared_controller()
+        self.cassette = cassette
+        self._pinned = self.endpoints[0]
+        self._lock = threading.Lock()
+
+    def __str__(self) -> str:
+        return f"RPC pool ({len(self.endpoints)} endpoint(s): {', '.join(e.url for e in self.endpoints)})"
+
+    # --- ROUTING ---
+    def _pinned_endpoint(self) -> Endpoint:
+        """The write endpoint only moves when it becomes unhealthy, and then for every caller."""
+        with self._lock:
+            if not self._pinned.healthy:
+                healthy = [e for e in self.endpoints if e.healthy]
+                if healthy:
+                    self._pinned = min(healthy, key=lambda e: e.latency)
+            return self._pinned
+
+    def _candidates(self, method: str) -> List[Endpoint]:
+        healthy = [e for e in self.endpoints if e.healthy]
+        cooling = sorted((e for e in self.endpoints if not e.healthy), key=lambda e: e.cooldown_until)
+        if method in PINNED_METHODS:
+            first = self._pinned_endpoint()
+        elif healthy:
+            # Latency-weighted pick spreads reads while favouring the fastest endpoints
+            weights = [1.0 / max(e.latency, 1e-3) for e in healthy]
+            first = random.choices(healthy, weights=weights)[0]
+        else:
+            first = cooling[0]
+        rest = sorted((e for e in healthy if e is not first), key=lambda e: e.latency)
+        return [first] + rest + [e for e in cooling if e is not first]
+
+    # --- JSON-RPC ---
+    def make_request(self, method, params):
+        try:
+            response = self._make_request(method, params)
+        except Exception as e:
+            if self.cassette is not None:
+                self.cassette.record_exception(method, params, e)
+            raise
+        if self.cassette is not None:
+            self.cassette.record(method, params, response)
+        return response
+
+    def _make_request(self, method, params):
+        body = self.encode_rpc_request(method, params)
+        last_error: Optional[Exception] = None
+
+        for sweep in range(MAX_SWEEPS):
+            if sweep:
+                time.sleep(min(MAX_COOLDOWN, BASE_COOLDOWN * 2 ** (sweep - 1)))
+            for attempt, endpoint in enumerate(self._candidates(method)):
+                start = time.perf_counter()
+                try:
+                    with self.traffic.slot():
+                        raw = endpoint.post(body, self.timeout)
+                    response = self.decode_rpc_response(raw)
+                except (requests.ConnectionError, requests.Timeout, RetryableRPCError) as e:
+                    endpoint.record_failure()
+                    if is_backoff_error(e):
+                        self.traffic.backoff()
+                    last_error = e
+                    continue
+                endpoint.record_success(time.perf_counter() - start)
+
+                if _is_rate_limited(response):
+                    endpoint.record_failure()
+                    self.traffic.backoff()
+                    last_error = RetryableRPCError(f"rate limited by {endpoint.url}")
+                    continue
+                if "error" in response and is_backoff_error(response["error"]):
+                    # e.g. "replacement transaction underpriced": the caller decides, we slow down
+                    self.traffic.backoff()
+                    return response
+                if (sweep or attempt) and method == "eth_sendRawTransaction" and "already known" in str(response.get("error", "")):
+                    # An earlier endpoint accepted the tx before failing; report the hash it would have returned
+                    return {"jsonrpc": "2.0", "id": response.get("id"), "result": Web3.to_hex(Web3.keccak(hexstr=params[0]))}
+                self.traffic.on_success()
+                return response
+
+        raise ConnectionError(f"All RPC endpoints failed for {method}: {last_error}")
+
+    def stats(self) -> List[dict]:
+        return [
+            {"url": e.url, "requests": e.requests, "latency_ms": round(e.latency * 1000, 1),
+             "healthy": e.healthy, "failures": e.failures}
+            for e in self.endpoints
+        ]
+
+
+def endpoint_urls() -> List[str]:
+    """RPC_URLS (comma-separated) if set, else the single RPC_URL."""
+    urls = os.getenv("RPC_URLS") or os.getenv("RPC_URL") or ""
+    return [u.strip() for u in urls.split(",") if u.strip()]
+
+
+def make_web3(urls: Optional[List[str]] = None) -> Web3:
+    """Builds a Web3 instance backed by the endpoint pool (or by the replayed cassette)."""
+    cassette = shared_cassette()
+    if is_replay():
+        return Web3(ReplayProvider(cassette))
+    return Web3(RPCPoolProvider(urls or endpoint_urls(), cassette=cassette))
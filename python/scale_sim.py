@@ -0,0 +1,531 @@
+#!/usr/bin/env python3
+"""
+scale_sim.py
+
+Large-membership voting simulation on a local anvil chain.
+
+Fresh VulnerableDAO and DAOOptimized stacks are deployed from the Foundry
+artifacts with 1k-10k synthetic members. Members are not keyed accounts:
+anvil impersonates them (anvil_autoImpersonateAccount) and funds them with
+anvil_setBalance, so every castVote is a real transaction from the member's
+own address without generating or funding thousands of keys.
+
+Votes are sent into the mempool with automine off and then mined block by
+block under a realistic block gas limit (SIM_BLOCK_GAS_LIMIT), which gives:
+- throughput: votes per block and per second (send + mine wall time)
+- lifecycle cost: propose + votes (+ queue + execute) gas per scenario
+- the VulnerableDAO crossover: castVote re-sums every member balance, so its
+  gas grows linearly with membership; a small-N probe fits gas = a + b*N and
+  reports the member count where one vote no longer fits in a block
+
+Every scenario and probe point starts from the same chain state: it is
+snapshotted once (evm_snapshot) and reverted to before each run (see
+fixtures.py), so later runs neither inherit earlier contracts and balances
+nor pay for a fresh anvil.
+
+DAOOptimized._quorumReached sums its own private _proposalVotes mapping,
+which castVote never writes, so any non-zero quorum fraction defeats every
+proposal: SIM_QUORUM_NUMERATOR defaults to 0. Its _executeOperations calls
+targets from the DAO itself rather than through the timelock, so the
+simulated TreasuryBasic is owned by the DAO.
+
+With --seed, member ETH, token balances and (DAOOptimized) delegations are
+written straight into state (see state_seeding.py) instead of being sent
+as mint and delegate transactions.
+
+Usage (anvil running, `forge build` done):
+    anvil --gas-limit 30000000
+    python scale_sim.py --members 1000,5000,10000
+    python scale_sim.py --members 2000 --dao optimized
+    python scale_sim.py --members 10000 --seed
+    python scale_sim.py --members 16 --dao optimized --skip-crossover   # end-to-end check
+
+The exit status is 1 when a DAOOptimized run does not reach Executed.
+"""
+
+import os
+import sys
+import time
+import json
+import argparse
+from dataclasses import dataclass, asdict, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from dotenv import load_dotenv
+from web3 import Web3
+from rpc_pool import make_web3
+from traffic import shared_controller
+from fixtures import StateFixtures
+from tx_records import TxRecordSet
+from state_seeding import StateSeeder, StorageLayout
+from proposal_ids import governor_proposal_id, description_hash, vulnerable_proposal_id
+
+load_dotenv()
+
+# --- CONFIGURATION ---
+SIM_RPC_URL = os.getenv("SIM_RPC_URL", "http://127.0.0.1:8545")
+SIM_BLOCK_GAS_LIMIT = int(os.getenv("SIM_BLOCK_GAS_LIMIT", "30000000"))       # limit the votes are mined under
+SETUP_BLOCK_GAS_LIMIT = int(os.getenv("SETUP_BLOCK_GAS_LIMIT", "1000000000"))  # member-array constructor, bulk mints
+SIM_REPORT_GWEI = float(os.getenv("SIM_REPORT_GWEI", "1.0"))                   # price used to cost the lifecycle in ETH
+ARTIFACT_ROOT = os.getenv("ARTIFACT_ROOT", "../out")
+REPORT_DIR = "reports"
+
+GAS_PRICE = Web3.to_wei(1, "gwei")
+MEMBER_BALANCE = Web3.to_wei(10, "ether")
+TREASURY_BALANCE = Web3.to_wei(1, "ether")
+PAYMENT = Web3.to_wei(0.001, "ether")
+MINT_CHUNK = 500                   # recipients per mintBatch
+EXECUTE_HEADROOM = 150_000         # gas on top of the vote estimate for the VulnerableDAO threshold vote
+PROBE_SIZES = (32, 64, 128, 256)   # member counts for the VulnerableDAO gas fit
+
+# DAOOptimized settings, as in DeployV4_ODAO_TSecure (except the quorum, see above)
+MIN_DELAY = 120
+VOTING_DELAY = 1
+VOTING_PERIOD = 200
+QUORUM_NUMERATOR = int(os.getenv("SIM_QUORUM_NUMERATOR", "0"))
+STATE_SUCCEEDED = 4
+STATE_EXECUTED = 7
+
+
+# --- DATA STRUCTURES ---
+@dataclass
+class BulkResult:
+    sent: int = 0
+    included: int = 0
+    reverted: int = 0
+    rejected: List[str] = field(default_factory=list)   # send errors (e.g. exceeds block gas limit)
+    gas_used: int = 0
+    blocks: List[Tuple[int, int, int]] = field(default_factory=list)   # (number, tx count, gas used)
+    seconds: float = 0.0
+    records: TxRecordSet = field(default_factory=TxRecordSet)   # every included tx
+    sources: List[int] = field(default_factory=list)            # index in the submitted list of each record
+
+    @property
+    def per_block(self) -> float:
+        mined = [b for b in self.blocks if b[1]]
+        return self.included / len(mined) if mined else 0.0
+
+    @property
+    def per_second(self) -> float:
+        return self.included / self.seconds if self.seconds else 0.0
+
+
+@dataclass
+class SimResult:
+    dao: str
+    members: int
+    voters: int
+    block_gas_limit: int
+    vote_gas_estimate: int = 0
+    votes_fit_block: bool = True
+    executed: bool = False
+    gas_propose: int = 0
+    gas_votes: int = 0
+    gas_queue: int = 0
+    gas_execute: int = 0
+    votes_included: int = 0
+    votes_reverted: int = 0
+    votes_rejected: int = 0
+    vote_blocks: int = 0
+    votes_per_block: float = 0.0
+    votes_per_second: float = 0.0
+    setup_seconds: float = 0.0
+    notes: List[str] = field(default_factory=list)
+
+    @property
+    def lifecycle_gas(self) -> int:
+        return self.gas_propose + self.gas_votes + self.gas_queue + self.gas_execute
+
+    def to_dict(self) -> Dict[str, Any]:
+        out = asdict(self)
+        out["lifecycle_gas"] = self.lifecycle_gas
+        out["lifecycle_eth"] = float(Web3.from_wei(self.lifecycle_gas * Web3.to_wei(SIM_REPORT_GWEI, "gwei"), "ether"))
+        return out
+
+
+@dataclass
+class OptimizedStack:
+    token: Any
+    timelock: Any
+    dao: Any
+    treasury: Any
+
+
+# --- ARTIFACTS ---
+def load_artifact(source: str, contract: Optional[str] = None) -> Tuple[list, str]:
+    """(abi, bytecode) from out/<source>.sol/<contract>.json."""
+    path = Path(ARTIFACT_ROOT) / f"{source}.sol" / f"{contract or source}.json"
+    if not path.exists():
+        raise FileNotFoundError(f"Artifact not found at {path.resolve()} (run `forge build`)")
+    with open(path, "r") as f:
+        artifact = json.load(f)
+    return artifact["abi"], artifact["bytecode"]["object"]
+
+
+def synthetic_members(count: int, tag: str) -> List[str]:
+    """Deterministic, never-used addresses; tag keeps reruns on the same anvil apart."""
+    return [Web3.to_checksum_address(Web3.keccak(text=f"scale-sim:{tag}:{i}")[12:]) for i in range(count)]
+
+
+# --- LOCAL CHAIN ---
+class LocalChain:
+    def __init__(self, w3: Web3, traffic, seeder: Optional[StateSeeder] = None):
+        self.w3 = w3
+        self.traffic = traffic
+        self.seeder = seeder
+        self.deployer = w3.eth.accounts[0]
+        self.nonces: Dict[str, int] = {}
+        self.fixtures = StateFixtures(w3)
+        self.fixtures.on_reset(self.nonces.clear)   # a revert rewinds every nonce
+
+    def rpc(self, method: str, *params) -> Any:
+        return self.w3.manager.request_blocking(method, list(params))
+
+    def next_nonce(self, sender: str) -> int:
+        # Synthetic members start at 0; only the deployer has history
+        if sender not in self.nonces:
+            self.nonces[sender] = self.w3.eth.get_transaction_count(sender, "pending") if sender == self.deployer else 0
+        nonce = self.nonces[sender]
+        self.nonces[sender] += 1
+        return nonce
+
+    def set_block_gas_limit(self, limit: int) -> None:
+        self.rpc("evm_setBlockGasLimit", Web3.to_hex(limit))
+        self.rpc("evm_mine")   # the new limit applies from the next block
+
+    def fund(self, addresses: Sequence[str], amount: int) -> None:
+        if self.seeder is not None:
+            self.seeder.set_balances(addresses, amount)
+            return
+        results = self.traffic.map(lambda a: self.rpc("anvil_setBalance", a, Web3.to_hex(amount)), addresses)
+        for r in results:
+            if isinstance(r, Exception):
+                raise r
+
+    def pending(self) -> int:
+        return int(self.rpc("txpool_status")["pending"], 16)
+
+    def tx(self, sender: str, tx_func, gas: int) -> dict:
+        return tx_func.build_transaction({"from": sender, "nonce": self.next_nonce(sender), "gas": gas, "gasPrice": GAS_PRICE})
+
+    # --- SENDING ---
+    def send(self, sender: str, tx_func, gas: int = 5_000_000) -> Any:
+        """Single automined transaction; raises on revert."""
+        receipt = self.w3.eth.wait_for_transaction_receipt(self.w3.eth.send_transaction(self.tx(sender, tx_func, gas)))
+        if receipt["status"] != 1:
+            raise Exception(f"Transaction reverted: {Web3.to_hex(receipt['transactionHash'])}")
+        return receipt
+
+    def deploy(self, abi: list, bytecode: str, *args, gas: int = 10_000_000) -> Tuple[Any, Any]:
+        factory = self.w3.eth.contract(abi=abi, bytecode=bytecode)
+        receipt = self.send(self.deployer, factory.constructor(*args), gas)
+        return self.w3.eth.contract(address=receipt["contractAddress"], abi=abi), receipt
+
+    def bulk(self, txs: List[dict]) -> BulkResult:
+        """
+        Puts every transaction in the mempool with automine off, then mines
+        one block at a time until the pool drains. The base fee is pinned to 0
+        before each block so fee growth over back-to-back full blocks doesn't
+        strand later transactions.
+        """
+        result = BulkResult(sent=len(txs))
+        self.rpc("evm_setAutomine", False)
+        try:
+            start = time.perf_counter()
+            sent = self.traffic.map(self.w3.eth.send_transaction, txs)
+            hashes, sources = [], []
+            for k, (tx, h) in enumerate(zip(txs, sent)):
+                if isinstance(h, Exception):
+                    result.rejected.append(f"{tx['from']}: {h}")
+                    result.records.failure(tx["from"], h)
+                else:
+                    hashes.append(h)
+                    sources.append(k)
+            while self.pending() > 0:
+                self.rpc("anvil_setNextBlockBaseFeePerGas", "0x0")
+                self.rpc("evm_mine")
+                block = self.w3.eth.get_block("latest")
+                result.blocks.append((block["number"], len(block["transactions"]), block["gasUsed"]))
+                if not block["transactions"]:
+                    print(f"  [Sim] {self.pending()} tx(s) left in the pool that no block will include")
+                    break
+            result.seconds = time.perf_counter() - start
+        finally:
+            self.rpc("evm_setAutomine", True)
+
+        receipts = self.traffic.map(self.w3.eth.get_transaction_receipt, hashes)
+        for k, r in zip(sources, receipts):
+            if isinstance(r, Exception):
+                continue
+            result.records.add(r)
+            result.sources.append(k)
+            result.included += 1
+            result.gas_used += r["gasUsed"]
+            result.reverted += r["status"] != 1
+        return result
+
+
+# --- SCENARIOS ---
+def simulate_vulnerable(chain: LocalChain, members: List[str], block_gas_limit: int) -> SimResult:
+    n = len(members)
+    voters = members[: (n + 1) // 2]   # 1 token each: the vote reaching yes*2 >= supply executes
+    res = SimResult("VulnerableDAO", n, len(voters), block_gas_limit)
+    token_abi, token_bin = load_artifact("VulnerableMembershipToken")
+    dao_abi, dao_bin = load_artifact("VulnerableDAO")
+    treasury_abi, treasury_bin = load_artifact("TreasuryBasic")
+
+    # --- SETUP (raised block gas limit) ---
+    t0 = time.perf_counter()
+    chain.set_block_gas_limit(SETUP_BLOCK_GAS_LIMIT)
+    token, _ = chain.deploy(token_abi, token_bin, "Sim Vulnerable Membership", "SVM")
+    dao, _ = chain.deploy(dao_abi, dao_bin, token.address, members, gas=SETUP_BLOCK_GAS_LIMIT // 2)
+    treasury, _ = chain.deploy(treasury_abi, treasury_bin, dao.address)
+    chain.fund([treasury.address], TREASURY_BALANCE)
+    chain.fund(members, MEMBER_BALANCE)
+    unit = Web3.to_wei(1, "ether")
+    if chain.seeder is not None:
+        chain.seeder.seed_token(token.address, StorageLayout.from_artifact("VulnerableMembershipToken"),
+                                {m: unit for m in members})
+    else:
+        mints = chain.bulk([chain.tx(chain.deployer, token.functions.mint(m, unit), 100_000) for m in members])
+        if mints.included != n or mints.reverted:
+            raise Exception(f"Member mint incomplete: {mints.included}/{n} included, {mints.reverted} reverted")
+    res.setup_seconds = time.perf_counter() - t0
+
+    # --- PROPOSE ---
+    data = treasury.encode_abi("executePayment", args=[chain.deployer, PAYMENT])
+    receipt = chain.send(chain.deployer, dao.functions.propose(treasury.address, 0, data, f"scale-sim vulnerable {n}"))
+    res.gas_propose = receipt["gasUsed"]
+    proposal_id = vulnerable_proposal_id(receipt, dao.address)
+
+    # Member loop cost, measured before the realistic limit is restored
+    res.vote_gas_estimate = dao.functions.castVote(proposal_id, True).estimate_gas({"from": voters[0]})
+    chain.set_block_gas_limit(block_gas_limit)
+    vote_gas = res.vote_gas_estimate + EXECUTE_HEADROOM
+    if vote_gas > block_gas_limit:
+        res.votes_fit_block = False
+        res.notes.append(f"castVote needs ~{vote_gas:,} gas with {n} members > block gas limit {block_gas_limit:,}: "
+                         f"no vote can be included")
+        return res
+
+    # --- VOTE ---
+    votes = chain.bulk([chain.tx(v, dao.functions.castVote(proposal_id, True), vote_gas) for v in voters])
+    _apply_votes(res, votes)
+    # The threshold vote executes inline, so execution gas is part of gas_votes.
+    # Getter: (proposer, description, target, value, data, yes, no, createdAt, executed)
+    res.executed = bool(dao.functions.proposals(proposal_id).call()[8])
+    return res
+
+
+def deploy_optimized_stack(chain: LocalChain, members: List[str], quorum_numerator: int = QUORUM_NUMERATOR,
+                           proposal_threshold: int = 0) -> OptimizedStack:
+    """
+    Token, timelock, DAOOptimized and TreasuryBasic (owned by the DAO, which
+    calls proposal targets directly),
+    every member holding 1 self-delegated token. Leaves the raised setup
+    block gas limit in place; the caller restores its own.
+    """
+    token_abi, token_bin = load_artifact("MembershipTokenMintable", "MembershipToken")
+    timelock_abi, timelock_bin = load_artifact("TimelockController")
+    dao_abi, dao_bin = load_artifact("DAOOptimized")
+    treasury_abi, treasury_bin = load_artifact("TreasuryBasic")
+    n = len(members)
+
+    chain.set_block_gas_limit(SETUP_BLOCK_GAS_LIMIT)
+    token, _ = chain.deploy(token_abi, token_bin)
+    timelock, _ = chain.deploy(timelock_abi, timelock_bin, MIN_DELAY, [], ["0x0000000000000000000000000000000000000000"], chain.deployer)
+    dao, _ = chain.deploy(dao_abi, dao_bin, "DAOOptimized-Sim", token.address, timelock.address,
+                          VOTING_DELAY, VOTING_PERIOD, proposal_threshold, quorum_numerator)
+    treasury, _ = chain.deploy(treasury_abi, treasury_bin, dao.address)
+    chain.send(chain.deployer, timelock.functions.grantRole(timelock.functions.PROPOSER_ROLE().call(), dao.address))
+    chain.fund([treasury.address], TREASURY_BALANCE)
+    chain.fund(members, MEMBER_BALANCE)
+
+    unit = Web3.to_wei(1, "ether")
+    if chain.seeder is not None:
+        chain.seeder.seed_token(token.address, StorageLayout.from_artifact("MembershipTokenMintable", "MembershipToken"),
+                                {m: unit for m in members})
+    else:
+        mints = chain.bulk([
+            chain.tx(chain.deployer, token.functions.mintBatch(chunk, [unit] * len(chunk)), 60_000 * len(chunk) + 100_000)
+            for chunk in (members[i:i + MINT_CHUNK] for i in range(0, n, MINT_CHUNK))
+        ])
+        delegations = chain.bulk([chain.tx(m, token.functions.delegate(m), 150_000) for m in members])
+        if mints.reverted or delegations.included != n or delegations.reverted:
+            raise Exception(f"Member setup incomplete: {delegations.included}/{n} delegations, "
+                            f"{mints.reverted + delegations.reverted} reverted")
+    return OptimizedStack(token, timelock, dao, treasury)
+
+
+def simulate_optimized(chain: LocalChain, members: List[str], block_gas_limit: int) -> SimResult:
+    n = len(members)
+    res = SimResult("DAOOptimized", n, n, block_gas_limit)
+
+    # --- SETUP (raised block gas limit) ---
+    t0 = time.perf_counter()
+    stack = deploy_optimized_stack(chain, members)
+    dao, treasury = stack.dao, stack.treasury
+    res.setup_seconds = time.perf_counter() - t0
+    chain.set_block_gas_limit(block_gas_limit)
+
+    # --- PROPOSE ---
+    targets, values = [treasury.address], [0]
+    calldatas = [treasury.encode_abi("executePayment", args=[chain.deployer, PAYMENT])]
+    description = f"scale-sim optimized {n} @ {int(time.time())}"
+    receipt = chain.send(chain.deployer, dao.functions.propose(targets, values, calldatas, description))
+    res.gas_propose = receipt["gasUsed"]
+    proposal_id = governor_proposal_id(targets, values, calldatas, description)
+    chain.rpc("anvil_mine", Web3.to_hex(VOTING_DELAY + 1))
+
+    # --- VOTE ---
+    res.vote_gas_estimate = dao.functions.castVote(proposal_id, 1).estimate_gas({"from": members[0]})
+    vote_gas = int(res.vote_gas_estimate * 1.3)
+    votes = chain.bulk([chain.tx(m, dao.functions.castVote(proposal_id, 1), vote_gas) for m in members])
+    _apply_votes(res, votes)
+
+    # --- QUEUE / EXECUTE ---
+    chain.rpc("anvil_mine", Web3.to_hex(VOTING_PERIOD + 1))
+    state = dao.functions.state(proposal_id).call()
+    if state != STATE_SUCCEEDED:
+        res.notes.append(f"proposal state {state} after voting (3 = Defeated, quorum numerator {QUORUM_NUMERATOR}); "
+                         f"queue/execute skipped")
+        return res
+    desc_hash = description_hash(description)
+    res.gas_queue = chain.send(chain.deployer, dao.functions.queue(targets, values, calldatas, desc_hash))["gasUsed"]
+    chain.rpc("evm_increaseTime", MIN_DELAY + 1)
+    chain.rpc("evm_mine")
+    res.gas_execute = chain.send(chain.deployer, dao.functions.execute(targets, values, calldatas, desc_hash))["gasUsed"]
+    # Executed state and the payment actually leaving the treasury
+    res.executed = (dao.functions.state(proposal_id).call() == STATE_EXECUTED
+                    and treasury.functions.totalWithdrawn().call() == PAYMENT)
+    if not res.executed:
+        res.notes.append("execute() mined but the proposal is not Executed or the payment was not made")
+    return res
+
+
+def _apply_votes(res: SimResult, votes: BulkResult) -> None:
+    res.gas_votes = votes.gas_used
+    res.votes_included = votes.included
+    res.votes_reverted = votes.reverted
+    res.votes_rejected = len(votes.rejected)
+    res.vote_blocks = sum(1 for b in votes.blocks if b[1])
+    res.votes_per_block = round(votes.per_block, 1)
+    res.votes_per_second = round(votes.per_second, 1)
+    if votes.rejected:
+        res.notes.append(f"{len(votes.rejected)} vote(s) rejected at submission, e.g. {votes.rejected[0]}")
+
+
+# --- VULNERABLEDAO CROSSOVER ---
+def linear_fit(points: Sequence[Tuple[float, float]]) -> Tuple[float, float]:
+    """Least-squares line y = base + slope * x through (x, y) points; returns (base, slope)."""
+    k = len(points)
+    mean_x = sum(x for x, _ in points) / k
+    mean_y = sum(y for _, y in points) / k
+    spread = sum((x - mean_x) ** 2 for x, _ in points)
+    slope = sum((x - mean_x) * (y - mean_y) for x, y in points) / spread if spread else 0.0
+    return mean_y - slope * mean_x, slope
+
+
+def vulnerable_crossover(chain: LocalChain, block_gas_limit: int, sizes: Sequence[int] = PROBE_SIZES) -> Dict[str, Any]:
+    """
+    Fits castVote gas = a + b * members from small deployments (balanceOf of
+    an unfunded member costs the same cold reads as a funded one) and solves
+    for the member count where a single vote exceeds the block gas limit.
+    """
+    token_abi, token_bin = load_artifact("VulnerableMembershipToken")
+    dao_abi, dao_bin = load_artifact("VulnerableDAO")
+    chain.set_block_gas_limit(SETUP_BLOCK_GAS_LIMIT)
+    token, _ = chain.deploy(token_abi, token_bin, "Sim Probe", "SP")
+    chain.fixtures.prepare("probe")
+    points = []
+    for size in sizes:
+        chain.fixtures.reset("probe")
+        members = synthetic_members(size, f"probe-{time.time_ns()}")
+        dao, _ = chain.deploy(dao_abi, dao_bin, token.address, members)
+        receipt = chain.send(chain.deployer, dao.functions.propose(chain.deployer, 0, b"", "probe"))
+        gas = dao.functions.castVote(vulnerable_proposal_id(receipt, dao.address), True).estimate_gas({"from": members[0]})
+        points.append((size, gas))
+    chain.set_block_gas_limit(block_gas_limit)
+
+    base, slope = linear_fit(points)
+    limit_members = int((block_gas_limit - EXECUTE_HEADROOM - base) // slope)
+    return {
+        "points": points,
+        "base_gas": round(base),
+        "gas_per_member": round(slope, 1),
+        "block_gas_limit": block_gas_limit,
+        "max_members_per_vote": limit_members,
+    }
+
+
+# --- REPORTING ---
+def log_results(results: List[SimResult], crossover: Optional[Dict[str, Any]]) -> None:
+    print("\n" + "=" * 110)
+    print(f"{'DAO':<14}{'members':>8}{'voters':>8}{'vote gas':>11}{'included':>10}{'blocks':>8}"
+          f"{'votes/blk':>11}{'votes/s':>9}{'lifecycle gas':>15}{'executed':>10}")
+    print("-" * 110)
+    for r in results:
+        print(f"{r.dao:<14}{r.members:>8}{r.voters:>8}{r.vote_gas_estimate:>11,}{r.votes_included:>10}"
+              f"{r.vote_blocks:>8}{r.votes_per_block:>11}{r.votes_per_second:>9}{r.lifecycle_gas:>15,}"
+              f"{str(r.executed):>10}")
+        for note in r.notes:
+            print(f"    ! {note}")
+    if crossover:
+        print("-" * 110)
+        print(f"VulnerableDAO castVote ~ {crossover['base_gas']:,} + {crossover['gas_per_member']} * members gas; "
+              f"one vote exceeds a {crossover['block_gas_limit']:,} gas block above "
+              f"~{crossover['max_members_per_vote']:,} members")
+    print("=" * 110)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Large-membership voting simulation on anvil.")
+    parser.add_argument("--members", default="1000,5000,10000", help="comma-separated member counts")
+    parser.add_argument("--dao", default="vulnerable,optimized", help="vulnerable, optimized or both")
+    parser.add_argument("--block-gas-limit", type=int, default=SIM_BLOCK_GAS_LIMIT)
+    parser.add_argument("--skip-crossover", action="store_true", help="skip the VulnerableDAO gas fit")
+    parser.add_argument("--seed", action="store_true", help="seed member balances/delegations via anvil_setStorageAt")
+    args = parser.parse_args()
+
+    w3 = make_web3([SIM_RPC_URL])
+    if not w3.is_connected():
+        print(f"Cannot reach {SIM_RPC_URL}; start anvil first.")
+        return 1
+    chain = LocalChain(w3, shared_controller(), StateSeeder(SIM_RPC_URL) if args.seed else None)
+    chain.rpc("anvil_autoImpersonateAccount", True)
+    chain.fixtures.prepare("clean")
+    sizes = [int(s) for s in args.members.split(",") if s.strip()]
+    kinds = [k.strip() for k in args.dao.split(",")]
+
+    crossover = None
+    if "vulnerable" in kinds and not args.skip_crossover:
+        crossover = vulnerable_crossover(chain, args.block_gas_limit)
+        print(f"[Sim] VulnerableDAO crossover: ~{crossover['max_members_per_vote']:,} members")
+
+    results = []
+    for size in sizes:
+        members = synthetic_members(size, str(time.time_ns()))
+        if "vulnerable" in kinds:
+            print(f"\n[Sim] VulnerableDAO with {size} members...")
+            chain.fixtures.reset("clean")
+            results.append(simulate_vulnerable(chain, members, args.block_gas_limit))
+        if "optimized" in kinds:
+            print(f"\n[Sim] DAOOptimized with {size} members...")
+            chain.fixtures.reset("clean")
+            results.append(simulate_optimized(chain, members, args.block_gas_limit))
+
+    log_results(results, crossover)
+    os.makedirs(REPORT_DIR, exist_ok=True)
+    path = f"{REPORT_DIR}/scale_sim_{time.strftime('%Y%m%d_%H%M%S')}.json"
+    with open(path, "w") as f:
+        json.dump({"crossover": crossover, "results": [r.to_dict() for r in results]}, f, indent=2)
+    print(f"Saved {path}")
+    unexecuted = [r for r in results if r.dao == "DAOOptimized" and not r.executed]
+    if unexecuted:
+        print(f"{len(unexecuted)} DAOOptimized run(s) did not reach Executed")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""
+simulation.py
+
+Pre-flight simulation for planned transaction batches.
+
+Instead of one eth_call per transaction, a whole batch (e.g. every castVote
+for a proposal) is simulated in a single round-trip with sequential state:
+- eth_simulateV1 (geth / reth / recent anvil)
+- eth_callMany   (erigon / reth) as a fallback
+- per-transaction eth_call as a last resort (no shared state between calls)
+
+SIMULATION_MODE (env):
+- "batch" (default): simulate before broadcasting
+- "fast": skip pre-flight simulation entirely
+"""
+
+import os
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+from eth_abi import decode
+from web3 import Web3
+
+SIMULATION_MODE = os.getenv("SIMULATION_MODE", "batch").lower()
+
+# Error(string) and Panic(uint256) selectors
+ERROR_SELECTOR = "08c379a0"
+PANIC_SELECTOR = "4e487b71"
+
+UNSUPPORTED_MARKERS = ("method not found", "not supported", "does not exist", "-32601", "unknown method")
+
+
+@dataclass
+class SimulationResult:
+    index: int
+    label: str
+    success: bool
+    gas_used: int = 0
+    revert_reason: str = ""
+
+
+def is_fast_mode(mode: Optional[str] = None) -> bool:
+    return (mode or SIMULATION_MODE) == "fast"
+
+
+def decode_revert_reason(data: Any) -> str:
+    """Decodes Error(string) / Panic(uint256) revert data into a readable reason."""
+    if data is None:
+        return ""
+    if isinstance(data, (bytes, bytearray)):
+        data = data.hex()
+    data = str(data).removeprefix("0x")
+    if not data:
+        return "reverted without reason"
+    try:
+        if data.startswith(ERROR_SELECTOR):
+            return decode(["string"], bytes.fromhex(data[8:]))[0]
+        if data.startswith(PANIC_SELECTOR):
+            code = decode(["uint256"], bytes.fromhex(data[8:]))[0]
+            return f"Panic(0x{code:02x})"
+    except Exception:
+        pass
+    return f"custom error 0x{data[:8]}"
+
+
+def _to_call_object(tx: Dict[str, Any]) -> Dict[str, Any]:
+    """Strips signing-only fields and hex-encodes a built transaction for the call RPCs."""
+    # gas is left out so the simulation reports the real requirement, which is then
+    # checked against the planned limit in simulate_batch.
+    call = {"from": tx["from"], "to": tx.get("to"), "data": tx.get("data", "0x")}
+    if tx.get("value"):
+        call["value"] = Web3.to_hex(tx["value"])
+    return call
+
+
+def _is_unsupported(err: Exception) -> bool:
+    msg = str(err).lower()
+    return any(marker in msg for marker in UNSUPPORTED_MARKERS)
+
+
+def _simulate_v1(w3: Web3, calls: List[Dict[str, Any]], block: str) -> List[tuple]:
+    payload = {"blockStateCalls": [{"calls": calls}], "validation": False, "traceTransfers": False}
+    blocks = w3.manager.request_blocking("eth_simulateV1", [payload, block])
+    outcomes = []
+    for call in blocks[0]["calls"]:
+        gas_used = int(call.get("gasUsed", "0x0"), 16)
+        if int(call.get("status", "0x0"), 16) == 1:
+            outcomes.append((True, gas_used, ""))
+        else:
+            error = call.get("error") or {}
+            reason = decode_revert_reason(error.get("data") or call.get("returnData"))
+            outcomes.append((False, gas_used, reason or error.get("message", "reverted")))
+    return outcomes
+
+
+def _call_many(w3: Web3, calls: List[Dict[str, Any]], block: str) -> List[tuple]:
+    bundle = [{"transactions": calls}]
+    context = {"blockNumber": block, "transactionIndex": -1}
+    responses = w3.manager.request_blocking("eth_callMany", [bundle, context])
+    outcomes = []
+    for item in responses[0]:
+        if "error" in item:
+            outcomes.append((False, 0, decode_revert_reason(item.get("value")) or str(item["error"])))
+        else:
+            outcomes.append((True, 0, ""))
+    return outcomes
+
+
+def _call_each(w3: Web3, calls: List[Dict[str, Any]], block: str) -> List[tuple]:
+    outcomes = []
+    for call in calls:
+        try:
+            w3.eth.call(call, block)
+            outcomes.append((True, 0, ""))
+        except Exception as e:
+            data = getattr(e, "data", None)
+            outcomes.append((False, 0, decode_revert_reason(data) if data else repr(e)))
+    return outcomes
+
+
+def simulate_batch(w3: Web3, txs: List[Dict[str, Any]], labels: Optional[List[str]] = None,
+                   block: str = "latest", mode: Optional[str] = None) -> List[SimulationResult]:
+    """
+    Simulates a planned batch of built (unsigned) transactions in order, each one
+    seeing the state left by the previous ones. Returns one result per transaction,
+    or an empty list in fast mode.
+    """
+    if is_fast_mode(mode) or not txs:
+        return []
+
+    labels = labels or [f"tx{i}" for i in range(len(txs))]
+    calls = [_to_call_object(tx) for tx in txs]
+
+    outcomes = None
+    for strategy in (_simulate_v1, _call_many):
+        try:
+            outcomes = strategy(w3, calls, block)
+            break
+        except Exception as e:
+            if not _is_unsupported(e):
+                raise
+    if outcomes is None:
+        print("  [Simulation] Batch RPCs unsupported by endpoint, falling back to independent eth_call per tx.")
+        outcomes = _call_each(w3, calls, block)
+
+    results = []
+    for i, (ok, gas, reason) in enumerate(outcomes):
+        limit = txs[i].get("gas")
+        if ok and limit and gas > limit:
+            ok, reason = False, f"out of gas: needs {gas}, limit {limit}"
+        results.append(SimulationResult(index=i, label=labels[i], success=ok, gas_used=gas, revert_reason=reason))
+    return results
+
+
+def report_simulation(results: List[SimulationResult], title: str = "PRE-FLIGHT SIMULATION") -> List[SimulationResult]:
+    """Prints a per-transaction summary and returns the failed entries."""
+    if not results:
+        return []
+    failures = [r for r in results if not r.success]
+    total_gas = sum(r.gas_used for r in results)
+    print(f"\n--- {title}: {len(results)} tx(s), {len(failures)} revert(s), simulated gas {total_gas} ---")
+    for r in results:
+        status = "OK    " if r.success else "REVERT"
+        reason = f" | {r.revert_reason}" if r.revert_reason else ""
+        print(f"  [{r.index:>4}] {status} {r.label} | gas {r.gas_used}{reason}")
+    return failures
+
+
+def require_batch_success(results: List[SimulationResult], title: str = "PRE-FLIGHT SIMULATION"):
+    """Reports the batch and raises before anything is broadcast if any transaction would revert."""
+    failures = report_simulation(results, title)
+    if failures:
+        first = failures[0]
+        raise Exception(f"{len(failures)} transaction(s) would revert; first: {first.label} ({first.revert_reason})")
@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+state_diff.py
+
+Differential state checks between scenario variants, from prestate traces.
+
+Each scenario's executing transaction (execute, or the VulnerableDAO vote
+that executes inline) is traced once with prestateTracer in diffMode, which
+returns the pre- and post-state of every account the transaction modified.
+Variants are then compared role by role (treasury, recipient, DAO):
+- balance: net wei change of the role's account
+- storage: slots left changed by the transaction and their final values
+  (a reentrancy lock set and cleared inside the tx nets out). Only
+  meaningful when both variants run the same contract; otherwise each
+  side's changed-slot count is reported with no verdict.
+
+Traces are fetched in parallel (traffic.map), one RPC per transaction,
+instead of polling balances per address before and after. Nodes without
+the debug namespace yield UNCHECKED results, never a MATCH.
+
+Usage:
+    diffs = collect_state_diffs(w3, traffic, {"V3": tx3, "V4": tx4})
+    for check in compare_roles(diffs["V3"], diffs["V4"], {"treasury": (t3, t4)}):
+        print(check.line())
+"""
+
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+from web3 import Web3
+
+PRESTATE_DIFF = {"tracer": "prestateTracer", "tracerConfig": {"diffMode": True}}
+
+
+def _int(value: Any) -> int:
+    if value is None:
+        return 0
+    return value if isinstance(value, int) else int(value, 16)
+
+
+@dataclass
+class AccountDiff:
+    balance_delta: int = 0
+    nonce_delta: int = 0
+    code_changed: bool = False
+    storage: Dict[int, Tuple[int, int]] = field(default_factory=dict)   # slot -> (pre, post)
+
+    def final_storage(self) -> Dict[int, int]:
+        return {slot: post for slot, (_, post) in self.storage.items()}
+
+
+@dataclass
+class StateDiff:
+    tx_hash: str
+    accounts: Dict[str, AccountDiff] = field(default_factory=dict)   # checksum address -> diff
+    error: str = ""
+
+    @property
+    def ok(self) -> bool:
+        return not self.error
+
+    def account(self, address: str) -> AccountDiff:
+        return self.accounts.get(Web3.to_checksum_address(address), AccountDiff())
+
+    @classmethod
+    def from_trace(cls, tx_hash: str, trace: Dict[str, Any]) -> "StateDiff":
+        """
+        diffMode lists only modified accounts; post omits unchanged fields and
+        storage slots that were zeroed, so a pre slot missing from post is 0.
+        """
+        diff = cls(tx_hash)
+        pre, post = trace.get("pre", {}), trace.get("post", {})
+        for addr in set(pre) | set(post):
+            before, after = pre.get(addr, {}), post.get(addr, {})
+            acct = AccountDiff()
+            if "balance" in after:
+                acct.balance_delta = _int(after["balance"]) - _int(before.get("balance"))
+            if "nonce" in after:
+                acct.nonce_delta = _int(after["nonce"]) - _int(before.get("nonce"))
+            acct.code_changed = "code" in after
+            old, new = before.get("storage", {}), after.get("storage", {})
+            for slot in set(old) | set(new):
+                values = (_int(old.get(slot)), _int(new.get(slot)))
+                if values[0] != values[1]:
+                    acct.storage[_int(slot)] = values
+            diff.accounts[Web3.to_checksum_address(addr)] = acct
+        return diff
+
+
+def trace_state_diff(w3: Web3, tx_hash: str) -> StateDiff:
+    tx_hash = tx_hash if tx_hash.startswith("0x") else "0x" + tx_hash
+    try:
+        trace = w3.manager.request_blocking("debug_traceTransaction", [tx_hash, PRESTATE_DIFF])
+    except Exception as e:
+        return StateDiff(tx_hash, error=f"debug_traceTransaction failed: {e}")
+    return StateDiff.from_trace(tx_hash, dict(trace))
+
+
+def collect_state_diffs(w3: Web3, traffic, txs: Dict[str, str]) -> Dict[str, StateDiff]:
+    """Traces every labelled tx in parallel; missing hashes give an errored diff."""
+    labels = list(txs)
+    diffs = traffic.map(lambda label: trace_state_diff(w3, txs[label]) if txs[label]
+                        else StateDiff("", error="no executing transaction"), labels)
+    return {label: d if isinstance(d, StateDiff) else StateDiff(txs[label], error=str(d))
+            for label, d in zip(labels, diffs)}
+
+
+def same_code(w3: Web3, addr_a: str, addr_b: str) -> bool:
+    """True when both addresses run the same runtime bytecode (same code hash)."""
+    code_a, code_b = w3.eth.get_code(addr_a), w3.eth.get_code(addr_b)
+    return bool(code_a) and Web3.keccak(code_a) == Web3.keccak(code_b)
+
+
+# --- COMPARISON ---
+@dataclass
+class RoleCheck:
+    role: str
+    field: str            # "balance" | "storage"
+    a: Any
+    b: Any
+    match: Optional[bool]  # None: not checked (trace unavailable)
+    detail: str = ""
+    compared: bool = True  # False: different contracts, values reported side by side only
+
+    @property
+    def verdict(self) -> str:
+        return "UNCHECKED" if self.match is None else "MATCH" if self.match else "DIVERGED"
+
+    def line(self, labels: Tuple[str, str] = ("vulnerable", "optimized")) -> str:
+        if not self.compared:
+            return f"[STATE] {self.role}_{self.field}: {labels[0]}={self.a}, {labels[1]}={self.b}{self.detail}"
+        return f"[STATE] {self.role}_{self.field}: {self.verdict} ({labels[0]}={self.a}, {labels[1]}={self.b}){self.detail}"
+
+
+def compare_roles(a: StateDiff, b: StateDiff, roles: Dict[str, Tuple[str, str]],
+                  storage_roles: Optional[set] = None, count_roles: Optional[set] = None) -> List[RoleCheck]:
+    """
+    roles: name -> (address in variant a, address in variant b). Storage is
+    compared for storage_roles only (default: all); contracts keyed by
+    per-variant ids (proposal ids) never match slot for slot. count_roles
+    run different contracts in each variant (unrelated layouts): their
+    changed-slot counts are reported without a verdict.
+    """
+    checks: List[RoleCheck] = []
+    if not (a.ok and b.ok):
+        reason = f" - {a.error or b.error}"
+        for role in roles:
+            checks.append(RoleCheck(role, "state", "?", "?", None, reason))
+        return checks
+    for role, (addr_a, addr_b) in roles.items():
+        acct_a, acct_b = a.account(addr_a), b.account(addr_b)
+        checks.append(RoleCheck(role, "balance", acct_a.balance_delta, acct_b.balance_delta,
+                                acct_a.balance_delta == acct_b.balance_delta))
+        if count_roles and role in count_roles:
+            checks.append(RoleCheck(role, "storage", f"{len(acct_a.storage)} slot(s)", f"{len(acct_b.storage)} slot(s)",
+                                    None, " (different contracts, not compared)", compared=False))
+            continue
+        if storage_roles is not None and role not in storage_roles:
+            continue
+        store_a, store_b = acct_a.final_storage(), acct_b.final_storage()
+        only_a, only_b = set(store_a) - set(store_b), set(store_b) - set(store_a)
+        changed = sum(1 for s in set(store_a) & set(store_b) if store_a[s] != store_b[s])
+        detail = f" - slots only in one: {len(only_a)}/{len(only_b)}, same slot different value: {changed}" \
+            if (only_a or only_b or changed) else ""
+        checks.append(RoleCheck(role, "storage", f"{len(store_a)} slot(s)", f"{len(store_b)} slot(s)",
+                                store_a == store_b, detail))
+    return checks
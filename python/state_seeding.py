@@ -0,0 +1,239 @@
+#!/usr/bin/env python3
+"""
+state_seeding.py
+
+Member setup on a local node (anvil) by writing state directly, instead of
+one funding, one mint and one delegation transaction per member:
+- ETH balances:      anvil_setBalance
+- token balances:    ERC20 _balances[m] and _totalSupply (anvil_setStorageAt)
+- ERC20Votes power:  _delegatee[m] = m, checkpoints (clock, balance) in
+                     _delegateCheckpoints[m] (one, or `depth` on consecutive
+                     past blocks), and a new _totalCheckpoints entry for the
+                     new supply
+
+Slots come from the token artifact's storageLayout (foundry.toml has
+extra_output = ["storageLayout"]), so the same code serves MembershipToken,
+MembershipTokenMintable and VulnerableMembershipToken (no Votes storage:
+balances only). Everything goes to the node as JSON-RPC batches of
+SEED_BATCH_SIZE requests.
+
+Seeded members are assumed fresh: their balances and checkpoints are
+overwritten, not added to. Checkpoints are keyed at the current block
+(ERC20Votes' default block-number clock) and one block is mined afterwards,
+so the seeded power is visible to getPastVotes of any later proposal.
+
+Usage (anvil running, `forge build` done):
+    python state_seeding.py --token 0x... --members dao_members.json --tokens 300000 --eth 0.006
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+import requests
+from dotenv import load_dotenv
+from web3 import Web3
+
+load_dotenv()
+
+SEED_RPC_URL = os.getenv("SEED_RPC_URL", "http://127.0.0.1:8545")
+SEED_BATCH_SIZE = int(os.getenv("SEED_BATCH_SIZE", "1000"))
+ARTIFACT_ROOT = os.getenv("ARTIFACT_ROOT", "../out")
+
+CHECKPOINT_KEY_BITS = 48   # Checkpoints.Checkpoint208: uint48 _key (low bits), uint208 _value
+
+
+# --- SLOT MATH ---
+def mapping_slot(key: str, slot: int) -> int:
+    """Slot of mapping(address => ...)[key] declared at `slot`."""
+    return int.from_bytes(Web3.keccak(bytes.fromhex(key[2:].lower().rjust(64, "0")) + slot.to_bytes(32, "big")), "big")
+
+
+def array_data_slot(slot: int) -> int:
+    """First element of the dynamic array whose length lives at `slot`."""
+    return int.from_bytes(Web3.keccak(slot.to_bytes(32, "big")), "big")
+
+
+def word(value: int) -> str:
+    return "0x" + value.to_bytes(32, "big").hex()
+
+
+def pack_checkpoint(key: int, value: int) -> int:
+    return key | (value << CHECKPOINT_KEY_BITS)
+
+
+def unpack_checkpoint(packed: int) -> Tuple[int, int]:
+    return packed & ((1 << CHECKPOINT_KEY_BITS) - 1), packed >> CHECKPOINT_KEY_BITS
+
+
+@dataclass
+class StorageLayout:
+    contract: str
+    slots: Dict[str, int]   # variable label -> slot (all seeded variables start a slot)
+
+    @classmethod
+    def from_artifact(cls, source: str, contract: Optional[str] = None, root: str = ARTIFACT_ROOT) -> "StorageLayout":
+        path = Path(root) / f"{source}.sol" / f"{contract or source}.json"
+        if not path.exists():
+            raise FileNotFoundError(f"Artifact not found at {path.resolve()} (run `forge build`)")
+        with open(path, "r") as f:
+            layout = json.load(f).get("storageLayout")
+        if not layout:
+            raise ValueError(f"{path} has no storageLayout; add extra_output = [\"storageLayout\"] to foundry.toml and rebuild")
+        return cls(contract or source, {v["label"]: int(v["slot"]) for v in layout["storage"]})
+
+    def slot(self, label: str) -> int:
+        if label not in self.slots:
+            raise KeyError(f"{self.contract} has no storage variable {label!r}")
+        return self.slots[label]
+
+    @property
+    def has_votes(self) -> bool:
+        return "_delegateCheckpoints" in self.slots
+
+
+@dataclass
+class SeedReport:
+    members: int = 0
+    requests: int = 0
+    batches: int = 0
+    seconds: float = 0.0
+
+    def summary(self) -> str:
+        return (f"Seeded {self.members} member(s) with {self.requests} RPC(s) in {self.batches} batch(es), "
+                f"{self.seconds:.2f}s")
+
+
+# --- SEEDER ---
+class StateSeeder:
+    def __init__(self, rpc_url: str = SEED_RPC_URL, batch_size: int = SEED_BATCH_SIZE):
+        self.rpc_url = rpc_url
+        self.batch_size = batch_size
+        self.session = requests.Session()
+        self.report = SeedReport()
+
+    def batch(self, calls: Sequence[Tuple[str, list]]) -> List[Any]:
+        """Sends (method, params) pairs as JSON-RPC batches; raises on the first error."""
+        results: List[Any] = []
+        for start in range(0, len(calls), self.batch_size):
+            chunk = calls[start:start + self.batch_size]
+            body = [{"jsonrpc": "2.0", "id": start + i, "method": m, "params": p} for i, (m, p) in enumerate(chunk)]
+            resp = self.session.post(self.rpc_url, json=body, timeout=120)
+            resp.raise_for_status()
+            replies = sorted(resp.json(), key=lambda r: r["id"])
+            for reply in replies:
+                if "error" in reply:
+                    method, params = calls[reply["id"]]
+                    raise Exception(f"{method}{params[:2]} failed: {reply['error']}")
+                results.append(reply.get("result"))
+            self.report.requests += len(chunk)
+            self.report.batches += 1
+        return results
+
+    def call(self, method: str, *params) -> Any:
+        return self.batch([(method, list(params))])[0]
+
+    def storage(self, address: str, slots: Sequence[int]) -> List[int]:
+        return [int(v, 16) for v in self.batch([("eth_getStorageAt", [address, hex(s), "latest"]) for s in slots])]
+
+    # --- ETH ---
+    def set_balances(self, addresses: Sequence[str], amount: int) -> None:
+        start = time.perf_counter()
+        self.batch([("anvil_setBalance", [a, hex(amount)]) for a in addresses])
+        self.report.seconds += time.perf_counter() - start
+
+    # --- TOKENS ---
+    def seed_token(self, token: str, layout: StorageLayout, balances: Dict[str, int], depth: int = 1) -> None:
+        """
+        Writes member balances (and self-delegated voting checkpoints when the
+        token has ERC20Votes). depth > 1 gives every member a history of that
+        many checkpoints, one per block up to the current one.
+        """
+        start = time.perf_counter()
+        token = Web3.to_checksum_address(token)
+        added = sum(balances.values())
+        supply_slot = layout.slot("_totalSupply")
+        balances_slot = layout.slot("_balances")
+        writes = [(mapping_slot(m, balances_slot), b) for m, b in balances.items()]
+
+        (supply,) = self.storage(token, [supply_slot])
+        writes.append((supply_slot, supply + added))
+
+        if layout.has_votes:
+            clock = int(self.call("eth_blockNumber"), 16)
+            if clock < depth:
+                self.call("anvil_mine", hex(depth - clock))   # checkpoint keys must be distinct past blocks
+                clock = depth
+            delegatee_slot = layout.slot("_delegatee")
+            checkpoints_slot = layout.slot("_delegateCheckpoints")
+            for member, amount in balances.items():
+                trace = mapping_slot(member, checkpoints_slot)   # Trace208 struct: its array length
+                writes.append((mapping_slot(member, delegatee_slot), int(member, 16)))
+                writes.append((trace, depth))
+                first = array_data_slot(trace)
+                writes.extend((first + i, pack_checkpoint(clock - depth + 1 + i, amount)) for i in range(depth))
+
+            # Total supply checkpoints: append (or overwrite this block's) entry with the new total
+            total_slot = layout.slot("_totalCheckpoints")
+            (length,) = self.storage(token, [total_slot])
+            last_key, last_value = 0, 0
+            if length:
+                (packed,) = self.storage(token, [array_data_slot(total_slot) + length - 1])
+                last_key, last_value = unpack_checkpoint(packed)
+            index = length - 1 if length and last_key == clock else length
+            writes.append((array_data_slot(total_slot) + index, pack_checkpoint(clock, last_value + added)))
+            writes.append((total_slot, index + 1))
+
+        self.batch([("anvil_setStorageAt", [token, word(slot), word(value)]) for slot, value in writes])
+        if layout.has_votes:
+            self.call("evm_mine")   # getPastVotes only reads clocks strictly in the past
+        self.report.members += len(balances)
+        self.report.seconds += time.perf_counter() - start
+
+
+# --- CLI ---
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Seed member ETH, token balances and votes on a local node.")
+    parser.add_argument("--token", default=os.getenv("TOKEN_ADDRESS"), help="token address (default TOKEN_ADDRESS)")
+    parser.add_argument("--artifact", default="MembershipTokenMintable:MembershipToken",
+                        help="<source>[:<contract>] of the token artifact")
+    parser.add_argument("--members", default="dao_members.json", help="JSON list of {address, ...}")
+    parser.add_argument("--tokens", type=float, default=300_000, help="tokens per member (18 decimals)")
+    parser.add_argument("--eth", type=float, default=0.006, help="ETH balance per member (0 to skip)")
+    args = parser.parse_args()
+    if not args.token:
+        raise SystemExit("--token or TOKEN_ADDRESS must be set.")
+
+    source, _, contract = args.artifact.partition(":")
+    layout = StorageLayout.from_artifact(source, contract or None)
+    with open(args.members, "r") as f:
+        members = [Web3.to_checksum_address(m["address"]) for m in json.load(f)]
+
+    seeder = StateSeeder()
+    if args.eth:
+        seeder.set_balances(members, Web3.to_wei(args.eth, "ether"))
+    amount = Web3.to_wei(args.tokens, "ether")
+    seeder.seed_token(args.token, layout, {m: amount for m in members})
+    print(seeder.report.summary())
+
+    # Spot check through the contract's own getters
+    w3 = Web3(Web3.HTTPProvider(SEED_RPC_URL))
+    abi = [{"name": "balanceOf", "type": "function", "stateMutability": "view",
+            "inputs": [{"name": "a", "type": "address"}], "outputs": [{"name": "", "type": "uint256"}]},
+           {"name": "getVotes", "type": "function", "stateMutability": "view",
+            "inputs": [{"name": "a", "type": "address"}], "outputs": [{"name": "", "type": "uint256"}]}]
+    token = w3.eth.contract(address=Web3.to_checksum_address(args.token), abi=abi)
+    sample = members[0]
+    balance = token.functions.balanceOf(sample).call()
+    votes = token.functions.getVotes(sample).call() if layout.has_votes else balance
+    ok = balance == amount and votes == amount
+    print(f"{'OK' if ok else 'MISMATCH'}: {sample} balance {balance}, votes {votes} (expected {amount})")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,267 @@
+#!/usr/bin/env python3
+"""
+tracing.py
+
+Lightweight span tracing for the harness: scenario -> phase -> tx -> RPC.
+
+Spans are recorded per thread as Chrome trace-event "complete" events and
+saved as {"traceEvents": [...]}, which chrome://tracing and Perfetto open
+directly. RPC calls are traced by a middleware (install_tracing), so every
+eth_* call shows up under the span that issued it.
+
+Phases are open-ended: tracer.phase("votes") closes the thread's previous
+phase and starts a new one, mirroring RPCRecorder.set_step. Categories
+listed in TRACE_PROFILE (e.g. "phase") also run under cProfile; each
+profiled span writes a .prof file and keeps its top functions in the span
+args. cProfile sees only the span's own thread, not traffic.map workers.
+
+TRACE_FILE (env) enables tracing; unset, spans are no-ops.
+
+Usage:
+    tracer = Tracer()
+    install_tracing(w3, tracer)
+    with tracer.span("V3", cat="scenario"):
+        tracer.phase("propose")
+        with tracer.span("tx propose", cat="tx"):
+            ...
+    print(tracer.summary_table())
+    tracer.save("reports/trace.json")
+"""
+
+import os
+import io
+import json
+import time
+import pstats
+import cProfile
+import threading
+from contextlib import contextmanager, nullcontext
+from typing import Any, Dict, List, Optional
+from eth_utils.toolz import curry
+from web3.middleware.base import Web3MiddlewareBuilder
+
+TRACE_FILE = os.getenv("TRACE_FILE", "")
+TRACE_PROFILE = {c.strip() for c in os.getenv("TRACE_PROFILE", "").split(",") if c.strip()}
+TRACE_PROFILE_DIR = os.getenv("TRACE_PROFILE_DIR", "reports/profiles")
+PROFILE_TOP = 15     # functions kept in a profiled span's args
+
+# Time inside these categories is attributed separately in summary_table; the rest is Python
+RPC_CATEGORY = "rpc"
+WAIT_CATEGORY = "wait"
+
+
+class _Span:
+    __slots__ = ("name", "cat", "args", "start", "phase", "profiler", "children")
+
+    def __init__(self, name: str, cat: str, args: Dict[str, Any], phase: str):
+        self.name = name
+        self.cat = cat
+        self.args = args
+        self.start = time.perf_counter()
+        self.phase = phase
+        self.profiler: Optional[cProfile.Profile] = None
+        self.children = 0.0   # seconds spent in nested spans on the same thread
+
+
+class Tracer:
+    def __init__(self, enabled: bool = bool(TRACE_FILE), profile: Optional[set] = None,
+                 profile_dir: str = TRACE_PROFILE_DIR):
+        self.enabled = enabled
+        self.profile = TRACE_PROFILE if profile is None else profile
+        self.profile_dir = profile_dir
+        self.origin = time.perf_counter()
+        self.events: List[Dict[str, Any]] = []
+        self.threads: Dict[int, str] = {}
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._profiled = 0
+
+    # --- THREAD STATE ---
+    def _stack(self) -> List[_Span]:
+        if not hasattr(self._local, "stack"):
+            self._local.stack = []
+            self._local.phase = None
+            with self._lock:
+                self.threads[threading.get_ident()] = threading.current_thread().name
+        return self._local.stack
+
+    def _current_phase(self) -> str:
+        self._stack()
+        phase = self._local.phase
+        return phase.name if phase is not None else ""
+
+    # --- SPANS ---
+    def _begin(self, name: str, cat: str, args: Dict[str, Any]) -> _Span:
+        span = _Span(name, cat, args, self._current_phase())
+        if cat in self.profile and not getattr(self._local, "profiling", False):
+            # One profiler per thread: nested profiled spans are covered by the outer one
+            span.profiler = cProfile.Profile()
+            self._local.profiling = True
+            span.profiler.enable()
+        return span
+
+    def _end(self, span: _Span) -> float:
+        end = time.perf_counter()
+        if span.profiler is not None:
+            span.profiler.disable()
+            self._local.profiling = False
+            span.args["profile"] = self._save_profile(span)
+        event = {
+            "name": span.name,
+            "cat": span.cat,
+            "ph": "X",
+            "ts": round((span.start - self.origin) * 1e6, 1),
+            "dur": round((end - span.start) * 1e6, 1),
+            "pid": os.getpid(),
+            "tid": threading.get_ident(),
+            "args": {"phase": span.phase, **span.args} if span.phase else dict(span.args),
+        }
+        # Exclusive time: lets summary() split a phase into RPC / wait / Python without double counting
+        event["args"]["self_ms"] = round((end - span.start - span.children) * 1000, 3)
+        with self._lock:
+            self.events.append(event)
+        return end - span.start
+
+    def span(self, name: str, cat: str = "span", **args):
+        """Context manager timing one nested span (no-op when tracing is disabled)."""
+        if not self.enabled:
+            return nullcontext()
+        return self._span(name, cat, args)
+
+    @contextmanager
+    def _span(self, name: str, cat: str, args: Dict[str, Any]):
+        stack = self._stack()
+        span = self._begin(name, cat, args)
+        stack.append(span)
+        try:
+            yield span
+        finally:
+            stack.pop()
+            duration = self._end(span)
+            if stack:
+                stack[-1].children += duration
+
+    def phase(self, name: str, **args) -> None:
+        """Ends this thread's open phase span (if any) and starts a new one."""
+        if not self.enabled:
+            return
+        self.end_phase()
+        # Named "<scenario>/<phase>" so phases of different scenarios stay apart (as in RPCRecorder.step)
+        scenario = next((s.name for s in self._stack() if s.cat == "scenario"), "")
+        self._local.phase = self._begin(f"{scenario}/{name}" if scenario else name, "phase", args)
+
+    def end_phase(self) -> None:
+        if not self.enabled:
+            return
+        self._stack()
+        phase, self._local.phase = self._local.phase, None
+        if phase is not None:
+            self._end(phase)
+
+    @contextmanager
+    def scenario(self, name: str, **args):
+        """Top-level span; closes the last open phase when the scenario ends."""
+        with self.span(name, "scenario", **args):
+            try:
+                yield
+            finally:
+                self.end_phase()
+
+    # --- PROFILING ---
+    def _save_profile(self, span: _Span) -> Dict[str, Any]:
+        os.makedirs(self.profile_dir, exist_ok=True)
+        with self._lock:
+            self._profiled += 1
+            seq = self._profiled
+        safe = "".join(c if c.isalnum() else "_" for c in span.name)[:40]
+        path = os.path.join(self.profile_dir, f"{seq:03d}_{span.cat}_{safe}.prof")
+        span.profiler.dump_stats(path)
+        stats = pstats.Stats(span.profiler, stream=io.StringIO())
+        top = sorted(stats.stats.items(), key=lambda kv: kv[1][3], reverse=True)[:PROFILE_TOP]
+        return {
+            "file": path,
+            "top_cumulative_ms": {f"{fn}:{line}({func})": round(ct * 1000, 2) for (fn, line, func), (_, _, _, ct, _) in top},
+        }
+
+    # --- REPORTING ---
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        """
+        Per phase: wall time (sum of phase spans), exclusive time in RPC and
+        wait spans issued from the phase's own thread, and the remainder
+        (Python: ABI encoding, signing, building, bookkeeping). RPCs from
+        worker threads overlap the phase and are reported as rpc_workers_ms.
+        """
+        with self._lock:
+            events = list(self.events)
+        phases: Dict[str, Dict[str, float]] = {}
+        phase_threads: Dict[str, set] = {}
+        for ev in events:
+            if ev["cat"] == "phase":
+                p = phases.setdefault(ev["name"], {"wall_ms": 0.0, "rpc_ms": 0.0, "rpc_workers_ms": 0.0, "wait_ms": 0.0})
+                p["wall_ms"] += ev["dur"] / 1000
+                phase_threads.setdefault(ev["name"], set()).add(ev["tid"])
+        for ev in events:
+            phase = ev["args"].get("phase")
+            if phase not in phases or ev["cat"] not in (RPC_CATEGORY, WAIT_CATEGORY):
+                continue
+            if ev["cat"] == WAIT_CATEGORY:
+                phases[phase]["wait_ms"] += ev["args"]["self_ms"]
+            elif ev["tid"] in phase_threads[phase]:
+                phases[phase]["rpc_ms"] += ev["args"]["self_ms"]
+        for ev in events:
+            # Worker-thread RPCs carry no phase; attribute them by time overlap with the phase spans
+            if ev["cat"] != RPC_CATEGORY or ev["args"].get("phase"):
+                continue
+            for ph in events:
+                if ph["cat"] == "phase" and ph["ts"] <= ev["ts"] <= ph["ts"] + ph["dur"]:
+                    phases[ph["name"]]["rpc_workers_ms"] += ev["dur"] / 1000
+                    break
+        for p in phases.values():
+            p["python_ms"] = max(0.0, p["wall_ms"] - p["rpc_ms"] - p["wait_ms"])
+        return {name: {k: round(v, 1) for k, v in p.items()} for name, p in phases.items()}
+
+    def summary_table(self) -> str:
+        lines = [
+            f"{'PHASE':<14} {'WALL s':>9} {'RPC s':>9} {'WAIT s':>9} {'PYTHON s':>9} {'RPC (workers) s':>16}",
+            "-" * 70,
+        ]
+        for name, p in self.summary().items():
+            lines.append(f"{name:<14} {p['wall_ms'] / 1000:>9.2f} {p['rpc_ms'] / 1000:>9.2f} {p['wait_ms'] / 1000:>9.2f} "
+                         f"{p['python_ms'] / 1000:>9.2f} {p['rpc_workers_ms'] / 1000:>16.2f}")
+        return "\n".join(lines)
+
+    def save(self, path: str) -> None:
+        """Writes a Chrome trace-event file (chrome://tracing, ui.perfetto.dev)."""
+        with self._lock:
+            events = list(self.events)
+            threads = dict(self.threads)
+        meta = [{"name": "thread_name", "ph": "M", "pid": os.getpid(), "tid": tid, "args": {"name": name}}
+                for tid, name in threads.items()]
+        with open(path, "w") as f:
+            json.dump({"traceEvents": meta + events, "displayTimeUnit": "ms"}, f)
+        print(f"Saved trace ({len(events)} spans): {path}")
+
+
+class TracingMiddleware(Web3MiddlewareBuilder):
+    tracer: Tracer = None
+
+    @staticmethod
+    @curry
+    def build(tracer: Tracer, w3):
+        middleware = TracingMiddleware(w3)
+        middleware.tracer = tracer
+        return middleware
+
+    def wrap_make_request(self, make_request):
+        def middleware(method, params):
+            with self.tracer.span(method, RPC_CATEGORY):
+                return make_request(method, params)
+
+        return middleware
+
+
+def install_tracing(w3, tracer: Tracer) -> Tracer:
+    """Traces every RPC as an "rpc" span (only when the tracer is enabled)."""
+    if tracer.enabled:
+        w3.middleware_onion.inject(TracingMiddleware.build(tracer), name="tracing", layer=0)
+    return tracer
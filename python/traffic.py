@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+traffic.py
+
+Adaptive rate / concurrency control for RPC traffic, replacing fixed sleeps.
+
+- token bucket: caps requests per second (RPC_MAX_RPS), refilled continuously
+- AIMD window: caps in-flight requests; grows additively while calls succeed
+  and halves on rate-limit or "replacement transaction underpriced" errors,
+  which also halves the bucket rate
+
+The RPC pool provider runs every request through the shared controller, so
+bulk loops only need `traffic.map(...)` to get as much parallelism as the
+endpoint currently allows.
+"""
+
+import os
+import time
+import threading
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Iterable, List
+
+RPC_MAX_RPS = float(os.getenv("RPC_MAX_RPS", "500"))
+RPC_MAX_INFLIGHT = int(os.getenv("RPC_MAX_INFLIGHT", "32"))
+INITIAL_RPS = 20.0
+RATE_STEP = 0.5       # rps added per successful call
+
+BACKOFF_MARKERS = (
+    "429",
+    "rate limit",
+    "too many requests",
+    "replacement transaction underpriced",
+    "-32005",
+)
+
+
+def is_backoff_error(message: Any) -> bool:
+    """True for errors that mean 'slow down' rather than 'this call is wrong'."""
+    msg = str(message).lower()
+    return any(marker in msg for marker in BACKOFF_MARKERS)
+
+
+class TrafficController:
+    def __init__(self, max_rps: float = RPC_MAX_RPS, max_window: int = RPC_MAX_INFLIGHT,
+                 initial_window: float = 4.0, min_rps: float = 1.0):
+        self.max_rps = max_rps
+        self.min_rps = min_rps
+        self.rate = min(INITIAL_RPS, max_rps)
+        self.tokens = 1.0
+        self.last_refill = time.monotonic()
+        self.max_window = max_window
+        self.window = min(initial_window, max_window)
+        self.in_flight = 0
+        self.successes = 0
+        self.backoffs = 0
+        self._cond = threading.Condition()
+
+    # --- TOKEN BUCKET ---
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(max(self.rate, 1.0), self.tokens + (now - self.last_refill) * self.rate)
+        self.last_refill = now
+
+    def _acquire(self) -> None:
+        with self._cond:
+            while True:
+                self._refill()
+                if self.in_flight < int(self.window) and self.tokens >= 1.0:
+                    self.tokens -= 1.0
+                    self.in_flight += 1
+                    return
+                wait = (1.0 - self.tokens) / self.rate if self.tokens < 1.0 else 0.05
+                self._cond.wait(timeout=max(wait, 0.001))
+
+    def _release(self) -> None:
+        with self._cond:
+            self.in_flight -= 1
+            self._cond.notify_all()
+
+    # --- AIMD ---
+    def on_success(self) -> None:
+        with self._cond:
+            self.successes += 1
+            self.window = min(self.max_window, self.window + 1.0 / self.window)
+            self.rate = min(self.max_rps, self.rate + RATE_STEP)
+            self._cond.notify_all()
+
+    def backoff(self) -> None:
+        with self._cond:
+            self.backoffs += 1
+            self.window = max(1.0, self.window / 2)
+            self.rate = max(self.min_rps, self.rate / 2)
+
+    @contextmanager
+    def slot(self):
+        """Holds one in-flight slot for the duration of a single RPC request."""
+        self._acquire()
+        try:
+            yield
+        finally:
+            self._release()
+
+    # --- BULK HELPERS ---
+    def map(self, fn: Callable[[Any], Any], items: Iterable[Any]) -> List[Any]:
+        """
+        Runs fn over items concurrently and returns results in order. Effective
+        parallelism is bounded by the AIMD window enforced on each RPC call.
+        Exceptions are returned in place of results so one failure doesn't hide the rest.
+        """
+        items = list(items)
+        if not items:
+            return []
+
+        def run(item):
+            try:
+                return fn(item)
+            except Exception as e:
+                return e
+
+        with ThreadPoolExecutor(max_workers=min(self.max_window, len(items))) as pool:
+            return list(pool.map(run, items))
+
+    def summary(self) -> str:
+        return (f"traffic: window {self.window:.1f}/{self.max_window}, rate {self.rate:.1f}/{self.max_rps:.0f} rps, "
+                f"{self.successes} ok, {self.backoffs} backoff(s)")
+
+
+_shared = None
+
+
+def shared_controller() -> TrafficController:
+    """Process-wide controller shared by every pooled Web3 instance."""
+    global _shared
+    if _shared is None:
+        _shared = TrafficController()
+    return _shared
@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""
+tx_records.py
+
+Compact per-transaction result records.
+
+TxRecordSet stores every transaction of a step (e.g. all votes of a
+scenario) column-wise in typed arrays: 32-byte hash, 20-byte sender, gas
+used, effective gas price, block, status, submit->receipt latency and the
+inclusion timings (inclusion.py) as fixed-width fields, so thousands of
+votes cost a few dozen bytes each instead of a full receipt dict with logs
+and bloom. Indexing returns a lightweight TxRecord view; aggregates are
+computed from the columns.
+
+Usage:
+    votes = TxRecordSet()
+    votes.add(receipt, latency_ms=812.0)
+    votes.add(receipt, timing=tracker.pop(tx_hash))
+    votes.failure(voter_addr, "nonce too low")
+    votes.aggregates()      # count / gas / latency summary
+    votes.to_dict()         # columnar JSON (cheap to serialise)
+"""
+
+from array import array
+from typing import Any, Dict, List, Optional, Tuple
+from hexbytes import HexBytes
+from web3 import Web3
+
+STATUS_REVERTED = 0
+STATUS_OK = 1
+UNRESOLVED = -1.0      # timing column not measured / not yet resolved
+TIMING_COLUMNS = ("pending_ms", "inclusion_ms", "confirm_ms")
+
+
+def _percentile(sorted_values: List[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    idx = min(len(sorted_values) - 1, int(round(pct / 100 * (len(sorted_values) - 1))))
+    return sorted_values[idx]
+
+
+class TxRecord:
+    __slots__ = ("tx_hash", "sender", "gas_used", "gas_price", "block", "status", "latency_ms",
+                 "submitted", "pending_ms", "inclusion_ms", "confirm_ms")
+
+    def __init__(self, tx_hash: str, sender: str, gas_used: int, gas_price: int, block: int, status: int,
+                 latency_ms: float, submitted: float = 0.0, pending_ms: float = UNRESOLVED,
+                 inclusion_ms: float = UNRESOLVED, confirm_ms: float = UNRESOLVED):
+        self.tx_hash = tx_hash
+        self.sender = sender
+        self.gas_used = gas_used
+        self.gas_price = gas_price
+        self.block = block
+        self.status = status
+        self.latency_ms = latency_ms
+        self.submitted = submitted
+        self.pending_ms = pending_ms
+        self.inclusion_ms = inclusion_ms
+        self.confirm_ms = confirm_ms
+
+    @classmethod
+    def from_receipt(cls, receipt: Any, latency_ms: float = 0.0, timing: Any = None) -> "TxRecord":
+        record = cls(Web3.to_hex(receipt["transactionHash"]), receipt["from"], receipt["gasUsed"],
+                     receipt.get("effectiveGasPrice", 0), receipt["blockNumber"], receipt["status"], latency_ms)
+        if timing is not None:
+            record.latency_ms = timing.receipt_ms
+            record.submitted = timing.submitted
+            record.pending_ms = timing.pending_ms
+            record.inclusion_ms = timing.inclusion_ms
+            record.confirm_ms = timing.confirm_ms
+        return record
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+class TxRecordSet:
+    __slots__ = ("_hashes", "_senders", "gas_used", "gas_price", "block", "status", "latency_ms",
+                 "submitted", "pending_ms", "inclusion_ms", "confirm_ms", "errors")
+
+    def __init__(self):
+        self._hashes = bytearray()
+        self._senders = bytearray()
+        self.gas_used = array("Q")
+        self.gas_price = array("Q")
+        self.block = array("Q")
+        self.status = array("b")
+        self.latency_ms = array("f")
+        self.submitted = array("d")      # unix submit time (0: not tracked)
+        self.pending_ms = array("f")
+        self.inclusion_ms = array("f")
+        self.confirm_ms = array("f")
+        self.errors: List[Tuple[str, str]] = []   # (sender, message) for txs that never got a receipt
+
+    def __len__(self) -> int:
+        return len(self.gas_used)
+
+    # --- APPEND ---
+    def add(self, receipt: Any, latency_ms: float = 0.0, timing: Any = None) -> None:
+        """timing (inclusion.TxTiming) supplies the latency and the pending/inclusion/confirm columns."""
+        if timing is not None:
+            latency_ms = timing.receipt_ms
+        self._hashes += bytes(HexBytes(receipt["transactionHash"])).rjust(32, b"\0")
+        self._senders += bytes(HexBytes(receipt["from"]))
+        self.gas_used.append(receipt["gasUsed"])
+        self.gas_price.append(receipt.get("effectiveGasPrice", 0))
+        self.block.append(receipt["blockNumber"])
+        self.status.append(receipt["status"])
+        self.latency_ms.append(latency_ms)
+        self.submitted.append(timing.submitted if timing is not None else 0.0)
+        for name in TIMING_COLUMNS:
+            getattr(self, name).append(getattr(timing, name) if timing is not None else UNRESOLVED)
+
+    def failure(self, sender: str, message: Any) -> None:
+        self.errors.append((sender, str(message)))
+
+    # --- ACCESS ---
+    def __getitem__(self, i: int) -> TxRecord:
+        if i < 0:
+            i += len(self)
+        return TxRecord(
+            "0x" + self._hashes[i * 32:(i + 1) * 32].hex(),
+            Web3.to_checksum_address(bytes(self._senders[i * 20:(i + 1) * 20])),
+            self.gas_used[i], self.gas_price[i], self.block[i], self.status[i], float(self.latency_ms[i]),
+            self.submitted[i], float(self.pending_ms[i]), float(self.inclusion_ms[i]), float(self.confirm_ms[i]),
+        )
+
+    def __iter__(self):
+        return (self[i] for i in range(len(self)))
+
+    @property
+    def last(self) -> Optional[TxRecord]:
+        return self[-1] if len(self) else None
+
+    # --- AGGREGATES ---
+    def total_gas(self, ok_only: bool = True) -> int:
+        if not ok_only:
+            return sum(self.gas_used)
+        return sum(g for g, s in zip(self.gas_used, self.status) if s == STATUS_OK)
+
+    def timing_percentiles(self) -> Dict[str, float]:
+        """p50/p95/p99 of each measured timing column (unresolved entries skipped)."""
+        out = {}
+        for name in TIMING_COLUMNS:
+            values = sorted(v for v in getattr(self, name) if v != UNRESOLVED)
+            for pct in (50, 95, 99):
+                out[f"{name}_p{pct}"] = round(_percentile(values, pct), 1)
+        return out
+
+    def aggregates(self) -> Dict[str, Any]:
+        ok = [g for g, s in zip(self.gas_used, self.status) if s == STATUS_OK]
+        lat = sorted(self.latency_ms)
+        return {
+            "count": len(self),
+            "ok": len(ok),
+            "reverted": len(self) - len(ok),
+            "errors": len(self.errors),
+            "gas_total": sum(ok),
+            "gas_avg": (sum(ok) / len(ok)) if ok else 0,
+            "gas_min": min(ok) if ok else 0,
+            "gas_max": max(ok) if ok else 0,
+            "blocks": (max(self.block) - min(self.block) + 1) if len(self) else 0,
+            "latency_ms_p50": round(_percentile(lat, 50), 1),
+            "latency_ms_p95": round(_percentile(lat, 95), 1),
+            **self.timing_percentiles(),
+        }
+
+    # --- SERIALISATION ---
+    def to_dict(self, detail: bool = True) -> Dict[str, Any]:
+        """Aggregates plus (optionally) the raw columns; one list per field, not one dict per tx."""
+        out: Dict[str, Any] = {"aggregates": self.aggregates()}
+        if detail:
+            out["columns"] = {
+                "tx_hash": ["0x" + self._hashes[i:i + 32].hex() for i in range(0, len(self._hashes), 32)],
+                "sender": ["0x" + self._senders[i:i + 20].hex() for i in range(0, len(self._senders), 20)],
+                "gas_used": self.gas_used.tolist(),
+                "gas_price": self.gas_price.tolist(),
+                "block": self.block.tolist(),
+                "status": self.status.tolist(),
+                "latency_ms": [round(x, 1) for x in self.latency_ms],
+                "submitted": self.submitted.tolist(),
+                **{name: [round(x, 1) for x in getattr(self, name)] for name in TIMING_COLUMNS},
+            }
+            out["errors"] = [{"sender": s, "error": e} for s, e in self.errors]
+        return out
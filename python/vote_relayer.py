@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+"""
+vote_relayer.py
+
+Relayed voting for DAOOptimized (OZ Governor castVoteBySig).
+
+Members sign EIP-712 Ballot(proposalId, support, voter, nonce) messages
+offline, in parallel worker processes; one relayer account submits them
+through VoteRelayer.castVotesBySig (src/VoteRelayer.sol) in as few
+transactions as the block gas budget allows. Members need no ETH.
+
+VOTE_MODE=relayed switches gas_optimizer's optimized scenario (and
+fund_members) to this path; VOTE_RELAYER_ADDR is the deployed relayer
+(script/DeployVoteRelayer.s.sol).
+"""
+
+import os
+from dataclasses import dataclass, field
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Sequence, Tuple
+from eth_account import Account
+from web3 import Web3
+from event_decoder import EventRegistry, find_events
+from gas_estimator import GAS_SAFETY_MARGIN
+from inclusion import InclusionTracker
+from tx_records import TxRecordSet
+
+VOTE_MODE = os.getenv("VOTE_MODE", "direct").lower()   # "direct" | "relayed"
+VOTE_RELAYER_ADDR = os.getenv("VOTE_RELAYER_ADDR")
+RELAY_BLOCK_GAS_FRACTION = float(os.getenv("RELAY_BLOCK_GAS_FRACTION", "0.5"))  # share of a block per relay tx
+PROBE_BALLOTS = 8      # ballots in the sizing estimate
+
+BALLOT_TYPES = {
+    "Ballot": [
+        {"name": "proposalId", "type": "uint256"},
+        {"name": "support", "type": "uint8"},
+        {"name": "voter", "type": "address"},
+        {"name": "nonce", "type": "uint256"},
+    ]
+}
+
+GOVERNOR_RELAY_ABI = [
+    {"inputs": [], "name": "eip712Domain", "outputs": [{"name": "fields", "type": "bytes1"}, {"name": "name", "type": "string"}, {"name": "version", "type": "string"}, {"name": "chainId", "type": "uint256"}, {"name": "verifyingContract", "type": "address"}, {"name": "salt", "type": "bytes32"}, {"name": "extensions", "type": "uint256[]"}], "stateMutability": "view", "type": "function"},
+    {"inputs": [{"name": "owner", "type": "address"}], "name": "nonces", "outputs": [{"name": "", "type": "uint256"}], "stateMutability": "view", "type": "function"},
+    {"inputs": [{"name": "proposalId", "type": "uint256"}, {"name": "support", "type": "uint8"}], "name": "castVote", "outputs": [{"name": "", "type": "uint256"}], "stateMutability": "nonpayable", "type": "function"},
+]
+VOTE_RELAYER_ABI = [
+    {"inputs": [{"name": "governor", "type": "address"}, {"components": [{"name": "proposalId", "type": "uint256"}, {"name": "support", "type": "uint8"}, {"name": "voter", "type": "address"}, {"name": "signature", "type": "bytes"}], "name": "ballots", "type": "tuple[]"}], "name": "castVotesBySig", "outputs": [{"name": "cast", "type": "uint256"}], "stateMutability": "nonpayable", "type": "function"},
+    {"anonymous": False, "inputs": [{"indexed": True, "name": "proposalId", "type": "uint256"}, {"indexed": True, "name": "voter", "type": "address"}, {"indexed": False, "name": "reason", "type": "bytes"}], "name": "BallotFailed", "type": "event"},
+]
+
+
+def is_relayed_mode(mode: str = None) -> bool:
+    return (mode or VOTE_MODE) == "relayed"
+
+
+@dataclass
+class SignedBallot:
+    proposal_id: int
+    support: int
+    voter: str
+    signature: bytes
+
+    def as_tuple(self) -> Tuple[int, int, str, bytes]:
+        return (self.proposal_id, self.support, self.voter, self.signature)
+
+
+@dataclass
+class RelayReport:
+    ballots: int = 0
+    cast: int = 0
+    txs: int = 0
+    gas_used: int = 0
+    direct_vote_gas: int = 0      # estimated gas of one castVote transaction, for comparison
+    tx_hashes: List[str] = field(default_factory=list)
+    failed_voters: List[str] = field(default_factory=list)
+
+    @property
+    def amortized_gas(self) -> float:
+        return self.gas_used / self.cast if self.cast else 0.0
+
+    def summary(self) -> str:
+        lines = [
+            f"relayed votes: {self.cast}/{self.ballots} cast in {self.txs} tx(s), {self.gas_used} gas total",
+            f"  per-vote gas, relayed (amortized): {self.amortized_gas:,.0f}",
+        ]
+        if self.direct_vote_gas:
+            saving = (1 - self.amortized_gas / self.direct_vote_gas) * 100 if self.cast else 0.0
+            lines.append(f"  per-vote gas, castVote per tx:     {self.direct_vote_gas:,} ({saving:+.1f}% saved by relaying)")
+        if self.failed_voters:
+            lines.append(f"  rejected ballots: {len(self.failed_voters)} ({', '.join(self.failed_voters[:5])}...)")
+        return "\n".join(lines)
+
+
+def _sign_ballot(job: Tuple[Dict[str, Any], str, int, int, int]) -> SignedBallot:
+    """Worker-process entry point: signs one EIP-712 ballot."""
+    domain, private_key, proposal_id, support, nonce = job
+    acct = Account.from_key(private_key)
+    signed = Account.sign_typed_data(
+        private_key,
+        domain_data=domain,
+        message_types=BALLOT_TYPES,
+        message_data={"proposalId": proposal_id, "support": support, "voter": acct.address, "nonce": nonce},
+    )
+    return SignedBallot(proposal_id, support, acct.address, bytes(signed.signature))
+
+
+class VoteRelayer:
+    def __init__(self, w3: Web3, relayer_addr: str, sender, governor_addr: str, traffic,
+                 block_gas_fraction: float = RELAY_BLOCK_GAS_FRACTION, margin: float = GAS_SAFETY_MARGIN):
+        if not relayer_addr:
+            raise ValueError("VOTE_RELAYER_ADDR is not set. Deploy script/DeployVoteRelayer.s.sol first.")
+        self.w3 = w3
+        self.sender = sender
+        self.traffic = traffic
+        self.relayer = w3.eth.contract(address=Web3.to_checksum_address(relayer_addr), abi=VOTE_RELAYER_ABI)
+        self.governor = w3.eth.contract(address=Web3.to_checksum_address(governor_addr), abi=GOVERNOR_RELAY_ABI)
+        self.block_gas_fraction = block_gas_fraction
+        self.margin = margin
+        self.events = EventRegistry()
+        self.events.add_abi("VoteRelayer", VOTE_RELAYER_ABI)
+        self.inclusion = InclusionTracker(w3)
+
+    # --- SIGNING ---
+    def domain(self) -> Dict[str, Any]:
+        """EIP-712 domain as reported by the Governor itself (ERC-5267)."""
+        _, name, version, chain_id, verifying_contract, _, _ = self.governor.functions.eip712Domain().call()
+        return {"name": name, "version": version, "chainId": chain_id, "verifyingContract": verifying_contract}
+
+    def sign(self, proposal_id: int, support: int, member_keys: Sequence[str]) -> List[SignedBallot]:
+        """Reads vote nonces concurrently, then signs every ballot in parallel worker processes."""
+        domain = self.domain()
+        voters = [Account.from_key(k).address for k in member_keys]
+        nonces = self.traffic.map(lambda v: self.governor.functions.nonces(v).call(), voters)
+        for n in nonces:
+            if isinstance(n, Exception):
+                raise n
+        jobs = [(domain, k, proposal_id, support, n) for k, n in zip(member_keys, nonces)]
+        with ProcessPoolExecutor() as pool:
+            return list(pool.map(_sign_ballot, jobs, chunksize=max(1, len(jobs) // 32)))
+
+    # --- BATCHING ---
+    def _call(self, batch: List[SignedBallot]):
+        return self.relayer.functions.castVotesBySig(self.governor.address, [b.as_tuple() for b in batch])
+
+    def _estimate(self, batch: List[SignedBallot]) -> int:
+        return self._call(batch).estimate_gas({"from": self.sender.address})
+
+    def plan_batches(self, ballots: List[SignedBallot]) -> List[Tuple[List[SignedBallot], int]]:
+        """
+        Splits ballots into (batch, gas limit) pairs that each fit the block gas
+        budget: a probe estimate sizes the batches, each batch is then estimated
+        on its own and halved if it still doesn't fit.
+        """
+        budget = int(self.w3.eth.get_block("latest")["gasLimit"] * self.block_gas_fraction)
+        probe = ballots[:PROBE_BALLOTS]
+        per_ballot = self._estimate(probe) * self.margin / len(probe)
+        size = max(1, int(budget // per_ballot))
+        pending = [ballots[i:i + size] for i in range(0, len(ballots), size)]
+
+        planned = []
+        while pending:
+            batch = pending.pop(0)
+            limit = int(self._estimate(batch) * self.margin)
+            if limit > budget and len(batch) > 1:
+                mid = len(batch) // 2
+                pending[:0] = [batch[:mid], batch[mid:]]
+                continue
+            planned.append((batch, limit))
+        return planned
+
+    # --- SUBMISSION ---
+    def relay(self, proposal_id: int, support: int, member_keys: Sequence[str],
+              records: TxRecordSet = None) -> RelayReport:
+        """Signs, batches and relays the ballots; each relay tx is appended to records (with timings) when given."""
+        report = RelayReport()
+        if not member_keys:
+            return report
+        # Baseline: what one member would pay to vote with their own transaction
+        first_voter = Account.from_key(member_keys[0]).address
+        try:
+            report.direct_vote_gas = self.governor.functions.castVote(proposal_id, support).estimate_gas({"from": first_voter})
+        except Exception as e:
+            print(f"  [Relayer] castVote baseline estimate failed: {e}")
+
+        ballots = self.sign(proposal_id, support, member_keys)
+        report.ballots = len(ballots)
+        batches = self.plan_batches(ballots)
+        print(f"  [Relayer] {len(ballots)} signed ballot(s) -> {len(batches)} relay tx(s)")
+
+        # Sequential relayer nonces; all batches are in flight before any receipt is awaited
+        nonce = self.w3.eth.get_transaction_count(self.sender.address, "pending")
+        gas_price = self.w3.eth.gas_price
+        tx_hashes = []
+        for k, (batch, limit) in enumerate(batches):
+            tx = self._call(batch).build_transaction({
+                "chainId": self.w3.eth.chain_id,
+                "from": self.sender.address,
+                "nonce": nonce + k,
+                "gas": limit,
+                "gasPrice": gas_price,
+            })
+            signed = self.sender.sign_transaction(tx)
+            tx_hashes.append(self.inclusion.submit(signed.raw_transaction)[0])
+
+        receipts = self.traffic.map(self.inclusion.wait, tx_hashes)
+        for (batch, _), receipt in zip(batches, receipts):
+            if isinstance(receipt, Exception):
+                raise receipt
+            if records is not None:
+                records.add(receipt, timing=self.inclusion.pop(receipt["transactionHash"]))
+            if receipt["status"] != 1:
+                raise Exception(f"Relay transaction reverted: {Web3.to_hex(receipt['transactionHash'])}")
+            failed = find_events(self.events.decode_receipt(receipt), "BallotFailed", self.relayer.address)
+            report.failed_voters.extend(e.args["voter"] for e in failed)
+            report.cast += len(batch) - len(failed)
+            report.gas_used += receipt["gasUsed"]
+            report.txs += 1
+            report.tx_hashes.append(Web3.to_hex(receipt["transactionHash"]))
+        return report
@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""
+vote_scheduler.py
+
+Block-gas-aware vote submission plans.
+
+Each vote gets its own gas limit (simulated or estimated gas plus margin)
+instead of a flat per-vote limit, and votes are packed into waves whose
+summed limits fit one block's gas budget (first-fit decreasing), so a wave
+is included in a single block and voting finishes in as few blocks as the
+limits allow. Waves are sent one after the other, each waiting for its
+receipts.
+
+For VulnerableDAO the vote that takes yes*2 past the members' balance sum
+runs _execute inside castVote. The scheduler orders votes by their actual
+weights so that this threshold-crossing vote is the designated executor,
+sends it alone after every other wave has landed, and drops votes that
+would only arrive after execution (they revert with "Executed").
+
+Usage:
+    scheduler = VoteScheduler(w3, traffic)
+    order = scheduler.threshold_order(dao, token, voters, executor)  # VulnerableDAO only
+    schedule = scheduler.schedule(order.before, gas_limits, final=order.crossing, final_gas=gas)
+    for wave in schedule.waves: ...
+"""
+
+import os
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Sequence
+from web3 import Web3
+from web3.exceptions import ContractLogicError
+from gas_estimator import GAS_SAFETY_MARGIN
+
+VOTE_BLOCK_GAS_FRACTION = float(os.getenv("VOTE_BLOCK_GAS_FRACTION", "0.5"))   # share of a block one wave may fill
+MEMBER_PROBE_CHUNK = 64      # members(i) reads per round when sizing VulnerableDAO's member list
+
+
+@dataclass
+class ScheduledVote:
+    voter: Any          # eth_account LocalAccount
+    gas: int = 0
+
+
+@dataclass
+class ThresholdOrder:
+    before: List[Any] = field(default_factory=list)     # votes that stay below the threshold
+    crossing: Optional[Any] = None                       # vote that triggers _execute
+    dropped: List[Any] = field(default_factory=list)    # would land after execution
+    supply: int = 0
+    weights: Dict[str, int] = field(default_factory=dict)
+
+
+@dataclass
+class VoteSchedule:
+    waves: List[List[ScheduledVote]]
+    block_budget: int
+    final: Optional[ScheduledVote] = None
+
+    @property
+    def blocks(self) -> int:
+        return len(self.waves) + (1 if self.final else 0)
+
+    def summary(self) -> str:
+        votes = sum(len(w) for w in self.waves) + (1 if self.final else 0)
+        fill = [sum(v.gas for v in w) / self.block_budget * 100 for w in self.waves]
+        line = f"{votes} vote(s) in {self.blocks} block(s), budget {self.block_budget:,} gas/block"
+        if fill:
+            line += f", wave fill {min(fill):.0f}-{max(fill):.0f}%"
+        if self.final:
+            line += f", final vote {self.final.gas:,} gas"
+        return line
+
+
+def pack_waves(votes: Sequence[ScheduledVote], budget: int) -> List[List[ScheduledVote]]:
+    """First-fit decreasing: fewest waves whose summed gas limits fit the budget."""
+    waves: List[List[ScheduledVote]] = []
+    room: List[int] = []
+    for vote in sorted(votes, key=lambda v: v.gas, reverse=True):
+        for i, free in enumerate(room):
+            if vote.gas <= free:
+                waves[i].append(vote)
+                room[i] -= vote.gas
+                break
+        else:
+            # A vote larger than the budget still gets a wave of its own
+            waves.append([vote])
+            room.append(budget - vote.gas)
+    return waves
+
+
+class VoteScheduler:
+    def __init__(self, w3: Web3, traffic, block_gas_fraction: float = VOTE_BLOCK_GAS_FRACTION,
+                 margin: float = GAS_SAFETY_MARGIN):
+        self.w3 = w3
+        self.traffic = traffic
+        self.block_gas_fraction = block_gas_fraction
+        self.margin = margin
+
+    def block_gas_limit(self) -> int:
+        return self.w3.eth.get_block("latest")["gasLimit"]
+
+    # --- VULNERABLEDAO THRESHOLD ---
+    def member_supply(self, dao_contract, token_contract) -> int:
+        """Sum of member balances, exactly as VulnerableDAO.castVote recomputes it."""
+        members: List[str] = []
+        end = False
+        while not end:
+            start = len(members)
+            chunk = self.traffic.map(lambda i: dao_contract.functions.members(i).call(),
+                                     range(start, start + MEMBER_PROBE_CHUNK))
+            for m in chunk:
+                # members(i) reverts (Panic 0x32) past the end of the array; any other error is not the end
+                if isinstance(m, ContractLogicError):
+                    end = True
+                    break
+                if isinstance(m, Exception):
+                    raise m
+                members.append(m)
+        balances = self.traffic.map(lambda m: token_contract.functions.balanceOf(m).call(), members)
+        for b in balances:
+            if isinstance(b, Exception):
+                raise b
+        return sum(balances)
+
+    def threshold_order(self, dao_contract, token_contract, voters: Sequence[Any], executor: Any) -> ThresholdOrder:
+        """
+        Splits yes-voters into the votes sent before the threshold, the vote
+        that crosses it (the executor when its weight suffices, otherwise the
+        first voter that would cross) and votes that would come too late.
+        """
+        order = ThresholdOrder(supply=self.member_supply(dao_contract, token_contract))
+        accounts = [v for v in voters if v.address != executor.address] + [executor]
+        balances = self.traffic.map(lambda a: token_contract.functions.balanceOf(a.address).call(), accounts)
+        for acct, b in zip(accounts, balances):
+            if isinstance(b, Exception):
+                raise b
+            order.weights[acct.address] = b
+
+        yes = 0
+        overflow = []
+        for acct in accounts[:-1]:
+            weight = order.weights[acct.address]
+            if weight and (yes + weight) * 2 >= order.supply:
+                overflow.append(acct)
+                continue
+            yes += weight
+            order.before.append(acct)
+
+        final_yes = yes + order.weights[executor.address]
+        if final_yes and final_yes * 2 >= order.supply:
+            order.crossing = executor
+            order.dropped = overflow
+        elif overflow:
+            # The executor alone can't cross: the first overflowing voter executes, the executor is dropped
+            order.crossing = overflow[0]
+            order.dropped = overflow[1:] + [executor]
+        else:
+            order.before.append(executor)   # nobody crosses; the proposal stays open
+        return order
+
+    # --- PACKING ---
+    def schedule(self, voters: Sequence[Any], gas_limits: Sequence[int], final: Any = None,
+                 final_gas: int = 0) -> VoteSchedule:
+        """Packs voters (with per-vote gas limits) into block-sized waves; `final` is sent last, alone."""
+        block_limit = self.block_gas_limit()
+        budget = int(block_limit * self.block_gas_fraction)
+        if final is not None and final_gas > block_limit:
+            raise Exception(f"Final vote needs {final_gas:,} gas but blocks only hold {block_limit:,}")
+        votes = [ScheduledVote(v, g) for v, g in zip(voters, gas_limits)]
+        return VoteSchedule(
+            waves=pack_waves(votes, budget),
+            block_budget=budget,
+            final=ScheduledVote(final, final_gas) if final is not None else None,
+        )
+
+    def limits_from_simulation(self, sim_results: Sequence[Any], count: int, fallback: int) -> List[int]:
+        """Per-vote limits from a preflight batch (SimulationResult.gas_used), fallback where missing."""
+        limits = [int(r.gas_used * self.margin) if r.gas_used else fallback for r in sim_results[:count]]
+        return limits + [fallback] * (count - len(limits))
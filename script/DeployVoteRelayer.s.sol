@@ -0,0 +1,18 @@
+// SPDX-License-Identifier: MIT
+pragma solidity ^0.8.20;
+
+import "forge-std/Script.sol";
+import "forge-std/console.sol";
+import "../src/VoteRelayer.sol";
+
+contract DeployVoteRelayer is Script {
+    function run() external {
+        vm.startBroadcast();
+
+        // Stateless: one relayer serves every DAOOptimized deployment
+        VoteRelayer relayer = new VoteRelayer();
+        console.log("VOTE_RELAYER_ADDR:", address(relayer));
+
+        vm.stopBroadcast();
+    }
+}
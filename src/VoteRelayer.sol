@@ -0,0 +1,40 @@
+// SPDX-License-Identifier: MIT
+pragma solidity ^0.8.20;
+
+import {IGovernor} from "@openzeppelin/contracts/governance/IGovernor.sol";
+
+/// @title VoteRelayer - submits many EIP-712 signed ballots in one transaction
+/// @notice Stateless and permissionless: the Governor verifies each signature and
+///         counts the vote for the signer, so the relayer only pays the gas.
+contract VoteRelayer {
+    /// -----------------------------------------------------------------------
+    /// TYPES
+    /// -----------------------------------------------------------------------
+    struct Ballot {
+        uint256 proposalId;
+        uint8 support;
+        address voter;
+        bytes signature;
+    }
+
+    /// -----------------------------------------------------------------------
+    /// EVENTS
+    /// -----------------------------------------------------------------------
+    event BallotFailed(uint256 indexed proposalId, address indexed voter, bytes reason);
+
+    /// -----------------------------------------------------------------------
+    /// RELAY
+    /// -----------------------------------------------------------------------
+    /// @dev A rejected ballot (already voted, stale nonce, bad signature) is reported
+    ///      and skipped instead of reverting the rest of the batch.
+    function castVotesBySig(IGovernor governor, Ballot[] calldata ballots) external returns (uint256 cast) {
+        for (uint256 i = 0; i < ballots.length; i++) {
+            Ballot calldata b = ballots[i];
+            try governor.castVoteBySig(b.proposalId, b.support, b.voter, b.signature) {
+                cast++;
+            } catch (bytes memory reason) {
+                emit BallotFailed(b.proposalId, b.voter, reason);
+            }
+        }
+    }
+}